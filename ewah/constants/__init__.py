@@ -43,6 +43,7 @@ class EWAHConstants:
     ES_FULL_REFRESH = "full-refresh"  # load all available data
     ES_INCREMENTAL = "incremental"  # just load data pertaining to a certain time
     ES_SUBSEQUENT = "subsequent"  # just load newest data
+    ES_CDC = "cdc"  # apply changes captured by the source (change data capture)
 
     # Available Load Strategies
     LS_UPSERT = "upsert"  # update data based on a (composite) primary key
@@ -55,6 +56,7 @@ class EWAHConstants:
         ES_FULL_REFRESH: LS_INSERT_REPLACE,
         ES_SUBSEQUENT: LS_UPSERT,
         ES_INCREMENTAL: LS_UPSERT,
+        ES_CDC: LS_UPSERT,
     }
 
     # EC.LS_FULLCREMENTAL = 'fullcremental'
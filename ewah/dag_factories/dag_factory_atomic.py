@@ -148,10 +148,11 @@ def dag_factory_atomic(
                     "target_database_name": target_database_name,
                 }
             )
-            # Atomic DAG only works with full refresh and subsequent strategies!
+            # Atomic DAG only works with full refresh, subsequent and cdc strategies!
             assert table_config["extract_strategy"] in (
                 EC.ES_FULL_REFRESH,
                 EC.ES_SUBSEQUENT,
+                EC.ES_CDC,
             )
             table_config["load_strategy"] = table_config.get(
                 "load_strategy",
@@ -25,6 +25,9 @@ class EWAHAircallHook(EWAHBaseHook):
     }
     _BASE_URL = "https://api.aircall.io/v1/{0}"
 
+    # Aircall allows 60 requests per minute per company
+    _HTTP_REQUESTS_PER_SECOND = 1
+
     @staticmethod
     def get_ui_field_behaviour():
         return {
@@ -41,7 +44,6 @@ class EWAHAircallHook(EWAHBaseHook):
         data_from=None,
         data_until=None,
         batch_size=10000,
-        batch_call_pause_seconds=1,
     ):
         _msg = "batch_size param must be a positive integer <= 10k "
         assert isinstance(batch_size, int), _msg
@@ -65,8 +67,7 @@ class EWAHAircallHook(EWAHBaseHook):
 
         data = []
         while url:
-            time.sleep(batch_call_pause_seconds)
-            request = requests.get(url, params=params, auth=auth)
+            request = self.http_get(url, params=params, auth=auth)
             assert request.status_code == 200, request.text
             response = request.json()
             url = response.get("meta", {}).get("next_page_link")
@@ -98,7 +98,7 @@ class EWAHAirflowHook(EWAHBaseHook):
         while True:
             i += 1
             self.log.info("Making request {0} to {1}...".format(i, url))
-            request = requests.get(url, params=params, auth=auth)
+            request = self.http_get(url, params=params, auth=auth)
             assert request.status_code == 200, request.text
             response = request.json()
             keys = list(response.keys())
@@ -3,7 +3,6 @@ from ewah.constants import EWAHConstants as EC
 
 # from datetime import datetime, date, timedelta
 import pendulum
-import requests
 import gzip
 import json
 import time
@@ -82,7 +81,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
                 "client_secret": self.conn.lwa_client_secret,
                 "refresh_token": self.conn.refresh_token,
             }
-            response = requests.post(url, data=payload)
+            response = self.http_post(url, data=payload)
             assert response.status_code == 200, response.text
             self._access_token = response.json()["access_token"]
             self._access_token_expires_at = requested_at.add(
@@ -102,7 +101,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json",
         }
-        response = requests.get(url, headers=headers)
+        response = self.http_get(url, headers=headers)
         assert response.status_code == 200, response.text
         return response.json()
 
@@ -141,7 +140,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
             # "segment": "query",  # TODO: make kwarg
         }
         self.log.info(f"Creating report at {url}")
-        response = requests.post(url, data=json.dumps(params), headers=headers)
+        response = self.http_post(url, data=json.dumps(params), headers=headers)
         assert response.status_code == 202, response.text
         report_id = response.json()["reportId"]
 
@@ -152,7 +151,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
                 [self._ENDPOINTS_ADS_API[self.conn.region], "v2", "reports", report_id]
             )
             self.log.info(f"Pinging report status at {url}")
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers=headers)
             assert response.status_code == 200, response.text
             report_status = response.json()["status"]
             if report_status == "SUCCESS":
@@ -179,7 +178,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
             ]
         )
         self.log.info(f"Downloading report from {url}")
-        response = requests.get(url, headers=headers)
+        response = self.http_get(url, headers=headers)
         assert response.status_code == 200, response.text
         report_data = json.loads(gzip.decompress(response.content).decode())
 
@@ -224,7 +223,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
             },
         }
         self.log.info(f"Creating report at {url}")
-        response = requests.post(url, data=json.dumps(params), headers=headers)
+        response = self.http_post(url, data=json.dumps(params), headers=headers)
         assert response.status_code == 200, response.text
         report_id = response.json()["reportId"]
 
@@ -240,7 +239,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
                 ]
             )
             self.log.info(f"Pinging report status at {url}")
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers=headers)
             assert response.status_code == 200, response.text
             report_status = response.json()["status"]
             if report_status == "COMPLETED":
@@ -259,7 +258,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
         # Download data
         download_url = response.json()["url"]
         self.log.info(f"Downloading report from {download_url}")
-        download = requests.get(download_url)
+        download = self.http_get(download_url)
         report_data = json.loads(gzip.decompress(download.content).decode())
 
         return report_data
@@ -302,7 +301,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
         if dimensions:
             body["dimensions"] = dimensions
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self.http_post(url, headers=headers, json=body)
         assert response.status_code == 202, response.text
         report_id = response.json()["reportId"]
 
@@ -313,7 +312,7 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
         wait_for = 1
         while True:
             self.log.info(f"Pinging report status at {url}")
-            response = requests.get(url, headers=headers)
+            response = self.http_get(url, headers=headers)
             assert response.status_code == 200, response.text
             report_status = response.json()["status"]
             if report_status == "SUCCESS":
@@ -331,6 +330,6 @@ class EWAHAmazonAdsHook(EWAHBaseHook):
 
         url = response.json()["location"]
         self.log.info("Downloading report...")
-        response = requests.get(url)
+        response = self.http_get(url)
         assert response.status_code == 200, response.text
         return json.loads(response.content.decode())
@@ -5,23 +5,25 @@ in the process of building this EWAH connector. Check out Airbyte for more info!
 
 from ewah.hooks.base import EWAHBaseHook
 from ewah.constants import EWAHConstants as EC
+from ewah.utils.python_utils import TokenBucket
 
+from collections import deque
 from datetime import datetime, date, timedelta
 from dateutil.parser import parse as parse_datetime
-from io import StringIO
+from tempfile import TemporaryFile
 import xml.etree.ElementTree as ET
 import urllib.parse
 import pendulum
 import hashlib
 import hmac
 import boto3
-import requests
 import time
 import pytz
 import copy
-import gzip
 import json
+import zlib
 import csv
+import io
 
 
 class EWAHAmazonSellerCentralHook(EWAHBaseHook):
@@ -40,7 +42,9 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         "orders": {
             "report_type": "GET_XML_ALL_ORDERS_DATA_BY_LAST_UPDATE_GENERAL",
             "report_options": {},
-            "method_name": "get_order_data_from_reporting_api",
+            "method_name": "parse_orders",
+            # Order reports can't be fetched for more than 30 days
+            "max_timeframe": timedelta(days=29),
             "primary_key": ["AmazonOrderID"],
             "subsequent_field": "LastUpdatedDate",
             "accepted_strategies": [EC.ES_INCREMENTAL, EC.ES_SUBSEQUENT],
@@ -51,7 +55,8 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
                 "dateGranularity": ["DAY", "WEEK", "MONTH"],
                 "asinGranularity": ["PARENT", "CHILD", "SKU"],
             },
-            "method_name": "get_sales_and_traffic_data",
+            "method_name": "parse_sales_and_traffic",
+            "daily": True,
             "primary_key": [
                 "parentAsin",
                 "childAsin",
@@ -65,7 +70,8 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
             # loading for it - must use full refresh every time
             "report_type": "GET_FBA_FULFILLMENT_CUSTOMER_RETURNS_DATA",
             "report_options": {},
-            "method_name": "get_fba_returns_data",
+            "method_name": "parse_fba_returns",
+            "requires_data_from": True,
             "primary_key": None,
             "subsequent_field": None,
             "accepted_strategies": [EC.ES_FULL_REFRESH],
@@ -73,7 +79,8 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         "listings": {  # Full-refresh only
             "report_type": "GET_MERCHANT_LISTINGS_ALL_DATA",
             "report_options": {},
-            "method_name": "get_listings",
+            "method_name": "parse_listings",
+            "ignore_timeframe": True,
             "primary_key": None,
             "subsequent_field": None,
             "accepted_strategies": [EC.ES_FULL_REFRESH],
@@ -84,7 +91,8 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         "inventory": {  # Full-refresh only
             "report_type": "GET_FBA_MYI_UNSUPPRESSED_INVENTORY_DATA",
             "report_options": {},
-            "method_name": "get_inventory",
+            "method_name": "parse_inventory",
+            "ignore_timeframe": True,
             "primary_key": None,
             "subsequent_field": None,
             "accepted_strategies": [EC.ES_FULL_REFRESH],
@@ -92,13 +100,21 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         "fee_preview": {  # Full-refresh only
             "report_type": "GET_FBA_ESTIMATED_FBA_FEES_TXT_DATA",
             "report_options": {},
-            "method_name": "get_fee_preview",
+            "method_name": "parse_fee_preview",
+            "ignore_timeframe": True,
             "primary_key": None,
             "subsequent_field": None,
             "accepted_strategies": [EC.ES_FULL_REFRESH],
         },
     }
 
+    # Quotas of the Reporting API operations: (requests per second, burst)
+    _REPORTS_API_QUOTAS = {
+        "createReport": (1 / 60, 15),
+        "getReport": (2, 15),
+        "getReportDocument": (1 / 60, 15),
+    }
+
     _ATTR_RELABEL = {}
 
     conn_name_attr = "ewah_amazon_seller_central_conn_id"
@@ -237,7 +253,7 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
                 "client_secret": self.conn.lwa_client_secret,
                 "refresh_token": self.conn.refresh_token,
             }
-            response = requests.post(url, data=payload)
+            response = self.http_post(url, data=payload)
             assert response.status_code == 200, response.text
             response_data = response.json()
             self._access_token = response_data["access_token"]
@@ -408,7 +424,17 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
             "authorization": authorization_header,
         }
 
-    def get_report_data(
+    def get_reports_rate_limiter(self, operation, endpoint):
+        # Rate limiters of the Reporting API operations per endpoint
+        if not hasattr(self, "_reports_rate_limiters"):
+            self._reports_rate_limiters = {}
+        key = (operation, endpoint)
+        if not key in self._reports_rate_limiters:
+            rate, burst = self._REPORTS_API_QUOTAS[operation]
+            self._reports_rate_limiters[key] = TokenBucket(rate=rate, capacity=burst)
+        return self._reports_rate_limiters[key]
+
+    def create_report(
         self,
         marketplace_region,
         report_name,
@@ -416,10 +442,7 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         data_until=None,
         report_options=None,
     ):
-        # This method calls the reporting API to fetch data on a report
-        # Use this method when writing the individual reports' fetching methods
-        # Returns the report content unaltered (only decompressed, if applicable)
-
+        # Create a report via the reporting API and return its ID
         report_metadata = self._REPORT_METADATA[report_name]
         report_type = report_metadata["report_type"]
 
@@ -457,7 +480,7 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         # The order of the items in the body is relevant for proper authorization
         body = dict(sorted(body.items(), key=lambda h: h[0]))
         self.log.info("Creating the report via POST request now... " f"Payload: {body}")
-        response = requests.post(
+        response = self.http_post(
             url,
             json=body,
             headers=self.generate_request_headers(
@@ -466,58 +489,31 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         )
         assert response.status_code == 202, response.text
         report_id = response.json()["reportId"]
-
-        # Fetch the report Part 1: Get the document ID
         self.log.info(f"Report created, ID: {report_id}.")
-        url = endpoint + "/reports/2021-06-30/reports/" + report_id
-        tries = 0
-        sleep_base = 5
-        sleep_for = sleep_base
-        done = False
-        time.sleep(sleep_for)
-        while tries < 10:
-            tries += 1
-            # Exponential increase of the time we are waiting
-            sleep_for = sleep_base * (2**tries)
-            self.log.info(f"Trying ({tries}/10) to fetch the document id...")
-            response = requests.get(
-                url,
-                headers=self.generate_request_headers(
-                    url=url, method="GET", region=region
-                ),
-            )
-            assert response.status_code == 200, response.text
-            status = response.json().get("processingStatus")
-            if status == "DONE":
-                done = True
-                break
-            elif status in ("IN_PROGRESS", "IN_QUEUE"):
-                # Wait a bit, try again
-                pass
-            elif status == "CANCELLED":
-                # There is no data to report on
-                return
-            elif status == "FATAL":
-                raise Exception("FATAL ERROR! Request response: " + response.text)
-            else:
-                raise Exception(
-                    "Unexpected processing status! Request response: " + response.text
-                )
-            self.log.info(
-                f"Unable to fetch document, status: {status}."
-                f" Waiting for {sleep_for}s..."
-            )
-            time.sleep(sleep_for)
+        return report_id
 
-        assert response.json().get("processingStatus") == "DONE", response.text
-        report_document_id = response.json()["reportDocumentId"]
+    def get_report_status(self, marketplace_region, report_id):
+        # Returns the report's data, including processingStatus and reportDocumentId
+        endpoint, _, region = self.get_marketplace_details_tuple(marketplace_region)
+        url = endpoint + "/reports/2021-06-30/reports/" + report_id
+        self.get_reports_rate_limiter("getReport", endpoint).consume()
+        response = self.http_get(
+            url,
+            headers=self.generate_request_headers(url=url, method="GET", region=region),
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
 
-        # Fetch the report Part 2: Get the document url
+    def get_report_document(self, marketplace_region, report_document_id):
+        # Downloads a report document to a temporary file, decompressing it on
+        # the fly if applicable, and returns the file object
+        endpoint, _, region = self.get_marketplace_details_tuple(marketplace_region)
         self.log.info(
             f"Got document ID: {report_document_id}." " Fetching document url now."
         )
         url = endpoint + "/reports/2021-06-30/documents/" + report_document_id
-        response = requests.get(
+        self.get_reports_rate_limiter("getReportDocument", endpoint).consume()
+        response = self.http_get(
             url,
             headers=self.generate_request_headers(url=url, method="GET", region=region),
         )
@@ -529,55 +525,226 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         ), "Invalid Compression Algorithm: {0}".format(
             response_data.get("compressionAlgorithm")
         )
-        is_gzip = response_data.get("compressionAlgorithm") == "GZIP"
         document_url = response_data["url"]
 
-        # Fetch the report Part 3: Download the document
         self.log.info(f"Got document URL. Now downloading document.")
-        document_response = requests.get(document_url, allow_redirects=True)
-        # Fix check (might be temporarily):
-        # The compressionAlgorithm parameter is not reliable at the moment.
-        # Its set, but the content is not always zipped, which we check here.
-        is_zipped = document_response.content.startswith(b"\x1f\x8b")
-
+        document_response = self.http_get(
+            document_url, allow_redirects=True, stream=True
+        )
         assert document_response.status_code == 200, document_response.text
-        if is_zipped:
-            document_content = gzip.decompress(document_response.content)
-        else:
-            document_content = document_response.content
+        document = TemporaryFile()
+        decompressor = None
+        is_first_chunk = True
+        try:
+            for chunk in document_response.iter_content(chunk_size=1024 * 1024):
+                if is_first_chunk:
+                    # Fix check (might be temporarily):
+                    # The compressionAlgorithm parameter is not reliable at the
+                    # moment. Its set, but the content is not always zipped, which
+                    # we check here.
+                    if chunk.startswith(b"\x1f\x8b"):
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    is_first_chunk = False
+                if decompressor:
+                    chunk = decompressor.decompress(chunk)
+                document.write(chunk)
+            if decompressor:
+                document.write(decompressor.flush())
+        except:
+            document.close()
+            raise
+        finally:
+            document_response.close()
+        document.seek(0)
+        return document
+
+    def iterate_report_documents(
+        self,
+        report_requests,
+        max_concurrent_reports=15,
+        timeout=timedelta(hours=3),
+    ):
+        """Create all reports up front, as far as the quotas allow, poll them
+        together and yield tuples of report request and document (a binary file
+        object, or None if there is no data) as soon as a report is done.
+
+        :param report_requests: List of dictionaries of the kwargs of
+            create_report.
+        """
+        queued = deque(report_requests)
+        running = []  # dictionaries of the report request and polling state
+        while queued or running:
+            # Create as many reports as possible - always at least one
+            while queued and len(running) < max_concurrent_reports:
+                endpoint = self.get_marketplace_details_tuple(
+                    queued[0]["marketplace_region"]
+                )[0]
+                rate_limiter = self.get_reports_rate_limiter("createReport", endpoint)
+                if not running:
+                    rate_limiter.consume()
+                elif not rate_limiter.try_consume():
+                    break
+                report_request = queued.popleft()
+                running.append(
+                    {
+                        "request": report_request,
+                        "report_id": self.create_report(**report_request),
+                        "created_at": time.monotonic(),
+                        "poll_at": time.monotonic() + 5,
+                        "poll_seconds": 5,
+                    }
+                )
 
-        return document_content
+            # Wait until the next report is to be polled, but keep creating reports
+            wait_for = min(report["poll_at"] for report in running) - time.monotonic()
+            if wait_for > 0:
+                time.sleep(min(wait_for, 5) if queued else wait_for)
+                continue
 
-    def get_order_data_from_reporting_api(
+            for report in [r for r in running if r["poll_at"] <= time.monotonic()]:
+                marketplace_region = report["request"]["marketplace_region"]
+                report_data = self.get_report_status(
+                    marketplace_region, report["report_id"]
+                )
+                status = report_data.get("processingStatus")
+                if status in ("IN_PROGRESS", "IN_QUEUE"):
+                    if (
+                        time.monotonic() - report["created_at"]
+                        > timeout.total_seconds()
+                    ):
+                        raise Exception(
+                            "Report {0} is not done after {1}!".format(
+                                report["report_id"], str(timeout)
+                            )
+                        )
+                    # Exponential increase of the time we are waiting
+                    report["poll_seconds"] = min(60, 2 * report["poll_seconds"])
+                    report["poll_at"] = time.monotonic() + report["poll_seconds"]
+                    continue
+
+                running.remove(report)
+                self.log.info(
+                    "Report {0} of region {1}: {2} ({3} running, {4} queued)".format(
+                        report["report_id"],
+                        marketplace_region,
+                        status,
+                        len(running),
+                        len(queued),
+                    )
+                )
+                if status == "DONE":
+                    document = self.get_report_document(
+                        marketplace_region, report_data["reportDocumentId"]
+                    )
+                    try:
+                        yield report["request"], document
+                    finally:
+                        document.close()
+                elif status == "CANCELLED":
+                    # There is no data to report on
+                    yield report["request"], None
+                elif status == "FATAL":
+                    raise Exception(
+                        "FATAL ERROR! Request response: {0}".format(report_data)
+                    )
+                else:
+                    raise Exception(
+                        "Unexpected processing status! Request response: {0}".format(
+                            report_data
+                        )
+                    )
+
+    def get_report_data(
         self,
         marketplace_region,
         report_name,
+        data_from=None,
+        data_until=None,
+        report_options=None,
+    ):
+        # This method calls the reporting API to fetch data on a single report
+        # Returns the report content unaltered (only decompressed, if applicable)
+        for _, document in self.iterate_report_documents(
+            [
+                {
+                    "marketplace_region": marketplace_region,
+                    "report_name": report_name,
+                    "data_from": data_from,
+                    "data_until": data_until,
+                    "report_options": report_options,
+                }
+            ]
+        ):
+            return document.read() if document else None
+
+    @staticmethod
+    def read_tsv_in_batches(document, encoding, batch_size):
+        # Parse a tab separated report document as stream
+        if not document:
+            return
+        csv_reader = csv.DictReader(
+            io.TextIOWrapper(document, encoding=encoding, newline=""), delimiter="\t"
+        )
+        data = []
+        for row in csv_reader:
+            data.append(row)
+            if len(data) == batch_size:
+                yield data
+                data = []
+        if data:
+            yield data
+
+    def get_report_timeframes(self, report_name, data_from, data_until):
+        # Returns the list of data_from, data_until tuples to create reports for
+        report_metadata = self._REPORT_METADATA[report_name]
+        if report_metadata.get("ignore_timeframe"):
+            return [(None, None)]
+
+        if report_metadata.get("requires_data_from"):
+            # This report is only available as full refresh, however it still
+            # requires data_from (ideally, static) and data_until (ideally,
+            # current timestamp).
+            assert data_from, "Requires a minimum date parameter!"
+            data_until = data_until or datetime.utcnow().replace(tzinfo=pytz.utc)
+
+        if report_metadata.get("daily"):
+            # This report needs to be requested individually per day
+            if isinstance(data_from, datetime):
+                data_from = data_from.date()
+            if isinstance(data_until, datetime):
+                data_until = data_until.date()
+            timeframes = []
+            while data_from <= data_until:
+                # Uploader class doesn't like Pendulum (data_from is added to data)
+                day = date(data_from.year, data_from.month, data_from.day)
+                timeframes.append((day, day))
+                data_from += timedelta(days=1)
+            return timeframes
+
+        max_timeframe = report_metadata.get("max_timeframe")
+        if max_timeframe and (data_until - data_from) > max_timeframe:
+            # Loop over the entire period in steps of max_timeframe
+            timeframes = []
+            while data_from < data_until:
+                timeframes.append(
+                    (data_from, min(data_until, data_from + max_timeframe))
+                )
+                data_from += max_timeframe
+            return timeframes
+
+        return [(data_from, data_until)]
+
+    def parse_orders(
+        self,
+        document,
+        marketplace_region,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,
     ):
-        if (data_until - data_from) > timedelta(days=29):
-            # Special case: Order reports can't be fetched
-            # for a time period greater than 30 days.
-            # Loop over the entire period in steps of 29 days.
-            while data_from < data_until:
-                for batch in self.get_order_data_from_reporting_api(
-                    marketplace_region=marketplace_region,
-                    report_name=report_name,
-                    data_from=data_from,
-                    data_until=min(data_until, data_from + timedelta(days=29)),
-                    report_options=report_options,
-                    batch_size=batch_size,
-                ):
-                    yield batch
-                data_from += timedelta(days=29)
-            # we're done here after looping over the period
-            return
-
         self.log.info(
-            "Fetching order data from {0} to {1}...".format(
+            "Parsing order data from {0} to {1}...".format(
                 data_from.isoformat(), data_until.isoformat()
             )
         )
@@ -614,17 +781,8 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
                         response[child.tag].append(child.text)
             return response
 
-        # Note: get_report_data may return None if there is no new data!
-        data_string = (
-            self.get_report_data(
-                marketplace_region,
-                report_name,
-                data_from,
-                data_until,
-                report_options,
-            )
-            or b""
-        ).decode()
+        # Note: document is None if there is no new data!
+        data_string = (document.read() if document else b"").decode()
         if data_string:
             self.log.info("Turning response XML into JSON...")
             raw_data = simple_xml_to_json(ET.fromstring(data_string)).get("Message", [])
@@ -648,216 +806,80 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         if data:
             yield data
 
-    def get_sales_and_traffic_data(
+    def parse_sales_and_traffic(
         self,
+        document,
         marketplace_region,
-        report_name,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,  # is ignored in this specific function
     ):
-        delta_day = timedelta(days=1)
-
-        # This report fetches data in full day periods
-        if isinstance(data_from, datetime):
-            data_from = data_from.date()
-        if isinstance(data_until, datetime):
-            data_until = data_until.date()
-
-        while True:
-            # Sales and traffic report needs to be requested individually per day
-            started = datetime.now()  # used in the next iteration, if applicable
-            data_from_dt = data_from
-            if isinstance(data_from_dt, pendulum.Date):
-                # Uploader class doesn't like Pendulum (data_from_dt is added to data)
-                data_from_dt = date(
-                    data_from_dt.year,
-                    data_from_dt.month,
-                    data_from_dt.day,
-                )
-
-            # Note that if no data is returned (e.g., timeframe too early), the get_report_data method returns None
-            data_raw = (
-                self.get_report_data(
-                    marketplace_region,
-                    report_name,
-                    data_from,
-                    data_from,
-                    report_options,
-                )
-                or b""
-            ).decode()
-            data = json.loads(data_raw or "{}").get("salesAndTrafficByAsin", [])
-            for datum in data:
-                # add the requested day to all rows
-                datum["date"] = data_from_dt
-            yield data
-
-            data_from += delta_day
-            if data_from > data_until:
-                break
-
-            self.log.info("Delaying execution for up to a minute...")
-            # Delaying to avoid hitting API request rate limits
-            # --> Wait 1 minute between iterations
-            time.sleep(
-                max(
-                    0,
-                    (started + timedelta(seconds=60) - datetime.now()).total_seconds(),
-                )
-            )
-
-    def get_fba_returns_data(
+        # Note that if no data is returned (e.g., timeframe too early), the
+        # document is None
+        data_raw = (document.read() if document else b"").decode()
+        data = json.loads(data_raw or "{}").get("salesAndTrafficByAsin", [])
+        for datum in data:
+            # add the requested day to all rows
+            datum["date"] = data_from
+        yield data
+
+    def parse_fba_returns(
         self,
+        document,
         marketplace_region,
-        report_name,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,
     ):
-        self.log.info(
-            "Fetching FBA returns data from {0} to {1}...".format(
-                data_from.isoformat(), data_until.isoformat()
-            )
-        )
-
-        # Note: This report is only available as full refresh, however
-        # it still requires data_from (ideally, static) and data_until
-        # (ideally, current timestamp).
-        assert data_from, "Requires a minimum date parameter!"
-        # data_until is defaulted to current timestamp
-
-        # Return data from CSV in batches
-        data_io = StringIO(
-            self.get_report_data(
-                marketplace_region,
-                report_name,
-                data_from,
-                data_until or datetime.utcnow().replace(tzinfo=pytz.utc),
-                report_options,
-            ).decode()
-        )  # TODO: check if latin-1?
-        csv_reader = csv.DictReader(data_io, delimiter="\t")
-        data = []
-        i = 0
-        for row in csv_reader:
-            i += 1
-            data.append(row)
-            if i == batch_size:
-                yield data
-                i = 0
-                data = []
-        if data:
-            yield data
+        # TODO: check if latin-1?
+        yield from self.read_tsv_in_batches(document, "utf-8", batch_size)
 
-    def get_listings(
+    def parse_listings(
         self,
+        document,
         marketplace_region,
-        report_name,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,
     ):
-        self.log.info("Fetching Listings. Ignoring datetimes if any.")
-        data_io = StringIO(
-            self.get_report_data(
-                marketplace_region,
-                report_name,
-                None,
-                None,
-                report_options,
-            ).decode("latin-1")
-        )
-        csv_reader = csv.DictReader(data_io, delimiter="\t")
-        data = []
-        i = 0
-        for row in csv_reader:
-            i += 1
+        for data in self.read_tsv_in_batches(document, "latin-1", batch_size):
             if ewah_options and ewah_options.get("add_bsr"):
-                # Make a request to add the BSR at this point
-                asin = row.get("asin1")
-                if asin:
-                    self.log.info("Fetching additional catalogue data for a listing...")
-                    row.update(self.get_listing_details(marketplace_region, asin) or {})
-            data.append(row)
-            if i == batch_size:
-                yield data
-                i = 0
-                data = []
-        if data:
+                for row in data:
+                    # Make a request to add the BSR at this point
+                    asin = row.get("asin1")
+                    if asin:
+                        self.log.info(
+                            "Fetching additional catalogue data for a listing..."
+                        )
+                        row.update(
+                            self.get_listing_details(marketplace_region, asin) or {}
+                        )
             yield data
 
-    def get_inventory(
+    def parse_inventory(
         self,
+        document,
         marketplace_region,
-        report_name,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,
     ):
-        self.log.info("Fetching Inventory. Ignoring datetimes if any.")
-        data_io = StringIO(
-            self.get_report_data(
-                marketplace_region,
-                report_name,
-                None,
-                None,
-                report_options,
-            ).decode("latin-1")
-        )
-        csv_reader = csv.DictReader(data_io, delimiter="\t")
-        data = []
-        i = 0
-        for row in csv_reader:
-            i += 1
-            data.append(row)
-            if i == batch_size:
-                yield data
-                i = 0
-                data = []
-        if data:
-            yield data
+        yield from self.read_tsv_in_batches(document, "latin-1", batch_size)
 
-    def get_fee_preview(
+    def parse_fee_preview(
         self,
+        document,
         marketplace_region,
-        report_name,
         data_from,
         data_until,
-        report_options=None,
         ewah_options=None,
         batch_size=10000,
     ):
-        self.log.info("Fetching Fee Preview Report. Ignoring datetimes if any.")
-        data_io = StringIO(
-            self.get_report_data(
-                marketplace_region,
-                report_name,
-                None,
-                None,
-                report_options,
-            ).decode("latin-1")
-        )
-        csv_reader = csv.DictReader(data_io, delimiter="\t")
-        data = []
-        i = 0
-        for row in csv_reader:
-            i += 1
-            data.append(row)
-            if i == batch_size:
-                yield data
-                i = 0
-                data = []
-        if data:
-            yield data
+        yield from self.read_tsv_in_batches(document, "latin-1", batch_size)
 
     def get_data_from_reporting_api_in_batches(
         self,
@@ -868,6 +890,7 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
         report_options=None,
         ewah_options=None,
         batch_size=10000,
+        max_concurrent_reports=15,
     ):
         error_msg = """Invalid report name {1}! Valid options:
         \n\t- {0}
@@ -879,44 +902,54 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
 
         if isinstance(marketplace_region, list):
             # Special case - multiple marketplace_regions!
-            # If we have a list of marketplace_regions, call self
-            # once per region and add the region to the data.
-            for region in marketplace_region:
-                for batch in self.get_data_from_reporting_api_in_batches(
-                    marketplace_region=region,
-                    report_name=report_name,
-                    data_from=data_from,
-                    data_until=data_until,
-                    report_options=report_options,
-                    ewah_options=ewah_options,
-                    batch_size=batch_size,
-                ):
-                    for datum in batch:
-                        datum["ewah_marketplace_region"] = region
-                    yield batch
-            return
-        elif not isinstance(marketplace_region, str):
+            # Add the region to the data.
+            marketplace_regions = marketplace_region
+        elif isinstance(marketplace_region, str):
+            marketplace_regions = [marketplace_region]
+        else:
             raise Exception("'marketplace_region' must be string or list of strings!")
 
+        # Create all reports for all regions and timeframes at once
+        report_requests = [
+            {
+                "marketplace_region": region,
+                "report_name": report_name,
+                "data_from": report_from,
+                "data_until": report_until,
+                "report_options": report_options,
+            }
+            for region in marketplace_regions
+            for report_from, report_until in self.get_report_timeframes(
+                report_name, data_from, data_until
+            )
+        ]
         self.log.info(
-            f"Fetching report '{report_name}' for region '{marketplace_region}' "
-            f"between {data_from} and {data_until}.",
+            f"Fetching report '{report_name}' for regions {marketplace_regions} "
+            f"between {data_from} and {data_until} in {len(report_requests)} reports.",
         )
 
         method = getattr(self, self._REPORT_METADATA[report_name]["method_name"])
         data = []
-        for batch in method(
-            marketplace_region,
-            report_name,
-            data_from,
-            data_until,
-            report_options,
-            ewah_options,
+        for report_request, document in self.iterate_report_documents(
+            report_requests, max_concurrent_reports=max_concurrent_reports
         ):
-            data += batch
-            if len(data) >= batch_size:
-                yield data
-                data = []
+            for batch in method(
+                document,
+                report_request["marketplace_region"],
+                report_request["data_from"],
+                report_request["data_until"],
+                ewah_options,
+                batch_size,
+            ):
+                if isinstance(marketplace_region, list):
+                    for datum in batch:
+                        datum["ewah_marketplace_region"] = report_request[
+                            "marketplace_region"
+                        ]
+                data += batch
+                if len(data) >= batch_size:
+                    yield data
+                    data = []
         if data:
             # Last batch may otherwise not be yielded if below threshold of batch_size
             yield data
@@ -941,24 +974,18 @@ class EWAHAmazonSellerCentralHook(EWAHBaseHook):
                 ]
             ),
         }
-        requested_at = datetime.utcnow()
-        response = requests.get(
+        # Respect endpoint response rate limit of 2 requests per second
+        # Run 1 request per second, just to be sure in case of conflicts
+        if not hasattr(self, "_catalog_rate_limiter"):
+            self._catalog_rate_limiter = TokenBucket(rate=1)
+        self._catalog_rate_limiter.consume()
+        response = self.http_get(
             url,
             params=params,
             headers=self.generate_request_headers(
                 url=url, method="GET", region=region, params=params
             ),
         )
-        # Respect endpoint response rate limit of 2 requests per second
-        # Run 1 request per second, just to be sure in case of conflicts
-        time.sleep(
-            max(
-                0,
-                (
-                    requested_at + timedelta(seconds=1) - datetime.utcnow()
-                ).total_seconds(),
-            )
-        )
         if not response.status_code == 200:
             if response.json()["errors"][0]["code"] == "NOT_FOUND":
                 # item wasn't found in marketplace, ignore error and return None
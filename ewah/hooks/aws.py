@@ -1,9 +1,14 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.python_utils import iterate_concurrently, TokenBucket
 
+from botocore.exceptions import ClientError
 from typing import Optional, List, Dict, Any
 from collections import defaultdict
+from functools import partial
 
 import boto3
+import random
+import time
 
 
 class EWAHAWSHook(EWAHBaseHook):
@@ -21,6 +26,12 @@ class EWAHAWSHook(EWAHBaseHook):
 
     _resources = defaultdict(dict)
 
+    _DYNAMODB_THROTTLING_ERRORS = (
+        "ProvisionedThroughputExceededException",
+        "RequestLimitExceeded",
+        "ThrottlingException",
+    )
+
     @staticmethod
     def get_ui_field_behaviour():
         return {
@@ -33,35 +44,39 @@ class EWAHAWSHook(EWAHBaseHook):
             },
         }
 
+    def get_boto_session_kwargs(self, region: Optional[str] = None) -> dict:
+        """Return the keyword arguments to create a boto3 session or resource."""
+        aws_region = region or self.conn.region
+        if self.conn.role_arn:
+            # Must use STS service to assume role before accessing service
+            sts_client = boto3.client(
+                "sts",
+                aws_access_key_id=self.conn.access_key_id,
+                aws_secret_access_key=self.conn.secret_access_key,
+                region_name=aws_region,
+            )
+            temp_credentials = sts_client.assume_role(
+                RoleArn=self.conn.role_arn,
+                RoleSessionName="EWAH",
+            )["Credentials"]
+            return {
+                "aws_access_key_id": temp_credentials["AccessKeyId"],
+                "aws_secret_access_key": temp_credentials["SecretAccessKey"],
+                "aws_session_token": temp_credentials["SessionToken"],
+                "region_name": aws_region,
+            }
+        return {
+            "aws_access_key_id": self.conn.access_key_id,
+            "aws_secret_access_key": self.conn.secret_access_key,
+            "region_name": aws_region,
+        }
+
     def get_boto_resource(self, resource: str, region: Optional[str] = None):
         aws_region = region or self.conn.region
         if not self._resources[aws_region].get(resource):
-            if self.conn.role_arn:
-                # Must use STS service to assume role before accessing service
-                sts_client = boto3.client(
-                    "sts",
-                    aws_access_key_id=self.conn.access_key_id,
-                    aws_secret_access_key=self.conn.secret_access_key,
-                    region_name=aws_region,
-                )
-                temp_credentials = sts_client.assume_role(
-                    RoleArn=self.conn.role_arn,
-                    RoleSessionName="EWAH",
-                )["Credentials"]
-                self._resources[aws_region][resource] = boto3.resource(
-                    resource,
-                    aws_access_key_id=temp_credentials["AccessKeyId"],
-                    aws_secret_access_key=temp_credentials["SecretAccessKey"],
-                    aws_session_token=temp_credentials["SessionToken"],
-                    region_name=aws_region,
-                )
-            else:
-                self._resources[aws_region][resource] = boto3.resource(
-                    resource,
-                    aws_access_key_id=self.conn.access_key_id,
-                    aws_secret_access_key=self.conn.secret_access_key,
-                    region_name=aws_region,
-                )
+            self._resources[aws_region][resource] = boto3.resource(
+                resource, **self.get_boto_session_kwargs(region=aws_region)
+            )
         return self._resources[aws_region][resource]
 
     def get_dynamodb_data_in_batches(
@@ -71,25 +86,78 @@ class EWAHAWSHook(EWAHBaseHook):
         batch_size: int = 10000,
         pagination_limit: Optional[int] = None,
         filter_expression=None,
+        total_segments: int = 1,
+        max_read_capacity_units: Optional[float] = None,
+        max_retries: int = 10,
     ) -> List[Dict[str, Any]]:
-        resource = self.get_boto_resource(resource="dynamodb", region=region)
-        table = resource.Table(table_name)
+        """Yield batches of items of a DynamoDB table.
 
+        :param total_segments: Number of segments to scan concurrently.
+        :param max_read_capacity_units: Optional limit of the read capacity units
+            consumed per second by all segments together.
+        :param max_retries: Number of retries of a throttled request, with
+            exponential backoff.
+        """
         # build scan kwargs
         scan_kwargs = {}
         if pagination_limit:
             scan_kwargs["Limit"] = pagination_limit
         if filter_expression:
             scan_kwargs["FilterExpression"] = filter_expression
+        if max_read_capacity_units:
+            scan_kwargs["ReturnConsumedCapacity"] = "TOTAL"
+            capacity_limiter = TokenBucket(rate=max_read_capacity_units)
+        if total_segments > 1:
+            scan_kwargs["TotalSegments"] = total_segments
+
+        # boto3 resources are not thread-safe, create one per segment instead
+        session_kwargs = self.get_boto_session_kwargs(region=region)
+
+        def scan_segment(segment):
+            session = boto3.session.Session(**session_kwargs)
+            table = session.resource("dynamodb").Table(table_name)
+            segment_kwargs = dict(scan_kwargs)
+            if total_segments > 1:
+                segment_kwargs["Segment"] = segment
+            # iterate through entire table
+            keepgoing = True
+            batch_data = []
+            retries = 0
+            while keepgoing:
+                try:
+                    response = table.scan(**segment_kwargs)
+                except ClientError as e:
+                    error_code = e.response.get("Error", {}).get("Code")
+                    if not error_code in self._DYNAMODB_THROTTLING_ERRORS:
+                        raise
+                    retries += 1
+                    if retries > max_retries:
+                        raise
+                    # exponential backoff with jitter, capped at 20 seconds
+                    backoff = min(20, 0.05 * 2**retries) * (0.5 + random.random())
+                    self.log.info(
+                        "Segment {0} throttled ({1}), retrying in {2:.1f}s...".format(
+                            segment, error_code, backoff
+                        )
+                    )
+                    time.sleep(backoff)
+                    continue
+                retries = 0
+                if max_read_capacity_units:
+                    capacity_limiter.consume(
+                        response["ConsumedCapacity"]["CapacityUnits"]
+                    )
+                batch_data += response.get("Items")
+                segment_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
+                keepgoing = bool(segment_kwargs["ExclusiveStartKey"])
+                if len(batch_data) >= batch_size or not keepgoing:
+                    yield batch_data
+                    batch_data = []
 
-        # iterate through entire table
-        keepgoing = True
-        batch_data = []
-        while keepgoing:
-            response = table.scan(**scan_kwargs)
-            batch_data += response.get("Items")
-            scan_kwargs["ExclusiveStartKey"] = response.get("LastEvaluatedKey")
-            keepgoing = bool(scan_kwargs["ExclusiveStartKey"])
-            if len(batch_data) >= batch_size or not keepgoing:
-                yield batch_data
-                batch_data = []
+        if total_segments > 1:
+            self.log.info(
+                "Scanning {0} segments concurrently...".format(total_segments)
+            )
+        yield from iterate_concurrently(
+            [partial(scan_segment, segment) for segment in range(total_segments)]
+        )
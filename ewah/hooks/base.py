@@ -3,6 +3,9 @@ from airflow.models.connection import Connection
 from airflow.providers_manager import ProvidersManager
 from airflow.utils.module_loading import import_string
 
+from ewah.utils.cache_utils import EWAHMetadataCache
+from ewah.utils.http_utils import EWAHHTTPClient
+
 from typing import Type, Optional
 
 
@@ -81,6 +84,18 @@ class EWAHBaseHook(BaseHook):
     # e.g. {"api_key": "password"} to get self.password for self.api_key
     _ATTR_RELABEL = {}
 
+    # Overwrite in child class to set defaults of the HTTP client of API hooks
+    # The rate limit can be set per connection with the connection's extra
+    # field http_requests_per_second
+    _HTTP_REQUESTS_PER_SECOND = None  # no rate limit by default
+    _HTTP_MAX_RETRIES = 5
+    _HTTP_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    # Metadata, e.g. the fields of objects, is cached between task runs; can be
+    # set per connection with the extra fields metadata_cache_ttl_seconds and
+    # metadata_cache_storage ("variable" or "disk")
+    _METADATA_CACHE_TTL_SECONDS = 60 * 60
+
     def __init__(
         self,
         conn: Optional[EWAHConnection] = None,
@@ -107,6 +122,54 @@ class EWAHBaseHook(BaseHook):
 
         return super().__init__()
 
+    @property
+    def http_client(self) -> EWAHHTTPClient:
+        """HTTP client with a keep-alive session, retries and the connection's
+        rate limit, shared by all requests of the hook."""
+        if not hasattr(self, "_http_client"):
+            self._http_client = EWAHHTTPClient(
+                requests_per_second=(
+                    self.conn.extra_dejson.get("http_requests_per_second")
+                    or self._HTTP_REQUESTS_PER_SECOND
+                ),
+                rate_limit_key=self.conn.conn_id,
+                max_retries=self._HTTP_MAX_RETRIES,
+                retry_status_codes=self._HTTP_RETRY_STATUS_CODES,
+            )
+        return self._http_client
+
+    def http_request(self, method: str, url: str, **kwargs):
+        return self.http_client.request(method, url, **kwargs)
+
+    def http_get(self, url: str, **kwargs):
+        return self.http_client.get(url, **kwargs)
+
+    def http_post(self, url: str, **kwargs):
+        return self.http_client.post(url, **kwargs)
+
+    def log_http_metrics(self) -> None:
+        if hasattr(self, "_http_client"):
+            self._http_client.log_metrics()
+
+    @property
+    def metadata_cache(self) -> EWAHMetadataCache:
+        """Cache of metadata, shared by all hooks of the connection."""
+        if not hasattr(self, "_metadata_cache"):
+            extra = self.conn.extra_dejson
+            ttl_seconds = extra.get("metadata_cache_ttl_seconds")
+            self._metadata_cache = EWAHMetadataCache(
+                namespace=self.conn.conn_id,
+                ttl_seconds=(
+                    self._METADATA_CACHE_TTL_SECONDS
+                    if ttl_seconds is None
+                    else float(ttl_seconds)
+                ),
+                storage=extra.get(
+                    "metadata_cache_storage", EWAHMetadataCache.STORAGE_VARIABLE
+                ),
+            )
+        return self._metadata_cache
+
     @classmethod
     def get_cleaner_callables(cls):
         # overwrite me for cleaner callables that are always called
@@ -15,6 +15,9 @@ import json
 class EWAHBigQueryHook(EWAHSQLBaseHook):
     _ATTR_RELABEL: dict = {"project": "host"}
 
+    # The client is not a connection with transactions that could be reset
+    _POOL_CONNECTIONS = False
+
     conn_name_attr = "ewah_bigquery_conn_id"
     default_conn_name = "ewah_bigquery_default"
     conn_type = "ewah_bigquery"
@@ -1,7 +1,5 @@
 from ewah.hooks.base import EWAHBaseHook
 
-import requests
-
 from typing import List, Dict, Any, Optional
 
 from datetime import datetime
@@ -48,7 +46,7 @@ class EWAHBrazeHook(EWAHBaseHook):
     def make_api_call(
         self, url: str, params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        response = requests.get(url, params=params, headers=self.auth_header)
+        response = self.http_get(url, params=params, headers=self.auth_header)
         assert response.status_code == 200, "Request Status {0}: {1}".format(
             response.status_code, response.text
         )
@@ -4,6 +4,7 @@ from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.adaccount import AdAccount
 from facebook_business.adobjects.adsinsights import AdsInsights
 
+from collections import defaultdict, deque
 from datetime import datetime, timedelta
 
 import time
@@ -68,6 +69,22 @@ class EWAHFacebookHook(EWAHBaseHook):
             account_id=account_id,
         )
 
+    @staticmethod
+    def get_account_id(account_id):
+        account_id = str(account_id)
+        if not account_id.startswith("act_"):
+            account_id = "act_{0}".format(account_id)
+        return account_id
+
+    @staticmethod
+    def clean_datum(datum):
+        return {
+            k: datetime.strptime(v, "%Y-%m-%d").date()
+            if k in ("date_start", "date_stop")
+            else v
+            for k, v in datum.items()
+        }
+
     def get_data_in_batches(
         self,
         level,
@@ -78,16 +95,39 @@ class EWAHFacebookHook(EWAHBaseHook):
         account_id=None,
         batch_size=10000,
     ):
-        if hasattr(data_from, "date"):
-            data_from = data_from.date()
-        if hasattr(data_until, "date"):
-            data_until = data_until.date()
-        self.fb_init(account_id=account_id)
-        account_id = str(account_id or self.conn.account_id)
-        if not account_id.startswith("act_"):
-            account_id = "act_{0}".format(account_id)
-        account_object = AdAccount(account_id)
+        yield from self.get_data_of_accounts_in_batches(
+            level=level,
+            fields=fields,
+            windows=[(data_from, data_until)],
+            account_ids=[account_id],
+            breakdowns=breakdowns,
+            batch_size=batch_size,
+        )
 
+    def get_data_of_accounts_in_batches(
+        self,
+        level,
+        fields,
+        windows,
+        account_ids=None,
+        breakdowns=None,
+        max_concurrent_jobs=10,
+        max_jobs_per_account=2,
+        poll_seconds=5,
+        batch_size=10000,
+    ):
+        """Yield batches of insights of all accounts and windows.
+
+        An async insights job is submitted per account and window of at most 90
+        days. Up to max_concurrent_jobs jobs, and up to max_jobs_per_account jobs
+        per account, run at the same time. Running jobs are polled together and
+        the result pages of a job are streamed as soon as it is completed, while
+        the other jobs keep running.
+
+        :param windows: List of tuples of the first and last date to load.
+        :param account_ids: List of account ids, defaults to the connection's.
+        """
+        self.fb_init()
         params = {
             "time_increment": 1,
             "level": level,
@@ -98,60 +138,90 @@ class EWAHFacebookHook(EWAHBaseHook):
                 breakdowns = ",".join(breakdowns)
             params["breakdowns"] = breakdowns
 
+        queued = deque()
+        for account_id in [None] if account_ids is None else account_ids:
+            account_id = self.get_account_id(account_id or self.conn.account_id)
+            for data_from, data_until in windows:
+                if hasattr(data_from, "date"):
+                    data_from = data_from.date()
+                if hasattr(data_until, "date"):
+                    data_until = data_until.date()
+                # maximum request of 90 days at once!
+                while data_from <= data_until:
+                    request_until = min(data_until, data_from + timedelta(days=90))
+                    queued.append((account_id, data_from, request_until))
+                    data_from = request_until + timedelta(days=1)
+        self.log.info("Requesting data in {0} async jobs.".format(len(queued)))
+
+        running = []  # tuples of job specification and async job
+        jobs_per_account = defaultdict(int)
         data = []
-        # maximum request of 90 days at once!
-        while data_from <= data_until:
-            request_until = min(data_until, data_from + timedelta(days=90))
-            params["time_range"] = {
-                "since": data_from.strftime("%Y-%m-%d"),
-                "until": request_until.strftime("%Y-%m-%d"),
-            }
-            data_from = request_until + timedelta(days=1)
-            self.log.info(
-                "Requesting data for account_id={0} between {1} and {2}.".format(
-                    str(account_id),
-                    params["time_range"]["since"],
-                    params["time_range"]["until"],
-                )
-            )
-            async_job = account_object.get_insights_async(
-                fields=fields,
-                params=params,
-            )
-
-            job_read = async_job.api_get()
-            while not job_read.get("async_status") in [
-                "Job Completed",
-                "Job Failed",
-                "Job Skipped",
-            ]:
+        while queued or running:
+            # Submit as many jobs as allowed
+            for job_spec in list(queued):
+                if len(running) >= max_concurrent_jobs:
+                    break
+                account_id, request_from, request_until = job_spec
+                if jobs_per_account[account_id] >= max_jobs_per_account:
+                    continue
+                queued.remove(job_spec)
+                job_params = dict(params)
+                job_params["time_range"] = {
+                    "since": request_from.strftime("%Y-%m-%d"),
+                    "until": request_until.strftime("%Y-%m-%d"),
+                }
                 self.log.info(
-                    "Asnyc job completion: {0}% (status: {1})".format(
-                        str(job_read.get("async_percent_completion")),
-                        str(job_read.get("async_status")),
+                    "Requesting data for account_id={0} between {1} and {2}.".format(
+                        account_id,
+                        job_params["time_range"]["since"],
+                        job_params["time_range"]["until"],
                     )
                 )
-                time.sleep(5)
-                job_read = async_job.api_get()
-
-            time.sleep(1)
-            assert (
-                job_read.get("async_status") == "Job Completed"
-            ), job_read.get_result()
-
-            data += [
-                {
-                    k: datetime.strptime(v, "%Y-%m-%d").date()
-                    if k in ("date_start", "date_stop")
-                    else v
-                    for k, v in datum.items()
-                }
-                for datum in list(job_read.get_result(params={"limit": 1000}))
-            ]
+                async_job = AdAccount(account_id).get_insights_async(
+                    fields=fields,
+                    params=job_params,
+                )
+                running.append((job_spec, async_job))
+                jobs_per_account[account_id] += 1
 
-            if len(data) >= batch_size:
-                yield data
-                data = []
+            # Poll all running jobs
+            completed = []
+            for job_spec, async_job in running:
+                job_read = async_job.api_get()
+                if job_read.get("async_status") in [
+                    "Job Completed",
+                    "Job Failed",
+                    "Job Skipped",
+                ]:
+                    completed.append((job_spec, job_read))
+            if not completed:
+                self.log.info(
+                    "Async jobs completion: {0} (queued jobs: {1})".format(
+                        ", ".join(
+                            "{0}% ({1})".format(
+                                str(async_job.get("async_percent_completion")),
+                                str(async_job.get("async_status")),
+                            )
+                            for _, async_job in running
+                        ),
+                        len(queued),
+                    )
+                )
+                time.sleep(poll_seconds)
+                continue
+
+            # Stream the results of the completed jobs
+            for job_spec, job_read in completed:
+                running = [job for job in running if not job[0] is job_spec]
+                jobs_per_account[job_spec[0]] -= 1
+                assert (
+                    job_read.get("async_status") == "Job Completed"
+                ), job_read.get_result()
+                for datum in job_read.get_result(params={"limit": 1000}):
+                    data.append(self.clean_datum(datum))
+                    if len(data) >= batch_size:
+                        yield data
+                        data = []
 
         if data:
             yield data
@@ -5,9 +5,6 @@ from google.ads.googleads.client import GoogleAdsClient
 from google.protobuf.json_format import MessageToDict
 
 from datetime import datetime
-from typing import Optional
-
-import json
 
 
 class EWAHGoogleAdsHook(EWAHBaseHook):
@@ -77,8 +74,13 @@ class EWAHGoogleAdsHook(EWAHBaseHook):
 
         return self._service
 
+    # Accessors by protobuf message type and field path, see get_field_accessor
+    _FIELD_ACCESSORS = {}
+
     @staticmethod
-    def create_query(fields, resource, conditions=None):
+    def get_field_paths(fields):
+        """Return the list of fields of the SELECT statement, e.g. campaign.id."""
+
         def format_columns(dict_to_format, prefix=None):
             # create the list of fields for the SELECT statement
             if prefix is None:
@@ -94,58 +96,131 @@ class EWAHGoogleAdsHook(EWAHBaseHook):
                         fields += [prefix + key + "." + item]
             return fields
 
+        return format_columns(fields)
+
+    @classmethod
+    def create_query(cls, fields, resource, conditions=None):
         query = "SELECT {0}\nFROM {1}".format(
-            ", ".join(format_columns(fields)), resource
+            ", ".join(cls.get_field_paths(fields)), resource
         )
         if conditions:
             query += "\nWHERE {0}".format("\n\tAND ".join(conditions))
         return query
 
-    @staticmethod
-    def transform_raw_data_to_relational_format(raw_row, _prefix=None):
-        """Each row of the returned data is a protobuf message that can have many
-        layers. Unpack it into a 1-layer dictionary."""
-
-        def unnest_dict(nested_dict: dict, prefix: Optional[str] = None):
-            unnested_dict = {}
-            for k, v in nested_dict.items():
-                if isinstance(v, dict):
-                    if prefix:
-                        next_prefix = prefix + "__" + k
-                    else:
-                        next_prefix = k
-                    unnested_dict.update(unnest_dict(v, next_prefix))
-                else:
-                    if prefix:
-                        if prefix == "segments" and k == "date":
-                            v = datetime.strptime(v, "%Y-%m-%d").date()
-                        unnested_dict[prefix + "__" + k] = v
-                    else:
-                        unnested_dict[k] = v
-            return unnested_dict
-
-        return unnest_dict(
-            json.loads(
-                raw_row.__class__.to_json(raw_row, preserving_proto_field_name=True)
-            )
+    @classmethod
+    def get_field_accessor(cls, descriptor, field_path):
+        """Return a function that reads the value of a field path, e.g.
+        campaign.id, from a protobuf message of the descriptor's type.
+
+        Enums are returned by name, messages as dictionaries and unset fields as
+        None, like the json representation of the row.
+        """
+        key = (descriptor.full_name, field_path)
+        if key in cls._FIELD_ACCESSORS:
+            return cls._FIELD_ACCESSORS[key]
+
+        field_descriptors = []
+        for name in field_path.split("."):
+            field_descriptor = descriptor.fields_by_name[name]
+            field_descriptors.append(field_descriptor)
+            descriptor = field_descriptor.message_type
+        *parents, leaf = field_descriptors
+        is_repeated = leaf.label == leaf.LABEL_REPEATED
+        has_presence = not is_repeated and (
+            leaf.message_type is not None or getattr(leaf, "has_presence", False)
         )
 
+        def convert(value):
+            if leaf.message_type:
+                return MessageToDict(value, preserving_proto_field_name=True)
+            if leaf.enum_type:
+                enum_value = leaf.enum_type.values_by_number.get(value)
+                return enum_value.name if enum_value else value
+            return value
+
+        def accessor(message):
+            for field_descriptor in parents:
+                if not message.HasField(field_descriptor.name):
+                    return None
+                message = getattr(message, field_descriptor.name)
+            if has_presence and not message.HasField(leaf.name):
+                return None
+            value = getattr(message, leaf.name)
+            if is_repeated:
+                return [convert(item) for item in value]
+            return convert(value)
+
+        if field_path == "segments.date":
+            get_value = accessor
+
+            def accessor(message):
+                value = get_value(message)
+                return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+        cls._FIELD_ACCESSORS[key] = accessor
+        return accessor
+
+    @classmethod
+    def transform_raw_data_to_relational_format(cls, raw_row, field_paths):
+        """Each row of the returned data is a protobuf message that can have many
+        layers. Read the fields into a 1-layer dictionary."""
+        row = {}
+        for field_path in field_paths:
+            value = cls.get_field_accessor(raw_row.DESCRIPTOR, field_path)(raw_row)
+            column = field_path.replace(".", "__")
+            if isinstance(value, dict):
+                # Unnest fields that are messages
+                row.update(cls.unnest_dict(value, column))
+            else:
+                row[column] = value
+        return row
+
+    @classmethod
+    def unnest_dict(cls, nested_dict: dict, prefix: str):
+        unnested_dict = {}
+        for k, v in nested_dict.items():
+            if isinstance(v, dict):
+                unnested_dict.update(cls.unnest_dict(v, prefix + "__" + k))
+            else:
+                unnested_dict[prefix + "__" + k] = v
+        return unnested_dict
+
     def get_raw_data_from_query(self, customer_id, query):
+        """Yield lists of raw protobuf rows as they are streamed."""
         self.log.info("Running query:\n\n{0}\n\n".format(query))
-        return [
-            row
-            for row in self.service.search(
-                customer_id=customer_id.replace("-", ""), query=query
-            )
-        ]
+        for batch in self.service.search_stream(
+            customer_id=customer_id.replace("-", ""), query=query
+        ):
+            # Read the underlying protobuf messages instead of proto-plus wrappers
+            raw_rows = type(batch).pb(batch).results
+            if raw_rows:
+                yield raw_rows
+
+    def get_data_in_batches(self, client_id, fields, resource, conditions=None):
+        field_paths = self.get_field_paths(fields)
+        resource_name = "{0}.resource_name".format(resource)
+        if not resource_name in field_paths:
+            # The resource name is always returned and part of the primary key
+            field_paths.append(resource_name)
+        for raw_rows in self.get_raw_data_from_query(
+            customer_id=client_id,
+            query=self.create_query(
+                fields=fields, resource=resource, conditions=conditions
+            ),
+        ):
+            yield [
+                self.transform_raw_data_to_relational_format(row, field_paths)
+                for row in raw_rows
+            ]
 
     def get_data(self, client_id, fields, resource, conditions=None):
         return [
-            self.transform_raw_data_to_relational_format(raw_row=row)
-            for row in self.get_raw_data_from_query(
-                customer_id=client_id,
-                query=self.create_query(
-                    fields=fields, resource=resource, conditions=conditions
-                ),
+            datum
+            for batch in self.get_data_in_batches(
+                client_id=client_id,
+                fields=fields,
+                resource=resource,
+                conditions=conditions,
             )
+            for datum in batch
         ]
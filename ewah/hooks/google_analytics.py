@@ -1,11 +1,14 @@
 from ewah.constants import EWAHConstants as EC
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.python_utils import iterate_concurrently
 
 from apiclient.discovery import build
 from oauth2client.service_account import ServiceAccountCredentials as SAC
 
+from functools import partial
+
 import json
-import time
+import threading
 from datetime import datetime, timedelta
 
 
@@ -62,26 +65,9 @@ class EWAHGoogleAnalyticsHook(EWAHBaseHook):
             ),
         }
 
-    def get_data_in_batches(self, data_from, data_until, chunking_interval, **kwargs):
-        while data_from <= data_until:
-            yield self.get_data(
-                data_from=data_from,
-                data_until=min(data_until, data_from + chunking_interval),
-                **kwargs
-            )
-            data_from += chunking_interval + timedelta(days=1)
-
-    def get_data(
-        self,
-        view_id,
-        dimensions,
-        metrics,
-        page_size,
-        include_empty_rows,
-        sampling_level,
-        data_from,
-        data_until,
-    ):
+    def get_service_object(self):
+        """Return a Reporting API service object. Service objects are not
+        thread-safe, thus each thread needs its own one."""
         sac_json = self.conn.service_account_json
         try:
             sac_json = json.loads(sac_json)
@@ -100,6 +86,17 @@ class EWAHGoogleAnalyticsHook(EWAHBaseHook):
             )
             raise Exception(_msg)
 
+        return build(
+            "analyticsreporting",
+            "v4",
+            credentials=SAC.from_json_keyfile_dict(
+                sac_json,
+                ["https://www.googleapis.com/auth/analytics.readonly"],
+            ),
+        )
+
+    @staticmethod
+    def validate_request(dimensions, metrics, page_size):
         if len(dimensions) > 7:
             raise Exception(
                 (
@@ -121,30 +118,77 @@ class EWAHGoogleAnalyticsHook(EWAHBaseHook):
         if page_size > 10000:
             raise Exception("Please specify a page size equal to or lower than 10000.")
 
-        service_object = build(
-            "analyticsreporting",
-            "v4",
-            credentials=SAC.from_json_keyfile_dict(
-                sac_json,
-                ["https://www.googleapis.com/auth/analytics.readonly"],
-            ),
-        )
-
+    def get_data_in_batches(
+        self,
+        view_id,
+        dimensions,
+        metrics,
+        page_size,
+        include_empty_rows,
+        sampling_level,
+        data_from,
+        data_until,
+        shard_days=7,
+        max_concurrent_requests=4,
+        batch_size=10000,
+    ):
+        """Yield batches of rows of a report, in no particular order.
+
+        The timeframe is split into shards of shard_days days, which are
+        requested concurrently, each with its own series of batchGet requests.
+        Shards that come back sampled are split in half and requested again,
+        down to single days.
+        """
+        self.validate_request(dimensions, metrics, page_size)
         report_request = {
             "viewId": str(view_id),
-            "dateRanges": [
-                {
-                    "startDate": data_from.isoformat(),
-                    "endDate": data_until.isoformat(),
-                }
-            ],
             "samplingLevel": sampling_level,
             "dimensions": [{"name": d} for d in dimensions],
             "metrics": [{"expression": m} for m in metrics],
             "pageSize": page_size,
             "includeEmptyRows": include_empty_rows,
         }
+        thread_data = threading.local()
+
+        def get_shard(shard_from, shard_until):
+            if not hasattr(thread_data, "service_object"):
+                thread_data.service_object = self.get_service_object()
+            yield from self.get_shard_data(
+                service_object=thread_data.service_object,
+                report_request=report_request,
+                view_id=view_id,
+                data_from=shard_from,
+                data_until=shard_until,
+            )
 
+        shards = []
+        while data_from <= data_until:
+            shard_until = min(data_until, data_from + timedelta(days=shard_days - 1))
+            shards.append(partial(get_shard, data_from, shard_until))
+            data_from = shard_until + timedelta(days=1)
+        self.log.info("Loading data in {0} shards...".format(len(shards)))
+
+        batch = []
+        for data in iterate_concurrently(shards, max_workers=max_concurrent_requests):
+            batch += data
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_shard_data(
+        self, service_object, report_request, view_id, data_from, data_until
+    ):
+        """Yield the parsed rows of a report page by page. Splits the timeframe
+        if the report is sampled."""
+        report_request = dict(report_request)
+        report_request["dateRanges"] = [
+            {
+                "startDate": data_from.isoformat(),
+                "endDate": data_until.isoformat(),
+            }
+        ]
         self.log.info(
             "Loading data from {0} to {1}...".format(
                 report_request["dateRanges"][0]["startDate"],
@@ -152,32 +196,49 @@ class EWAHGoogleAnalyticsHook(EWAHBaseHook):
             )
         )
 
-        report_response = (
-            service_object.reports()
-            .batchGet(body={"reportRequests": [report_request]})
-            .execute()
-        )
-
-        if report_response.get("reports"):
+        while True:
+            report_response = (
+                service_object.reports()
+                .batchGet(body={"reportRequests": [report_request]})
+                .execute()
+            )
+            if not report_response.get("reports"):
+                return
             report = report_response["reports"][0]
-            rows = report.get("data", {}).get("rows", [])
-
-            while report.get("nextPageToken"):
-                time.sleep(1)
-                report_request.update({"pageToken": report["nextPageToken"]})
-                report_response = (
-                    service_object.reports()
-                    .batchGet(body={"reportRequests": [report_request]})
-                    .execute()
+            data = report.get("data", {})
+            if data.get("samplesReadCounts") and not report_request.get("pageToken"):
+                if data_from < data_until:
+                    # Split the shard to get unsampled data
+                    split_at = data_from + timedelta(
+                        days=(data_until - data_from).days // 2
+                    )
+                    self.log.info(
+                        "Data from {0} to {1} is sampled, splitting...".format(
+                            data_from.isoformat(), data_until.isoformat()
+                        )
+                    )
+                    for shard_from, shard_until in (
+                        (data_from, split_at),
+                        (split_at + timedelta(days=1), data_until),
+                    ):
+                        yield from self.get_shard_data(
+                            service_object=service_object,
+                            report_request=report_request,
+                            view_id=view_id,
+                            data_from=shard_from,
+                            data_until=shard_until,
+                        )
+                    return
+                self.log.warning(
+                    "Data of {0} is sampled!".format(data_from.isoformat())
                 )
-                report = report_response["reports"][0]
-                rows.extend(report.get("data", {}).get("rows", []))
-
-            if report["data"]:
-                report["data"]["rows"] = rows
-        else:
-            report = {}
+            yield self.parse_report(report, view_id)
+            if not report.get("nextPageToken"):
+                return
+            report_request["pageToken"] = report["nextPageToken"]
 
+    def parse_report(self, report, view_id):
+        """Return the rows of a report page as list of dictionaries."""
         column_header = report.get("columnHeader", {})
         # Right now all dimensions are hardcoded to varchar(255), will need a
         # map if any non-varchar dimensions are used in the future
@@ -200,7 +261,6 @@ class EWAHGoogleAnalyticsHook(EWAHBaseHook):
             )
         ]
 
-        self.log.info("Reading data from fetched report...")
         uploadable_data = []
         rows = report.get("data", {}).get("rows", [])
         for row_counter, row in enumerate(rows):
@@ -1,13 +1,12 @@
 from ewah.constants import EWAHConstants as EC
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.file_format_utils import iterate_avro_batches, iterate_parquet_batches
+from ewah.utils.python_utils import prefetch_in_order
 
 from google.cloud import storage
 from google.oauth2 import service_account
 
-import avro.schema
 import json
-from avro.datafile import DataFileReader, DataFileWriter
-from avro.io import DatumReader, DatumWriter
 from io import BytesIO
 from datetime import datetime
 
@@ -58,13 +57,80 @@ class EWAHGoogleCloudStorageHook(EWAHBaseHook):
         self, bucket_name, prefix=None, data_after=None, data_until=None
     ):
         # generate a list of blobs that apply, given the filter
-        for blob in self.client.list_blobs(bucket_or_name=bucket_name, prefix=prefix):
+        # GCS can only filter by prefix server-side - request only the fields
+        # required to filter by update time and to download the blobs
+        for blob in self.client.list_blobs(
+            bucket_or_name=bucket_name,
+            prefix=prefix,
+            fields="items(name,size,updated,generation),nextPageToken",
+        ):
             if data_after and blob.updated <= data_after:
                 continue
             if data_until and blob.updated > data_until:
                 continue
             yield blob
 
+    def get_columnar_data_in_batches(
+        self,
+        bucket_name,
+        prefix=None,
+        data_after=None,
+        data_until=None,
+        batch_size=10000,
+        file_format="AVRO",
+        columns=None,
+        timestamp_field=None,
+        rows_from=None,
+        rows_until=None,
+        max_concurrent_downloads=8,
+        prefetch_max_bytes=100 * 1024 * 1024,
+    ):
+        """Yield batches of data as tuples of column names and rows, each row a
+        tuple of values, including the blob-level metadata columns.
+
+        Blobs are decoded in order while the next blobs are downloaded
+        concurrently. Blobs larger than prefetch_max_bytes are not downloaded
+        ahead, but read with ranged requests while decoding them instead.
+
+        :param file_format: AVRO (object container files) or PARQUET.
+        :param columns: Optional list of columns to read.
+        :param timestamp_field: Optional field to filter rows by rows_from and
+            rows_until. Blobs are filtered by their update time with data_after
+            and data_until instead, which is unrelated to the rows' timestamps.
+        :param max_concurrent_downloads: Number of blobs to download concurrently.
+        :param prefetch_max_bytes: Maximum size of all blobs held in memory.
+        """
+        read_batches = {
+            "AVRO": iterate_avro_batches,
+            "PARQUET": iterate_parquet_batches,
+        }[file_format]
+        blobs = prefetch_in_order(
+            items=self.generate_blob_list(bucket_name, prefix, data_after, data_until),
+            fetch=lambda blob: BytesIO(blob.download_as_bytes()),
+            get_size=lambda blob: blob.size or 0,
+            max_workers=max_concurrent_downloads,
+            max_bytes=prefetch_max_bytes,
+            # the reader is seekable, as required to read Parquet files
+            fetch_large=lambda blob: blob.open("rb", chunk_size=10 * 1024 * 1024),
+        )
+        for blob, blob_file in blobs:
+            self.log.info("Reading blob {0}...".format(blob.name))
+            # add blob-level metadata
+            blob_meta = (blob.name, blob.updated)
+            for names, rows in read_batches(
+                blob_file,
+                columns=columns,
+                batch_size=batch_size,
+                timestamp_field=timestamp_field,
+                data_from=rows_from,
+                data_until=rows_until,
+            ):
+                yield (
+                    names + ["blob_name", "blob_modified_at"],
+                    [row + blob_meta for row in rows],
+                )
+            blob_file.close()
+
     def get_data_in_batches(
         self,
         bucket_name,
@@ -72,29 +138,14 @@ class EWAHGoogleCloudStorageHook(EWAHBaseHook):
         data_after=None,
         data_until=None,
         batch_size=10000,
+        file_format="AVRO",
     ):
-        rows = []
-        for blob in self.generate_blob_list(
-            bucket_name, prefix, data_after, data_until
+        for names, rows in self.get_columnar_data_in_batches(
+            bucket_name=bucket_name,
+            prefix=prefix,
+            data_after=data_after,
+            data_until=data_until,
+            batch_size=batch_size,
+            file_format=file_format,
         ):
-            # download file content as bytes, read via avro
-            blob_meta = {
-                "blob_name": blob.name,
-                "blob_modified_at": blob.updated,
-            }
-            bytes_data = blob.download_as_string()
-            bytes_object = BytesIO(bytes_data)
-            bytes_object.mode = "rb+"  # need to "fake" the mode attribute because
-            # avro checks the mode of the file given for some reason, fails otherwise
-            reader = DataFileReader(bytes_object, DatumReader())
-            for row in reader:
-                # add blob-level metadata
-                row.update(blob_meta)
-                rows.append(row)
-            if len(rows) >= batch_size:
-                yield rows
-                rows = []
-
-        if rows:
-            # return any data that was left after the last iteration
-            yield rows
+            yield [dict(zip(names, row)) for row in rows]
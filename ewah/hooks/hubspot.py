@@ -1,13 +1,14 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.python_utils import TokenBucket
 
-import requests
 import json
 import urllib
-import time
 
 from typing import List, Optional, Dict, Any
 from collections import defaultdict
-from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from dateutil.parser import isoparse
 
 
 class EWAHHubspotHook(EWAHBaseHook):
@@ -25,6 +26,16 @@ class EWAHHubspotHook(EWAHBaseHook):
     PIPELINES_URL = "https://api.hubapi.com/crm/v3/pipelines/{0}"
     ASSOC_URL = "https://api.hubapi.com/crm/v3/associations/{fromObjectType}/{toObjectType}/batch/read"
     OWNERS_URL = "https://api.hubapi.com/crm/v3/owners/"
+    SEARCH_URL = "https://api.hubapi.com/crm/v3/objects/{0}/search"
+
+    # Hubspot allows 100 requests per 10 seconds per app
+    _HTTP_REQUESTS_PER_SECOND = 10
+    _RATE_LIMIT_REMAINING_HEADER = "X-HubSpot-RateLimit-Remaining"
+    # ... and 5 search requests per second per account
+    _SEARCH_REQUESTS_PER_SECOND = 4
+    # A search query returns at most 10k results
+    SEARCH_RESULTS_LIMIT = 10000
+    SEARCH_PAGE_SIZE = 200
 
     # The value is a list of possible associations. Giving the "all" value for
     # associations retrieves those listed associations.
@@ -133,43 +144,94 @@ class EWAHHubspotHook(EWAHBaseHook):
     def get_properties_for_object(self, object: str):
         if object == "properties":
             return []
-        request = requests.get(
-            url=self.PROPERTIES_URL.format(object),
-            params={},
-            headers={
-                "accept": "application/json",
-                "authorization": "Bearer {0}".format(self.conn.api_key),
-            },
+
+        def fetch(validators):
+            # Hubspot does not support conditional requests for properties
+            request = self.request_api(
+                "GET",
+                self.PROPERTIES_URL.format(object),
+                params={},
+                headers={
+                    "accept": "application/json",
+                    "authorization": "Bearer {0}".format(self.conn.api_key),
+                },
+            )
+            assert request.status_code == 200, request.text
+            return [property["name"] for property in request.json()["results"]], {}
+
+        return self.metadata_cache.get("hubspot_properties__{0}".format(object), fetch)
+
+    @property
+    def auth_headers(self) -> dict:
+        return {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": "Bearer {0}".format(self.conn.api_key),
+        }
+
+    def get_associations(self, object, response_data, associations, concurrency=1):
+        """Return the associations of a page of objects, as dictionary of
+        association -> object id -> associated objects."""
+        associations_data = defaultdict(dict)
+        if not (associations and response_data):
+            return associations_data
+        payload = json.dumps(
+            {"inputs": [{"id": str(datum["id"])} for datum in response_data]}
         )
-        assert request.status_code == 200, request.text
-        return [property["name"] for property in request.json()["results"]]
 
-    def retry_request(
-        self,
-        url: str,
-        params: dict,
-        headers: Optional[dict] = None,
-        expected_status_code: int = 200,
-        retries: int = 3,
-        wait_for_seconds: int = 60,
-    ):
-        # Every once in a while, the HubSpot API returns a 502 Bad Gateway
-        # error. This appears to be random and related to HubSpot's server
-        # infrastructure. To avoid failing DAGs due to this error, try
-        # again in case of errors, but never more than 3 times.
-        try_number = 0
-        while try_number < retries:
-            try_number += 1
-            request = requests.get(url, params=params, headers=headers)
-            if request.status_code == expected_status_code:
-                break
-            self.log.info(
-                "Status {0} - Waiting {2}s and trying again. Response:\n\n{1}".format(
-                    request.status_code, request.text, wait_for_seconds
-                )
+        def get_association(association):
+            request = self.request_api(
+                "POST",
+                self.ASSOC_URL.format(
+                    fromObjectType=object,
+                    toObjectType=association,
+                ),
+                headers=self.auth_headers,
+                data=payload,
             )
-            sleep(60)
-        return request
+            assert request.status_code < 300, request.text
+            assert request.status_code >= 200, request.text
+            return request.json()["results"]
+
+        results = self.map_concurrently(get_association, associations, concurrency)
+        for association, result in zip(associations, results):
+            associations_data[association].update(
+                {datum["from"]["id"]: datum["to"] for datum in result}
+            )
+        return associations_data
+
+    def request_api(self, method, url, **kwargs):
+        """Send a request and sync the rate limit with the remaining requests of
+        the account, which may also be used by other apps."""
+        response = self.http_request(method, url, **kwargs)
+        remaining = response.headers.get(self._RATE_LIMIT_REMAINING_HEADER)
+        if remaining and self.http_client.rate_limiter:
+            self.http_client.rate_limiter.sync(available=int(remaining))
+        return response
+
+    @staticmethod
+    def map_concurrently(function, items, concurrency):
+        """Return [function(item) for item in items], calling function in
+        concurrency threads."""
+        if concurrency <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(function, items))
+
+    @staticmethod
+    def clean_data(response_data, associations, associations_data, object_type=None):
+        # Clean up data:
+        # 1) expand the properties field into individual fields
+        # 2) add any available associations
+        # 3) if getting properties or pipelines: add object metadata
+        for datum in response_data:
+            datum.update(datum.pop("properties", {}))  # 1)
+            for association in associations or []:  # 2)
+                datum[
+                    "ewah_associations_to_{0}".format(association)
+                ] = associations_data[association].get(datum["id"])
+            if object_type:  # 3)
+                datum["object_type"] = object_type
 
     def get_data_in_batches(
         self,
@@ -177,9 +239,20 @@ class EWAHHubspotHook(EWAHBaseHook):
         properties: Optional[List[str]] = None,
         exclude_properties: Optional[List[str]] = None,
         associations: Optional[List[str]] = None,
-        max_properties_per_call: int = 250,
+        max_properties_per_call: int = 100,
         batch_size: int = 10000,
+        data_from: Optional[datetime] = None,
+        data_until: Optional[datetime] = None,
+        concurrency: int = 4,
     ) -> List[Dict[str, Any]]:
+        """Yield batches of objects. If data_from or data_until are given, only
+        load objects modified in that timeframe, using the search API.
+
+        :param max_properties_per_call: Properties are split into groups of at
+            most this many properties, which are requested concurrently.
+        :param concurrency: Maximum number of concurrent requests, e.g. for the
+            property groups and the associations of a page.
+        """
         self.log.info("Loading data for CRM object {0}!".format(object))
         params_object = {"limit": 100}
         if associations == "all":
@@ -239,93 +312,234 @@ class EWAHHubspotHook(EWAHBaseHook):
                     )
                 )
 
-        keepgoing = True
-        i = 0
-        batch_data = []
-        while keepgoing:
-            # Get next page of object data
-            time.sleep(0.2)  # Avoid hitting API rate limits
-            i += 1
-            self.log.info("Getting page {0} of data...".format(str(i)))
-            request = self.retry_request(
-                url=url_object,
-                params=params_object,
-                headers={
-                    "accept": "application/json",
-                    "authorization": "Bearer {0}".format(self.conn.api_key),
-                },
-                expected_status_code=200,
-                retries=3,
+        if data_from or data_until:
+            _msg = "Can only load CRM objects modified in a timeframe!"
+            assert not object in ("properties", "pipelines", "owners"), _msg
+            yield from self.search_data_in_batches(
+                object=object,
+                properties=properties,
+                associations=associations,
+                data_from=data_from,
+                data_until=data_until,
+                batch_size=batch_size,
+                concurrency=concurrency,
+            )
+            return
+
+        # Shard the properties into groups that are requested concurrently and
+        # merged by id, to avoid too long urls
+        if properties:
+            property_shards = [
+                properties[i : i + max_properties_per_call]
+                for i in range(0, len(properties), max_properties_per_call)
+            ]
+            if len(property_shards) > 1:
+                self.log.info(
+                    "Requesting the properties in {0} concurrent calls.".format(
+                        len(property_shards)
+                    )
+                )
+        else:
+            property_shards = [None]
+
+        def get_shard(shard):
+            params = dict(params_object)
+            if shard is not None:
+                params["properties"] = shard
+            request = self.request_api(
+                "GET", url_object, params=params, headers=self.auth_headers
             )
             if request.status_code == 414:
                 _msg = (
                     "Error: Too many properties. Please use a smaller, custom set of"
-                    " properties.\n\nUsed properties in this call:\n\t"
+                    " properties or a smaller max_properties_per_call.\n\nUsed"
+                    " properties in this call:\n\t"
                 )
-                _msg += "\n\t".join(properties) + "\n\n"
+                _msg += "\n\t".join(shard or []) + "\n\n"
                 raise Exception(_msg)
             assert request.status_code == 200, "Status {0}: {1}".format(
                 request.status_code, request.text
             )
-            response = request.json()
-            response_data = response["results"] or []
-            # Keep going as long as a link is shipped in the response
-            keepgoing = response.get("paging", {}).get("next", {}).get("after")
-            params_object["after"] = keepgoing
+            return request.json()
 
+        def enrich(response_data, object_type):
             # If applicable: get associations for all relevant objects
-            if associations and response_data:
-                associations_data = defaultdict(dict)
-                payload = json.dumps(
-                    {"inputs": [{"id": str(datum["id"])} for datum in response_data]}
+            associations_data = self.get_associations(
+                object, response_data, associations, concurrency=concurrency
+            )
+            self.clean_data(
+                response_data,
+                associations,
+                associations_data,
+                object_type=object_type,
+            )
+            return response_data
+
+        keepgoing = True
+        i = 0
+        batch_data = []
+        pending = None  # future of the enrichment of the previous page
+        with ThreadPoolExecutor(max_workers=1) as pipeline:
+            while keepgoing:
+                # Get next page of object data
+                i += 1
+                self.log.info("Getting page {0} of data...".format(str(i)))
+                responses = self.map_concurrently(
+                    get_shard, property_shards, concurrency
                 )
-                for association in associations:
-                    request = requests.post(
-                        self.ASSOC_URL.format(
-                            fromObjectType=object,
-                            toObjectType=association,
-                        ),
-                        headers={
-                            "accept": "application/json",
-                            "content-type": "application/json",
-                            "authorization": "Bearer {0}".format(self.conn.api_key),
-                        },
-                        data=payload,
-                    )
-                    assert request.status_code < 300, request.text
-                    assert request.status_code >= 200, request.text
-                    associations_data[association].update(
-                        {
-                            datum["from"]["id"]: datum["to"]
-                            for datum in request.json()["results"]
-                        }
+                response = responses[0]
+                response_data = response["results"] or []
+                # Merge the properties of the other shards
+                for shard_response in responses[1:]:
+                    shard_data = {
+                        datum["id"]: datum.get("properties", {})
+                        for datum in shard_response["results"] or []
+                    }
+                    for datum in response_data:
+                        datum["properties"].update(shard_data.get(datum["id"], {}))
+                # Keep going as long as a link is shipped in the response
+                keepgoing = response.get("paging", {}).get("next", {}).get("after")
+                params_object["after"] = keepgoing
+
+                # Enrich the page in the background while requesting the next page
+                future = pipeline.submit(
+                    enrich, response_data, params_object.get("objectType")
+                )
+                if pending:
+                    # batch_data saves all data until it is yielded
+                    batch_data += pending.result()
+                pending = future
+
+                if not keepgoing and object in ("properties", "pipelines"):
+                    # Iterate through list of all objects
+                    if object_list:
+                        params_object["objectType"] = object_list.pop(0)
+                        # tbd
+                        url_object = url_object_raw.format(params_object["objectType"])
+                        keepgoing = True
+
+                if not keepgoing:
+                    batch_data += pending.result()
+                    pending = None
+
+                # Yield data when appropriate
+                if (len(batch_data) >= batch_size) or (not keepgoing and batch_data):
+                    yield batch_data
+                    batch_data = []
+
+    @staticmethod
+    def get_last_modified_property(object: str) -> str:
+        # contacts are the only object with a differently named property
+        if object == "contacts":
+            return "lastmodifieddate"
+        return "hs_lastmodifieddate"
+
+    def search_data_in_batches(
+        self,
+        object: str,
+        properties: List[str],
+        associations: Optional[List[str]] = None,
+        data_from: Optional[datetime] = None,
+        data_until: Optional[datetime] = None,
+        batch_size: int = 10000,
+        concurrency: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """Yield batches of objects modified at data_from <= t < data_until.
+
+        Results of the search API are sorted by modification date. Because a
+        search query returns at most 10k results, a new query starts at the
+        modification date of the last result whenever that limit is reached.
+        """
+
+        def to_milliseconds(dt):
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return str(int(dt.timestamp() * 1000))
+
+        if not hasattr(self, "_search_rate_limiter"):
+            self._search_rate_limiter = TokenBucket(
+                rate=self._SEARCH_REQUESTS_PER_SECOND
+            )
+        modified_property = self.get_last_modified_property(object)
+        properties = list(properties)
+        if not modified_property in properties:
+            properties.append(modified_property)
+        url = self.SEARCH_URL.format(object)
+
+        window_start = data_from
+        batch_data = []
+        while True:
+            filters = []
+            if window_start:
+                filters.append(
+                    {
+                        "propertyName": modified_property,
+                        "operator": "GTE",
+                        "value": to_milliseconds(window_start),
+                    }
+                )
+            if data_until:
+                filters.append(
+                    {
+                        "propertyName": modified_property,
+                        "operator": "LT",
+                        "value": to_milliseconds(data_until),
+                    }
+                )
+            body = {
+                "filterGroups": [{"filters": filters}] if filters else [],
+                "sorts": [
+                    {"propertyName": modified_property, "direction": "ASCENDING"}
+                ],
+                "properties": properties,
+                "limit": self.SEARCH_PAGE_SIZE,
+            }
+            self.log.info(
+                "Searching objects modified since {0}...".format(window_start)
+            )
+            last_modified = None
+            limit_reached = False
+            while True:
+                self._search_rate_limiter.consume()
+                request = self.request_api(
+                    "POST", url, headers=self.auth_headers, data=json.dumps(body)
+                )
+                assert request.status_code == 200, "Status {0}: {1}".format(
+                    request.status_code, request.text
+                )
+                response = request.json()
+                response_data = response["results"] or []
+                if response_data:
+                    last_modified = response_data[-1]["properties"][modified_property]
+                associations_data = self.get_associations(
+                    object, response_data, associations, concurrency=concurrency
+                )
+                self.clean_data(response_data, associations, associations_data)
+                batch_data += response_data
+                if len(batch_data) >= batch_size:
+                    yield batch_data
+                    batch_data = []
+
+                after = response.get("paging", {}).get("next", {}).get("after")
+                if not after:
+                    break
+                if int(after) >= self.SEARCH_RESULTS_LIMIT:
+                    limit_reached = True
+                    break
+                body["after"] = after
+
+            if not limit_reached:
+                break
+            # Start a new query at the last modification date - objects with the
+            # same modification date are loaded twice, which is fine for upserts
+            new_window_start = isoparse(last_modified)
+            if window_start and new_window_start <= window_start:
+                raise Exception(
+                    "More than {0} objects were modified at {1}!".format(
+                        self.SEARCH_RESULTS_LIMIT, last_modified
                     )
+                )
+            window_start = new_window_start
 
-            # Clean up data:
-            # 1) expand the properties field into individual fields
-            # 2) add any available associations
-            # 3) if getting properties or pipelines: add object metadata
-            for datum in response_data:
-                datum.update(datum.pop("properties", {}))  # 1)
-                for association in associations or []:  # 2)
-                    datum[
-                        "ewah_associations_to_{0}".format(association)
-                    ] = associations_data[association].get(datum["id"])
-                if object in ("properties", "pipelines"):  # 3)
-                    datum["object_type"] = params_object["objectType"]
-
-            # batch_data saves all data until it is yielded
-            batch_data += response_data
-
-            if not keepgoing and object in ("properties", "pipelines"):
-                # Iterate through list of all objects
-                if object_list:
-                    params_object["objectType"] = object_list.pop(0)
-                    # tbd
-                    url_object = url_object_raw.format(params_object["objectType"])
-                    keepgoing = True
-
-            # Yield data when appropriate
-            if (len(batch_data) >= batch_size) or (not keepgoing and batch_data):
-                yield batch_data
-                batch_data = []
+        if batch_data:
+            yield batch_data
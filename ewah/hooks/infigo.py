@@ -1,7 +1,5 @@
 from ewah.hooks.base import EWAHBaseHook
 
-import requests
-
 
 class EWAHInfigoHook(EWAHBaseHook):
     _ATTR_RELABEL = {
@@ -22,7 +20,7 @@ class EWAHInfigoHook(EWAHBaseHook):
         }
 
     def make_api_request(self, url):
-        response = requests.get(
+        response = self.http_get(
             url, headers={"Authorization": "Basic {0}".format(self.conn.api_token)}
         )
         assert response.status_code == 200, "Error - Response {0}: {1}".format(
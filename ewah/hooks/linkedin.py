@@ -5,7 +5,6 @@ from datetime import datetime, date
 from typing import Optional, Dict, List
 
 import json
-import requests
 
 
 class EWAHLinkedInHook(EWAHBaseHook):
@@ -166,7 +165,7 @@ class EWAHLinkedInHook(EWAHBaseHook):
             "fields": ",".join(fields),
         }
 
-        response = requests.get(url, params=params, headers=self.call_headers)
+        response = self.http_get(url, params=params, headers=self.call_headers)
         assert response.status_code == 200, response.text
         return response.json()["elements"]
 
@@ -190,7 +189,7 @@ class EWAHLinkedInHook(EWAHBaseHook):
         }
         data = []
         while True:
-            response = requests.get(url, params=params, headers=self.call_headers)
+            response = self.http_get(url, params=params, headers=self.call_headers)
             assert response.status_code == 200, response.text
             elements = response.json()["elements"]
             if elements:
@@ -1,10 +1,12 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.python_utils import iterate_concurrently
 
 from airflow.utils.file import TemporaryDirectory
 
 import os
 from bson.objectid import ObjectId
 from copy import deepcopy
+from functools import partial
 from pymongo import MongoClient
 from pymongo import ASCENDING as asc
 from tempfile import NamedTemporaryFile
@@ -149,33 +151,169 @@ class EWAHMongoDBHook(EWAHBaseHook):
 
         return self._mc
 
+    def get_collection(self, collection, database=None):
+        mongo_database = self.mongoclient.get_database(
+            name=database or self.conn.default_database
+        )
+        return mongo_database[collection]
+
+    def get_change_stream_resume_token(self, collection, database=None) -> dict:
+        """Return a resume token of a new change stream, i.e. of the current
+        point in time of the collection."""
+        with self.get_collection(collection, database).watch() as stream:
+            return stream.resume_token
+
+    def get_changes_in_batches(
+        self,
+        collection,
+        state: dict,
+        database=None,
+        batch_size: int = 100000,
+    ):
+        """Yield batches of changes of a collection's change stream, starting
+        after a resume token until the changes that happened until now.
+
+        Each change is a tuple of (action, document, None). Once all changes are
+        yielded, state is updated in place with the latest resume token.
+
+        :param state: Dictionary with the resume_token to start after.
+        """
+        mongo_collection = self.get_collection(collection, database)
+        # Stop at changes after the current cluster time, the stream never ends
+        # on busy collections otherwise
+        upto = mongo_collection.database.command("ping").get("operationTime")
+        clean_data = self.get_cleaner_callables()
+        self.log.info(
+            "Reading change stream after resume token {0}".format(state["resume_token"])
+        )
+        with mongo_collection.watch(
+            full_document="updateLookup",
+            resume_after=state["resume_token"],
+            batch_size=batch_size,
+        ) as stream:
+            data = []
+            while stream.alive:
+                change = stream.try_next()
+                if change is None:
+                    break  # no more changes right now
+                operation = change["operationType"]
+                if operation in ("insert", "replace", "update"):
+                    # The full document of an update is missing if it has been
+                    # deleted meanwhile - the delete event follows later
+                    document = change.get("fullDocument")
+                    if document:
+                        data.append(("update", clean_data(document), None))
+                elif operation == "delete":
+                    data.append(("delete", clean_data(change["documentKey"]), None))
+                elif operation in ("drop", "rename", "dropDatabase", "invalidate"):
+                    raise Exception(
+                        "The collection was dropped or renamed! Reload it with a "
+                        "full refresh by deleting the change stream state."
+                    )
+                if len(data) >= batch_size:
+                    self.log.info("Yielding {0} changes...".format(len(data)))
+                    yield data
+                    data = []
+                if upto and change["clusterTime"] > upto:
+                    break
+            if data:
+                self.log.info("Yielding {0} changes...".format(len(data)))
+                yield data
+            state["resume_token"] = stream.resume_token
+
+    def get_split_points(
+        self,
+        collection,
+        database=None,
+        count: int = 2,
+        oversampling: int = 20,
+    ) -> list:
+        """Return up to count - 1 _id values that split the collection into
+        ranges of roughly equal size, based on a random sample of documents.
+        """
+        mongo_collection = self.get_collection(collection, database)
+        sample = sorted(
+            document["_id"]
+            for document in mongo_collection.aggregate(
+                [{"$sample": {"size": count * oversampling}}, {"$project": {"_id": 1}}]
+            )
+        )
+        if len(set(type(value) for value in sample)) > 1:
+            # Range queries only match values of the same type as the bounds
+            raise Exception("Cannot split collection with _id values of mixed types!")
+        split_points = []
+        for i in range(1, count):
+            value = sample[(i * len(sample)) // count] if sample else None
+            if value is not None and not value in split_points:
+                split_points.append(value)
+        return split_points
+
     def get_data_in_batches(
         self,
         collection,
         database=None,
         filter_expression=None,
         batch_size: int = 100000,
+        projection=None,
+        cursor_batch_size=None,
+        parallel_cursors: int = 1,
     ):
-        mongo_database = self.mongoclient.get_database(
-            name=database or self.conn.default_database
-        )
-        mongo_collection = mongo_database[collection]
+        """Yield batches of documents.
+
+        :param projection: Fields to include or exclude, as in find().
+        :param cursor_batch_size: Number of documents per round trip to the server.
+        :param parallel_cursors: Number of concurrent cursors, each reading a
+            range of _id values. The _id values must all be of the same type.
+        """
+        mongo_collection = self.get_collection(collection, database)
         self.log.info(
             "\n\nFetching data with filter expression:\n{0}\n\n".format(
                 filter_expression
             )
         )
         filter_expression = deepcopy(filter_expression) or {}
-        cursor = mongo_collection.find(filter_expression)
 
-        data = []
-        for document in cursor:
-            data.append(document)
-            if len(data) >= batch_size:
+        def get_batches(range_filter):
+            cursor = mongo_collection.find(
+                {"$and": [filter_expression, range_filter]},
+                projection=projection,
+            )
+            if cursor_batch_size:
+                cursor = cursor.batch_size(cursor_batch_size)
+            data = []
+            for document in cursor:
+                data.append(document)
+                if len(data) >= batch_size:
+                    yield data
+                    data = []
+            if data:
+                yield data
+
+        if parallel_cursors > 1:
+            split_points = self.get_split_points(
+                collection=collection, database=database, count=parallel_cursors
+            )
+            bounds = [None] + split_points + [None]
+            range_filters = []
+            for lower, upper in zip(bounds[:-1], bounds[1:]):
+                range_filter = {}
+                if lower is not None:
+                    range_filter["$gte"] = lower
+                if upper is not None:
+                    range_filter["$lt"] = upper
+                range_filters.append({"_id": range_filter} if range_filter else {})
+            self.log.info(
+                "Fetching data with {0} concurrent cursors...".format(
+                    len(range_filters)
+                )
+            )
+            for data in iterate_concurrently(
+                [partial(get_batches, range_filter) for range_filter in range_filters]
+            ):
+                self.log.info("Yielding {0} documents...".format(len(data)))
                 yield data
-                data = []
-        if data:
-            yield data
+        else:
+            yield from get_batches({})
 
     def close(self):
         if hasattr(self, "_mc"):
@@ -1,5 +1,13 @@
+from ewah.hooks.base import EWAHBaseHook
 from ewah.hooks.sql_base import EWAHSQLBaseHook
 
+from pymysqlreplication import BinLogStreamReader
+from pymysqlreplication.row_event import (
+    DeleteRowsEvent,
+    UpdateRowsEvent,
+    WriteRowsEvent,
+)
+
 import pymysql
 
 from typing import Optional, List, Union
@@ -55,6 +63,12 @@ class EWAHMySQLHook(EWAHSQLBaseHook):
         conn.begin()  # Begin transaction
         return conn
 
+    def _reset_db_conn(self, dbconn) -> bool:
+        dbconn.rollback()
+        dbconn.ping(reconnect=False)
+        dbconn.begin()  # Begin transaction, as for a new connection
+        return True
+
     def _get_cursor(self):
         return self.dbconn.cursor(cursor=pymysql.cursors.SSCursor)
 
@@ -80,3 +94,88 @@ class EWAHMySQLHook(EWAHSQLBaseHook):
         (cursor or self.cursor).execute(sql.strip(), args=params)
         if commit:
             self.commit()
+
+    def get_binlog_position(self) -> dict:
+        """Return the current binlog file and position of the server."""
+        cur = self.dbconn.cursor()
+        try:
+            try:
+                cur.execute("SHOW BINARY LOG STATUS")  # MySQL >= 8.2
+            except pymysql.err.ProgrammingError:
+                cur.execute("SHOW MASTER STATUS")
+            row = cur.fetchone()
+        finally:
+            cur.close()
+        assert row, "Binary logging is not enabled on the server!"
+        return {"log_file": row[0], "log_pos": row[1]}
+
+    def get_binlog_changes_in_batches(
+        self,
+        position: dict,
+        server_id: int,
+        schema_name: str,
+        table_name: str,
+        batch_size: int = 10000,
+    ):
+        """Yield batches of row changes of a table from the binlog, starting at
+        a position and until the end of the binlog.
+
+        Each change is a tuple of (action, row, old row). Once all changes are
+        yielded, position is updated in place to the end of the binlog.
+
+        :param position: Dictionary with log_file and log_pos to start from.
+        :param server_id: Replica server id of the reader, unique per server.
+        """
+        ssh_hook = None
+        if hasattr(self.conn, "ssh_conn_id") and self.conn.ssh_conn_id:
+            ssh_hook = EWAHBaseHook.get_hook_from_conn_id(conn_id=self.conn.ssh_conn_id)
+            host, port = ssh_hook.start_tunnel(
+                self.conn.host, self.conn.port or self._DEFAULT_PORT
+            )
+        else:
+            host, port = self.conn.host, self.conn.port or self._DEFAULT_PORT
+        self.log.info(
+            "Reading binlog of {0}.{1} from {2}:{3}".format(
+                schema_name, table_name, position["log_file"], position["log_pos"]
+            )
+        )
+        stream = BinLogStreamReader(
+            connection_settings={
+                "host": host,
+                "port": port,
+                "user": self.conn.user,
+                "passwd": self.conn.password,
+            },
+            server_id=server_id,
+            resume_stream=True,
+            log_file=position["log_file"],
+            log_pos=position["log_pos"],
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent],
+            only_schemas=[schema_name],
+            only_tables=[table_name],
+            blocking=False,  # stop at the end of the binlog
+        )
+        try:
+            changes = []
+            for event in stream:
+                for row in event.rows:
+                    if isinstance(event, WriteRowsEvent):
+                        changes.append(("insert", row["values"], None))
+                    elif isinstance(event, UpdateRowsEvent):
+                        changes.append(
+                            ("update", row["after_values"], row["before_values"])
+                        )
+                    else:
+                        changes.append(("delete", row["values"], None))
+                if len(changes) >= batch_size:
+                    self.log.info("Yielding {0} changes...".format(len(changes)))
+                    yield changes
+                    changes = []
+            if changes:
+                self.log.info("Yielding {0} changes...".format(len(changes)))
+                yield changes
+            position.update({"log_file": stream.log_file, "log_pos": stream.log_pos})
+        finally:
+            stream.close()
+            if ssh_hook:
+                ssh_hook.stop_tunnel()
@@ -7,6 +7,7 @@ from typing import Optional, List, Union
 
 class EWAHOracleSQLOperator(EWAHSQLBaseHook):
     _DEFAULT_PORT = 1521
+    _DEFAULT_ARRAYSIZE = 5000  # cx_Oracle's default of 100 is slow for bulk loads
 
     _ATTR_RELABEL = {
         "user": "login",
@@ -42,6 +43,14 @@ class EWAHOracleSQLOperator(EWAHSQLBaseHook):
                 "SSH Connection ID (optional)",
                 widget=BS3TextFieldWidget(),
             ),
+            f"extra__ewah_oracle__arraysize": StringField(
+                "Cursor arraysize aka rows per round trip (optional, default: 5000)",
+                widget=BS3TextFieldWidget(),
+            ),
+            f"extra__ewah_oracle__prefetchrows": StringField(
+                "Cursor prefetchrows (optional)",
+                widget=BS3TextFieldWidget(),
+            ),
         }
 
     @staticmethod
@@ -64,7 +73,11 @@ class EWAHOracleSQLOperator(EWAHSQLBaseHook):
         )
 
     def _get_cursor(self):
-        return self.dbconn.cursor()
+        cursor = self.dbconn.cursor()
+        cursor.arraysize = int(self.conn.arraysize or self._DEFAULT_ARRAYSIZE)
+        if self.conn.prefetchrows:
+            cursor.prefetchrows = int(self.conn.prefetchrows)
+        return cursor
 
     def _get_dictcursor(self):
         class dictcur(object):
@@ -75,9 +88,9 @@ class EWAHOracleSQLOperator(EWAHSQLBaseHook):
             def execute(self, *args, **kwargs):
                 # rowfactory needs to be set AFTER EACH execution!
                 self._original_cursor.execute(*args, **kwargs)
-                self._original_cursor.rowfactory = lambda *a: dict(
-                    zip([d[0] for d in self._original_cursor.description], a)
-                )
+                # get the column names once instead of for every single row
+                column_names = tuple(d[0] for d in self._original_cursor.description)
+                self._original_cursor.rowfactory = lambda *a: dict(zip(column_names, a))
                 # cx_Oracle's cursor's execute method returns a cursor object
                 # -> return the correct cursor in the monkeypatched version as well!
                 return self._original_cursor
@@ -86,7 +99,7 @@ class EWAHOracleSQLOperator(EWAHSQLBaseHook):
                 # anything other than the execute method: just go straight to the cursor
                 return getattr(self._original_cursor, attr)
 
-        return dictcur(self.dbconn.cursor())
+        return dictcur(self._get_cursor())
 
     def execute(
         self, sql: str, params: Optional[dict] = None, commit: bool = False, cursor=None
@@ -1,7 +1,5 @@
 from ewah.hooks.base import EWAHBaseHook
 
-import requests
-
 from datetime import datetime, date
 
 
@@ -48,7 +46,7 @@ class EWAHPersonioHook(EWAHBaseHook):
     @property
     def token(self):
         # Token needs to be re-requested for every API call!
-        token_request = requests.post(
+        token_request = self.http_post(
             self.BASE_URL + "auth",
             headers={"Accept": "application/json", "X-Personio-Partner-ID": "ewah"},
             params={
@@ -93,7 +91,7 @@ class EWAHPersonioHook(EWAHBaseHook):
             self.log.info("Requesting a page of data...")
             # Token needs to be re-requested for every API call!
             headers["Authorization"] = "Bearer {0}".format(self.token)
-            response = requests.get(url, params=params, headers=headers)
+            response = self.http_get(url, params=params, headers=headers)
             assert response.status_code == 200, response.text
             response_data = response.json()
             assert response_data.get("success"), response_data
@@ -2,8 +2,6 @@ from ewah.hooks.base import EWAHBaseHook
 
 from typing import List, Dict, Any, Optional
 
-import requests
-import time
 import copy
 
 
@@ -20,6 +18,9 @@ class EWAHPipedriveHook(EWAHBaseHook):
 
     _URL: str = "https://{company}.pipedrive.com/api/v1/{endpoint}"
     _REQUESTS_LEFT = "x-ratelimit-remaining"
+    # Pipedrive allows at least 20 requests per 2 seconds per token, depending on
+    # the plan - the remaining requests are synced from the response headers
+    _HTTP_REQUESTS_PER_SECOND = 10
 
     def get_data_in_batches(
         self, object: str, batch_size: int = 10000, **kwargs
@@ -37,13 +38,13 @@ class EWAHPipedriveHook(EWAHBaseHook):
         data = []
         while first_call or (success and params["start"]):
             first_call = False
-            request = requests.get(url, params=params)
+            request = self.http_get(url, params=params)
             result = request.json()
             success = request.status_code == 200 and result.get("success")
             if success:
-                if int(request.headers[self._REQUESTS_LEFT]) < 10:
-                    # Wait for ratelimit to fill up again
-                    time.sleep(2)
+                requests_left = request.headers.get(self._REQUESTS_LEFT)
+                if requests_left and self.http_client.rate_limiter:
+                    self.http_client.rate_limiter.sync(available=int(requests_left))
 
                 data += result["data"]
                 if (
@@ -3,7 +3,6 @@ from airflow.configuration import conf
 
 from ewah.hooks.base import EWAHBaseHook
 
-import requests
 import json
 from datetime import datetime, timedelta
 from selenium import webdriver
@@ -146,7 +145,7 @@ class EWAHPlentyMarketsHook(EWAHBaseHook):
             else:
                 self.log.info("Requesting new token")
                 requested_at = datetime.now()
-                token_request = requests.post(
+                token_request = self.http_post(
                     self.endpoint + "/rest/login",
                     params={
                         "username": self.conn.username,
@@ -190,12 +189,11 @@ class EWAHPlentyMarketsHook(EWAHBaseHook):
             resource = "/rest/{0}".format(resource)
         return resource
 
-    @staticmethod
-    def request_wrapper(url, params, headers, method="get", payload=None):
+    def request_wrapper(self, url, params, headers, method="get", payload=None):
         if method == "get":
-            r = requests.get(url, headers=headers, params=params)
+            r = self.http_get(url, headers=headers, params=params)
         elif method == "post":
-            r = requests.post(url, headers=headers, params=params, json=payload)
+            r = self.http_post(url, headers=headers, params=params, json=payload)
         else:
             raise ValueError("Invalid method. Supported methods are 'get' and 'post'")
 
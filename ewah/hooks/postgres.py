@@ -1,8 +1,122 @@
 from ewah.hooks.sql_base import EWAHSQLBaseHook
 
+from contextlib import contextmanager
 from psycopg2 import connect as pg_connect
+from psycopg2.extensions import encodings as pg_encodings, string_types
 from psycopg2.extras import RealDictCursor
-from typing import Optional, List, Union, Dict, Any
+from typing import Optional, List, Union, Dict, Any, Tuple
+
+import io
+import os
+import re
+import struct
+import threading
+
+# Escape sequences used by COPY ... TO in text format
+_COPY_TEXT_ESCAPES = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "\\": "\\",
+}
+_COPY_TEXT_ESCAPE_REGEX = re.compile(r"\\(.)")
+
+
+class _PgOutputDecoder:
+    """Decodes the messages of the pgoutput logical decoding plugin (protocol
+    version 1) into changes. Values are converted into the same python types as
+    in a regular cursor by psycopg2's typecasters.
+    """
+
+    def __init__(self, cursor, encoding: str):
+        self.cursor = cursor  # typecasters need a cursor e.g. for time zones
+        self.encoding = encoding
+        self.relations = {}
+
+    def _read_string(self, message: bytes, pos: int) -> Tuple[str, int]:
+        end = message.index(b"\x00", pos)
+        return message[pos:end].decode(self.encoding), end + 1
+
+    def _decode_relation(self, message: bytes) -> None:
+        (relid,) = struct.unpack_from(">I", message, 1)
+        schema, pos = self._read_string(message, 5)
+        table, pos = self._read_string(message, pos)
+        (column_count,) = struct.unpack_from(">H", message, pos + 1)
+        pos += 3
+        columns = []
+        for _ in range(column_count):
+            name, pos = self._read_string(message, pos + 1)  # skip flags
+            (type_oid,) = struct.unpack_from(">I", message, pos)
+            pos += 8  # skip type modifier
+            columns.append((name, string_types.get(type_oid)))
+        self.relations[relid] = (schema, table, columns)
+
+    def _decode_tuple(self, relid: int, message: bytes, pos: int):
+        """Return the row as dict, the names of unchanged TOASTed columns that
+        are not part of the message, and the position after the tuple data.
+        """
+        columns = self.relations[relid][2]
+        (column_count,) = struct.unpack_from(">H", message, pos)
+        pos += 2
+        row = {}
+        unchanged = []
+        for name, caster in columns[:column_count]:
+            kind = message[pos : pos + 1]
+            pos += 1
+            if kind == b"n":
+                row[name] = None
+            elif kind == b"u":
+                unchanged.append(name)
+            else:
+                (length,) = struct.unpack_from(">I", message, pos)
+                value = message[pos + 4 : pos + 4 + length].decode(self.encoding)
+                pos += 4 + length
+                row[name] = caster(value, self.cursor) if caster else value
+        return row, unchanged, pos
+
+    def decode(self, message: bytes):
+        """Return a tuple of (action, schema, table, row, old row) for inserts,
+        updates and deletes, None for any other message.
+
+        The old row of an update is only available if the primary key changed
+        or if the table has REPLICA IDENTITY FULL.
+        """
+        kind = message[:1]
+        if kind == b"R":
+            self._decode_relation(message)
+            return None
+        if kind == b"T":
+            raise Exception(
+                "A table was truncated in the source! Reload the table with a "
+                "full refresh, then re-create the replication slot."
+            )
+        if not kind in (b"I", b"U", b"D"):
+            return None  # e.g. begin, commit, type or origin messages
+        (relid,) = struct.unpack_from(">I", message, 1)
+        schema, table, _ = self.relations[relid]
+        pos = 5
+        old_row = None
+        if message[pos : pos + 1] in (b"K", b"O"):
+            # old (key) values of an update or delete
+            old_row, _, pos = self._decode_tuple(relid, message, pos + 1)
+        if kind == b"D":
+            return ("delete", schema, table, old_row, None)
+        row, unchanged, _ = self._decode_tuple(relid, message, pos + 1)
+        if unchanged:
+            # unchanged TOASTed values are only sent as part of the old row
+            if not old_row or any(name not in old_row for name in unchanged):
+                raise Exception(
+                    "Unchanged TOASTed values of columns {0} of table {1}.{2} "
+                    "are not available in the change data! Set REPLICA IDENTITY "
+                    "FULL on the table.".format(", ".join(unchanged), schema, table)
+                )
+            row.update({name: old_row[name] for name in unchanged})
+        if kind == b"I":
+            return ("insert", schema, table, row, None)
+        return ("update", schema, table, row, old_row)
 
 
 class EWAHPostgresHook(EWAHSQLBaseHook):
@@ -60,6 +174,11 @@ class EWAHPostgresHook(EWAHSQLBaseHook):
             )
         )
 
+    def _reset_db_conn(self, dbconn) -> bool:
+        # roll back and reset any session settings, e.g. the time zone
+        dbconn.reset()
+        return True
+
     def _get_cursor(self):
         if (
             hasattr(self.conn, "serverside")
@@ -106,3 +225,205 @@ class EWAHPostgresHook(EWAHSQLBaseHook):
         cur = self.dictcursor if return_dict else self.cursor
         self.execute(sql, params=params, cursor=cur, commit=False)
         return cur.fetchall()
+
+    def get_query_columns(
+        self, sql: str, params: Optional[dict] = None
+    ) -> List[Tuple[str, int]]:
+        """Return a list of tuples of column name and type OID of a query's result."""
+        cur = self.dbconn.cursor()
+        try:
+            cur.execute(
+                "SELECT * FROM (\n{0}\n) t LIMIT 0".format(sql.strip()), vars=params
+            )
+            return [(col.name, col.type_code) for col in cur.description]
+        finally:
+            cur.close()
+
+    def get_type_names(self, type_oids: List[int]) -> Dict[int, str]:
+        """Return the data type names of type OIDs. Types that are not built-in
+        (e.g. enums or extension types) are named text, as they may not exist in
+        another database.
+        """
+        return dict(
+            self.execute_and_return_result(
+                sql="""
+                    SELECT t.oid
+                        , CASE WHEN n.nspname = 'pg_catalog'
+                            THEN format_type(t.oid, NULL)
+                            ELSE 'text' END
+                    FROM pg_type t
+                        JOIN pg_namespace n ON n.oid = t.typnamespace
+                    WHERE t.oid = ANY(%(oids)s)
+                """,
+                params={"oids": list(set(type_oids))},
+                return_dict=False,
+            )
+        )
+
+    @contextmanager
+    def copy_query_to_stream(self, sql: str, params: Optional[dict] = None):
+        """Run COPY (sql) TO STDOUT and provide the output as binary file-like
+        object in PostgreSQL's text format while it is being streamed.
+
+        The COPY runs in a background thread writing into a pipe, thus reading
+        (and e.g. parsing or uploading) happens while data is still transferred.
+        """
+        cur = self.dbconn.cursor()
+        copy_sql = "COPY (\n{0}\n) TO STDOUT".format(
+            cur.mogrify(sql.strip(), params).decode(pg_encodings[self.dbconn.encoding])
+        )
+        self.log.info("Executing SQL:\n\n{0}".format(copy_sql))
+        read_fd, write_fd = os.pipe()
+        reader = os.fdopen(read_fd, "rb")
+        writer = os.fdopen(write_fd, "wb")
+        errors = []
+
+        def copy_to_pipe():
+            try:
+                cur.copy_expert(copy_sql, writer)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                writer.close()
+
+        thread = threading.Thread(target=copy_to_pipe, daemon=True)
+        thread.start()
+        try:
+            yield reader
+        finally:
+            # closing the reader first unblocks the thread if reading stopped early
+            reader.close()
+            thread.join()
+            cur.close()
+        if errors:
+            raise errors[0]
+
+    def get_data_in_batches_via_copy(
+        self,
+        sql: str,
+        params: Optional[dict] = None,
+        batch_size: int = 10000,
+    ):
+        """Alternative to get_data_in_batches using COPY ... TO STDOUT.
+
+        Avoids the per-row overhead of the cursor. Values are converted into
+        the same python types as in a regular cursor by psycopg2's typecasters.
+        """
+        columns = self.get_query_columns(sql, params)
+        names = [name for name, _ in columns]
+        # typecasters need a cursor e.g. for time zones - keep one open meanwhile
+        cast_cur = self.dbconn.cursor()
+        # Unknown types (e.g. enums) are returned as strings, as by the cursor
+        casters = [string_types.get(oid) for _, oid in columns]
+
+        def parse_value(value, caster):
+            if value == "\\N":
+                return None
+            if "\\" in value:
+                value = _COPY_TEXT_ESCAPE_REGEX.sub(
+                    lambda m: _COPY_TEXT_ESCAPES.get(m.group(1), m.group(1)), value
+                )
+            return caster(value, cast_cur) if caster else value
+
+        try:
+            with self.copy_query_to_stream(sql, params) as stream:
+                lines = io.TextIOWrapper(
+                    stream,
+                    encoding=pg_encodings[self.dbconn.encoding],
+                    newline="\n",
+                )
+                data = []
+                for line in lines:
+                    # newlines within values are escaped, thus each line is a row
+                    values = line[:-1].split("\t")
+                    data.append(dict(zip(names, map(parse_value, values, casters))))
+                    if len(data) >= batch_size:
+                        self.log.info("Yielding {0} rows...".format(len(data)))
+                        yield data
+                        data = []
+                if data:
+                    yield data
+        finally:
+            cast_cur.close()
+
+    def replication_slot_exists(self, slot_name: str) -> bool:
+        return bool(
+            self.execute_and_return_result(
+                sql="SELECT 1 FROM pg_replication_slots WHERE slot_name = %(slot)s",
+                params={"slot": slot_name},
+                return_dict=False,
+            )
+        )
+
+    def create_replication_slot(self, slot_name: str) -> None:
+        """Create a logical replication slot using the pgoutput plugin.
+
+        The slot retains all changes from now on until they are consumed.
+        """
+        self.execute(
+            sql="SELECT pg_create_logical_replication_slot(%(slot)s, 'pgoutput')",
+            params={"slot": slot_name},
+            commit=True,
+        )
+
+    def get_current_wal_lsn(self) -> str:
+        return self.execute_and_return_result(
+            sql="SELECT pg_current_wal_lsn()::TEXT",
+            return_dict=False,
+        )[0][0]
+
+    def advance_replication_slot(self, slot_name: str, lsn: str) -> None:
+        """Confirm that all changes up to the lsn are consumed."""
+        self.execute(
+            sql="SELECT pg_replication_slot_advance(%(slot)s, %(lsn)s::PG_LSN)",
+            params={"slot": slot_name, "lsn": lsn},
+            commit=True,
+        )
+
+    def get_replication_changes_in_batches(
+        self,
+        slot_name: str,
+        publication_name: str,
+        upto_lsn: str,
+        batch_size: int = 10000,
+    ):
+        """Yield batches of changes of a logical replication slot up to an lsn.
+
+        Changes are only peeked at, not consumed - use advance_replication_slot
+        once the changes are safely stored. Each change is a tuple of (action,
+        schema, table, row, old row), see _PgOutputDecoder.decode.
+        """
+        cast_cur = self.dbconn.cursor()
+        decoder = _PgOutputDecoder(
+            cursor=cast_cur,
+            encoding=pg_encodings[self.dbconn.get_parameter_status("server_encoding")],
+        )
+        # server side cursor to avoid fetching all changes into memory at once
+        cur = self.dbconn.cursor("ewah_replication")
+        try:
+            self.execute(
+                sql="""
+                    SELECT data
+                    FROM pg_logical_slot_peek_binary_changes(
+                        %(slot)s, %(upto_lsn)s::PG_LSN, NULL,
+                        'proto_version', '1',
+                        'publication_names', %(publication)s
+                    )
+                """,
+                params={
+                    "slot": slot_name,
+                    "upto_lsn": upto_lsn,
+                    "publication": publication_name,
+                },
+                cursor=cur,
+            )
+            while True:
+                messages = cur.fetchmany(batch_size)
+                if not messages:
+                    break
+                changes = [decoder.decode(bytes(data)) for (data,) in messages]
+                self.log.info("Yielding {0} changes...".format(len(messages)))
+                yield [change for change in changes if change]
+        finally:
+            cur.close()
+            cast_cur.close()
@@ -59,7 +59,7 @@ class EWAHRapidmailHook(EWAHBaseHook):
         while True:
             self.log.info("Requesting page {0}...".format(page))
             params["page"] = page
-            request = requests.get(
+            request = self.http_get(
                 "/".join((self.URL, endpoint)), auth=auth, params=params
             )
             assert request.status_code == 200, request.text
@@ -1,11 +1,19 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.cache_utils import EWAHMetadataCache
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from simple_salesforce import Salesforce, format_soql
-from typing import Union, List, Dict, Optional, Any
-from datetime import datetime
+from tempfile import TemporaryFile
+from typing import Union, List, Dict, Optional, Any, Callable, Iterator
+from datetime import datetime, date
+from email.utils import formatdate
 
-import requests
+import csv
+import io
+import json
+import sys
+import time
 
 
 class EWAHSalesforceHook(EWAHBaseHook):
@@ -19,12 +27,32 @@ class EWAHSalesforceHook(EWAHBaseHook):
     conn_type: str = "ewah_salesforce"
     hook_name: str = "EWAH Salesforce Connection"
 
-    _FIELDS_CACHE = {}
-
     _OAUTH_URL = "https://{0}.salesforce.com/services/oauth2/token"
 
     version = "49.0"
 
+    # Describes are revalidated cheaply with If-None-Match resp. If-Modified-Since
+    _METADATA_CACHE_TTL_SECONDS = 5 * 60
+
+    # Field types that cannot be queried with the Bulk API
+    _BULK_UNSUPPORTED_TYPES = ("address", "location", "base64")
+
+    _DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+    # Converters of the string values of a Bulk API result, by field type;
+    # other field types remain strings
+    _TYPE_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+        "boolean": lambda value: value == "true",
+        "int": int,
+        "double": float,
+        "currency": float,
+        "percent": float,
+        "date": date.fromisoformat,
+        "datetime": lambda value: datetime.strptime(
+            value, EWAHSalesforceHook._DATETIME_FORMAT
+        ),
+    }
+
     @property
     def sf_conn(self) -> Salesforce:
         """Return an initialized Salesforce object based on the airflow connection."""
@@ -34,7 +62,7 @@ class EWAHSalesforceHook(EWAHBaseHook):
                 f"Initializing connection with username {self.conn.username}!"
             )
             if self.conn.client_secret:
-                response = requests.post(
+                response = self.http_post(
                     self._OAUTH_URL.format(self.conn.domain or "login"),
                     data={
                         "client_secret": self.conn.client_secret,
@@ -76,16 +104,37 @@ class EWAHSalesforceHook(EWAHBaseHook):
         data_from: Optional[datetime] = None,
         data_until: Optional[datetime] = None,
         batch_size: int = 10000,
+        use_bulk_api: bool = False,
+        bulk_page_size: int = 50000,
+        max_concurrent_downloads: int = 4,
+        datetime_fields: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Generator to return all data of a salesforce object"""
+        """Generator to return all data of a salesforce object
+
+        :param use_bulk_api: If TRUE, query the data with a Bulk API 2.0 query job
+            instead of paging through the REST API. The data is typed as per the
+            field types of the object.
+        :param bulk_page_size: Maximum number of records per result page of the
+            Bulk API query job.
+        :param max_concurrent_downloads: Maximum number of result pages of the Bulk
+            API query job that are downloaded concurrently.
+        :param datetime_fields: Fields to parse as datetime when using the REST
+            API, e.g. the subsequent field. With the Bulk API, all fields are typed.
+        """
 
         # Figure out what field(s) to use for date comparison & data loading
-        fields = self.get_fields_of_object(salesforce_object)
+        field_types = self.get_fields_of_object(salesforce_object, return_types=True)
         incrementer = self.get_incrementer(salesforce_object=salesforce_object)
+        if use_bulk_api and not columns:
+            columns = [
+                field
+                for (field, field_type) in field_types.items()
+                if not field_type in self._BULK_UNSUPPORTED_TYPES
+            ]
 
         # Create SOQL query
         query = "SELECT\n\t{0}\nFROM {1}".format(
-            ",\n\t".join(columns or fields), salesforce_object
+            ",\n\t".join(columns or field_types.keys()), salesforce_object
         )
         where_clauses = []
         if data_from and incrementer:
@@ -96,6 +145,20 @@ class EWAHSalesforceHook(EWAHBaseHook):
             query += "\nWHERE " + "\n  AND ".join(where_clauses)
         self.log.info(f"Querying data with this SOQL query:\n\n{query}")
 
+        if use_bulk_api:
+            yield from self.get_bulk_data_in_batches(
+                query=query,
+                field_types=field_types,
+                batch_size=batch_size,
+                page_size=bulk_page_size,
+                max_concurrent_downloads=max_concurrent_downloads,
+            )
+            return
+
+        converters = {
+            field: self._TYPE_CONVERTERS["datetime"] for field in datetime_fields or []
+        }
+
         # Yield results
         result = self.sf_conn.query(query, include_deleted=True)
         data = []
@@ -105,6 +168,9 @@ class EWAHSalesforceHook(EWAHBaseHook):
             result_data = result.pop("records")
             for datum in result_data:
                 del datum["attributes"]
+                for field, converter in converters.items():
+                    if datum.get(field):
+                        datum[field] = converter(datum[field])
                 datum = dict(datum)
             data += result_data
             next_page = result.get("nextRecordsUrl")
@@ -121,6 +187,139 @@ class EWAHSalesforceHook(EWAHBaseHook):
         if not result.get("done"):
             raise Exception("SOQL query error! Response: {0}".format(result))
 
+    @property
+    def api_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": "Bearer {0}".format(self.sf_conn.session_id),
+            "Content-Type": "application/json",
+        }
+
+    def run_bulk_query_job(self, query: str, max_poll_seconds: int = 30) -> str:
+        """Create a Bulk API 2.0 query job, including deleted records, and wait
+        until it is completed. Returns the url of the job.
+
+        Salesforce splits the query into chunks by primary key by itself."""
+        url = self.sf_conn.base_url + "jobs/query"
+        response = self.http_post(
+            url,
+            headers=self.api_headers,
+            data=json.dumps({"operation": "queryAll", "query": query}),
+        )
+        assert response.status_code == 200, "Status {0}: {1}".format(
+            response.status_code, response.text
+        )
+        job_url = "{0}/{1}".format(url, response.json()["id"])
+        self.log.info("Bulk query job {0} created.".format(response.json()["id"]))
+
+        wait_for = 1
+        while True:
+            time.sleep(wait_for)
+            wait_for = min(max_poll_seconds, wait_for * 2)
+            response = self.http_get(job_url, headers=self.api_headers)
+            assert response.status_code == 200, "Status {0}: {1}".format(
+                response.status_code, response.text
+            )
+            job = response.json()
+            self.log.info(
+                "Bulk query job status: {0} ({1} records processed)".format(
+                    job["state"], job.get("numberRecordsProcessed")
+                )
+            )
+            if job["state"] == "JobComplete":
+                return job_url
+            if not job["state"] in ("UploadComplete", "InProgress"):
+                raise Exception(
+                    "Bulk query job {0}! Error: {1}".format(
+                        job["state"], job.get("errorMessage")
+                    )
+                )
+
+    def download_bulk_results(
+        self, job_url: str, page_size: int, max_concurrent_downloads: int
+    ) -> Iterator[TemporaryFile]:
+        """Yield the result pages of a completed Bulk API 2.0 query job in order,
+        as temporary files of CSV data.
+
+        Each page response names the next page in its headers, thus the next page
+        is requested as soon as the headers of a page arrive, while the bodies of
+        up to max_concurrent_downloads pages are downloaded concurrently."""
+
+        def download(response):
+            file_obj = TemporaryFile()
+            try:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    file_obj.write(chunk)
+            finally:
+                response.close()
+            file_obj.seek(0)
+            return file_obj
+
+        params = {"maxRecords": page_size}
+        headers = self.api_headers
+        headers["Accept"] = "text/csv"
+        pending = deque()
+        has_more = True
+        with ThreadPoolExecutor(max_workers=max_concurrent_downloads) as executor:
+            try:
+                while has_more or pending:
+                    while has_more and len(pending) < max_concurrent_downloads:
+                        response = self.http_get(
+                            job_url + "/results",
+                            params=params,
+                            headers=headers,
+                            stream=True,
+                        )
+                        assert response.status_code == 200, "Status {0}: {1}".format(
+                            response.status_code, response.text
+                        )
+                        locator = response.headers.get("Sforce-Locator")
+                        has_more = bool(locator) and not locator == "null"
+                        params["locator"] = locator
+                        pending.append(executor.submit(download, response))
+                    with pending.popleft().result() as file_obj:
+                        yield file_obj
+            finally:
+                for future in pending:
+                    if not (future.cancel() or future.exception()):
+                        future.result().close()
+
+    def get_bulk_data_in_batches(
+        self,
+        query: str,
+        field_types: Dict[str, str],
+        batch_size: int = 10000,
+        page_size: int = 50000,
+        max_concurrent_downloads: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """Run an SOQL query as Bulk API 2.0 query job and yield batches of typed
+        records, parsing the CSV result pages as stream."""
+        job_url = self.run_bulk_query_job(query)
+        # Salesforce text fields may exceed the default field size limit
+        csv.field_size_limit(sys.maxsize)
+        data = []
+        for file_obj in self.download_bulk_results(
+            job_url, page_size, max_concurrent_downloads
+        ):
+            reader = csv.reader(io.TextIOWrapper(file_obj, "utf-8", newline=""))
+            fields = next(reader, None)
+            if not fields:
+                continue
+            converters = [
+                self._TYPE_CONVERTERS.get(field_types.get(field), str)
+                for field in fields
+            ]
+            for row in reader:
+                datum = {}
+                for field, converter, value in zip(fields, converters, row):
+                    # Empty values are null, Salesforce does not store empty strings
+                    datum[field] = converter(value) if value else None
+                data.append(datum)
+                if len(data) >= batch_size:
+                    yield data
+                    data = []
+        if data:
+            yield data
+
     def get_soql_query_result(
         self, soql_query: str, remove_attribues: bool = True, convert_dict: bool = False
     ) -> Union[List[OrderedDict], List[dict]]:
@@ -163,16 +362,37 @@ class EWAHSalesforceHook(EWAHBaseHook):
         :param return_types: If TRUE, return a dict of field_name:field_type; if FALSE,
             return a list of field names.
         """
-        if self._FIELDS_CACHE.get(salesforce_object):
-            fields = self._FIELDS_CACHE[salesforce_object]
-        else:
+
+        def fetch(validators):
+            headers = self.api_headers
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+            response = self.http_get(
+                "{0}sobjects/{1}/describe/".format(
+                    self.sf_conn.base_url, salesforce_object
+                ),
+                headers=headers,
+            )
+            new_validators = {
+                "etag": response.headers.get("ETag") or validators.get("etag"),
+                "last_modified": response.headers.get("Last-Modified")
+                or formatdate(usegmt=True),
+            }
+            if response.status_code == 304:
+                return EWAHMetadataCache.NOT_MODIFIED, new_validators
+            assert response.status_code == 200, "Status {0}: {1}".format(
+                response.status_code, response.text
+            )
             fields = {
-                field["name"]: field["type"]
-                for field in getattr(self.sf_conn, salesforce_object).describe()[
-                    "fields"
-                ]
+                field["name"]: field["type"] for field in response.json()["fields"]
             }
-            self._FIELDS_CACHE[salesforce_object] = fields
+            return fields, new_validators
+
+        fields = self.metadata_cache.get(
+            "salesforce_fields__{0}".format(salesforce_object), fetch
+        )
 
         if return_types:
             return fields
@@ -1,7 +1,5 @@
 from ewah.hooks.base import EWAHBaseHook
 
-import requests
-
 
 class EWAHSevDeskHook(EWAHBaseHook):
     conn_name_attr = "ewah_sevdesk_conn_id"
@@ -55,7 +53,7 @@ class EWAHSevDeskHook(EWAHBaseHook):
         self.log.info("Request URL: {0}".format(url))
         while True:
             self.log.info("Requesting a new page...")
-            request = requests.get(url, params=params)
+            request = self.http_get(url, params=params)
             assert request.status_code == 200, request.text
             response = request.json()["objects"]
             if response:
@@ -2,11 +2,10 @@ from ewah.hooks.base import EWAHBaseHook
 
 from office365.runtime.auth.user_credential import UserCredential
 from office365.sharepoint.client_context import ClientContext
-from office365.sharepoint.files.file import File
 
 from openpyxl import load_workbook
 
-import io
+from tempfile import TemporaryFile
 
 
 class EWAHSharepointHook(EWAHBaseHook):
@@ -56,19 +55,37 @@ class EWAHSharepointHook(EWAHBaseHook):
         ctx = ClientContext(self.conn.site_url).with_credentials(
             UserCredential(self.conn.user, self.conn.password)
         )
-        response = File.open_binary(ctx, relative_url)
-        bytes_file_obj = io.BytesIO()
-        bytes_file_obj.write(response.content)
-        bytes_file_obj.seek(0)
-        ws = load_workbook(bytes_file_obj, data_only=True)[worksheet_name]
-        headers = {
-            ws.cell(row=header_row, column=col).value: col
-            for col in range(1, ws.max_column + 1)
-            if ws.cell(row=header_row, column=col)
-        }
-        while start_row < ws.max_row + 1:
-            yield [
-                {k: ws.cell(row=row, column=v).value for k, v in headers.items()}
-                for row in range(start_row, min(start_row + batch_size, ws.max_row + 1))
-            ]
-            start_row += batch_size
+        with TemporaryFile() as file_obj:
+            # stream the download to disk instead of holding it in memory
+            self.log.info("Downloading {0}...".format(relative_url))
+            ctx.web.get_file_by_server_relative_url(relative_url).download_session(
+                file_obj, chunk_size=1024 * 1024
+            ).execute_query()
+            file_obj.seek(0)
+
+            # read-only mode parses the worksheet row by row while iterating
+            wb = load_workbook(file_obj, read_only=True, data_only=True)
+            try:
+                ws = wb[worksheet_name]
+                # the dimensions stored in the file may be wrong, read all rows
+                ws.reset_dimensions()
+                rows = ws.iter_rows(min_row=header_row, values_only=True)
+                header_values = next(rows, None) or ()
+                headers = {value: i for i, value in enumerate(header_values)}
+                for _ in range(start_row - header_row - 1):
+                    next(rows, None)  # skip rows between header and start row
+                data = []
+                for row in rows:
+                    data.append(
+                        {
+                            k: row[i] if i < len(row) else None
+                            for k, i in headers.items()
+                        }
+                    )
+                    if len(data) >= batch_size:
+                        yield data
+                        data = []
+                if data:
+                    yield data
+            finally:
+                wb.close()
@@ -1,11 +1,13 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.python_utils import TokenBucket
 
+from concurrent.futures import ThreadPoolExecutor
 from pytz import timezone
-import requests
-import time
 import copy
 import dateutil
+import json
 import re
+import time
 from datetime import datetime, timedelta
 
 
@@ -20,6 +22,15 @@ class EWAHShopifyHook(EWAHBaseHook):
     DEFAULT_API_VERSION = "2023-07"
     _BASE_URL = "https://{shop}.myshopify.com/admin/api/{version}/{object}.json"
 
+    # The REST Admin API uses a leaky bucket per shop, e.g. 40 requests leaking
+    # at 2 requests per second; Shopify Plus shops have larger buckets. The bucket
+    # is tracked locally and synced with the call limit header of each response.
+    _CALL_LIMIT_HEADER = "X-Shopify-Shop-Api-Call-Limit"
+    _CALL_LIMIT_DEFAULT = 40
+    _CALL_LIMIT_LEAK_SECONDS = 20  # seconds until a full bucket has leaked
+
+    _GRAPHQL_URL = "https://{shop}.myshopify.com/admin/api/{version}/graphql.json"
+
     _DEFAULT_TIMESTAMP_FIELDS = ("updated_at_min", "updated_at_max", "updated_at")
     _DEFAULT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S%z"
     _FULFILLMENT_ORDERS_LOOKBACK_WINDOW_DAYS = 90
@@ -73,6 +84,75 @@ class EWAHShopifyHook(EWAHBaseHook):
         },
     }
 
+    # Default GraphQL queries of bulk operations - $query_filter is replaced by a
+    # search query that filters by updated_at, if applicable
+    _BULK_QUERIES = {
+        "customers": """
+            {
+                customers(query: "$query_filter") {
+                    edges { node {
+                        id email firstName lastName state tags note
+                        createdAt updatedAt numberOfOrders
+                        amountSpent { amount currencyCode }
+                    } }
+                }
+            }
+        """,
+        "inventory_items": """
+            {
+                inventoryItems(query: "$query_filter") {
+                    edges { node {
+                        id sku tracked createdAt updatedAt
+                        unitCost { amount currencyCode }
+                        inventoryLevels { edges { node {
+                            id
+                            location { id }
+                            quantities(names: ["available", "on_hand"]) {
+                                name quantity
+                            }
+                        } } }
+                    } }
+                }
+            }
+        """,
+        "orders": """
+            {
+                orders(query: "$query_filter") {
+                    edges { node {
+                        id name email createdAt updatedAt processedAt
+                        cancelledAt closedAt currencyCode tags
+                        displayFinancialStatus displayFulfillmentStatus
+                        customer { id }
+                        totalPriceSet { shopMoney { amount currencyCode } }
+                        lineItems { edges { node {
+                            id sku name quantity
+                            variant { id }
+                            originalUnitPriceSet {
+                                shopMoney { amount currencyCode }
+                            }
+                        } } }
+                    } }
+                }
+            }
+        """,
+        "products": """
+            {
+                products(query: "$query_filter") {
+                    edges { node {
+                        id title handle vendor productType status tags
+                        createdAt updatedAt publishedAt
+                        variants { edges { node {
+                            id title sku price compareAtPrice inventoryQuantity
+                            createdAt updatedAt
+                            inventoryItem { id }
+                        } } }
+                    } }
+                }
+            }
+        """,
+    }
+    _BULK_TIMESTAMP_FIELD = "updatedAt"
+
     @staticmethod
     def get_ui_field_behaviour() -> dict:
         return {
@@ -91,7 +171,41 @@ class EWAHShopifyHook(EWAHBaseHook):
         url_rel_mapping = {rel: url for url, rel in matches}
         return url_rel_mapping["next"]
 
-    def get_fulfillment_orders(self, order_ids, shop, version, headers):
+    def get_call_limiter(self, shop):
+        if not hasattr(self, "_call_limiters"):
+            self._call_limiters = {}
+        if not shop in self._call_limiters:
+            self._call_limiters[shop] = TokenBucket(
+                rate=self._CALL_LIMIT_DEFAULT / self._CALL_LIMIT_LEAK_SECONDS,
+                capacity=self._CALL_LIMIT_DEFAULT,
+            )
+        return self._call_limiters[shop]
+
+    def request_api(self, shop, url, **kwargs):
+        """GET request within the shop's leaky bucket limit."""
+        call_limiter = self.get_call_limiter(shop)
+        call_limiter.consume()
+        response = self.http_get(url, **kwargs)
+        call_limit = response.headers.get(self._CALL_LIMIT_HEADER)
+        if call_limit:
+            used, capacity = map(int, call_limit.split("/"))
+            call_limiter.sync(
+                available=capacity - used,
+                rate=capacity / self._CALL_LIMIT_LEAK_SECONDS,
+                capacity=capacity,
+            )
+        return response
+
+    @staticmethod
+    def map_concurrently(function, items, concurrency):
+        """Return [function(item) for item in items], calling function in
+        concurrency threads."""
+        if concurrency <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(function, items))
+
+    def get_fulfillment_orders(self, order_ids, shop, version, headers, concurrency=1):
         """Fetches fulfillment_orders for every order"""
         self.log.info("Requesting fulfillment_orders of orders...")
         base_url = self._BASE_URL.format(
@@ -100,17 +214,21 @@ class EWAHShopifyHook(EWAHBaseHook):
             object="orders/{id}/fulfillment_orders",
         )
 
+        def get_result(order):
+            response = self.request_api(
+                shop, base_url.format(id=order), headers=headers
+            )
+            response.raise_for_status()
+            return response.json()["fulfillment_orders"]
+
         data = []
         count = 0  # In case no fulfillment orders information exist (e.g. CH shop)
-        for count, order in enumerate(order_ids):
-            url = base_url.format(id=order)
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            result = response.json()["fulfillment_orders"]
-            if result:
-                data.append(result)
-            if count % 250 == 0:
-                self.log.info(f"Processed {count} fulfillment orders")
+        chunk_size = 250
+        for offset in range(0, len(order_ids), chunk_size):
+            chunk = order_ids[offset : offset + chunk_size]
+            data += filter(None, self.map_concurrently(get_result, chunk, concurrency))
+            count = offset + len(chunk)
+            self.log.info(f"Processed {count} fulfillment orders")
 
         self.log.info(
             f"All fulfillment orders of chosen time period fetched ({count} fulfillment orders)"
@@ -118,7 +236,7 @@ class EWAHShopifyHook(EWAHBaseHook):
 
         return data
 
-    def add_get_transactions(self, data, shop, version, req_kwargs):
+    def add_get_transactions(self, data, shop, version, req_kwargs, concurrency=1):
         # Adds transactions to orders
         self.log.info("Requesting transactions of orders...")
         base_url = self._BASE_URL.format(
@@ -127,19 +245,21 @@ class EWAHShopifyHook(EWAHBaseHook):
             object="orders/{id}/transactions",
         )
 
-        for datum in data:
-            id = datum["id"]
-            time.sleep(1)  # avoid hitting api call requests per second limit
-            url = base_url.format(id=id)
-            response = requests.get(url, **req_kwargs)
+        def get_result(datum):
+            url = base_url.format(id=datum["id"])
+            response = self.request_api(shop, url, **req_kwargs)
             assert response.status_code == 200, "Code {0}: {1}".format(
                 response.status_code, response.text
             )
-            datum["transactions"] = response.json().get("transactions", [])
+            return response.json().get("transactions", [])
+
+        results = self.map_concurrently(get_result, data, concurrency)
+        for datum, result in zip(data, results):
+            datum["transactions"] = result
 
         return data
 
-    def add_get_inventoryitems(self, data, shop, version, req_kwargs):
+    def add_get_inventoryitems(self, data, shop, version, req_kwargs, concurrency=1):
         # Adds inventory item data (i.e. costs) for products
         self.log.info("Requesting inventory items of product variants...")
         url = self._BASE_URL.format(
@@ -147,22 +267,25 @@ class EWAHShopifyHook(EWAHBaseHook):
             version=version,
             object="inventory_items",
         )
-        kwargs = copy.deepcopy(req_kwargs)
 
-        for datum in data:
+        def get_result(datum):
             ids = [v["inventory_item_id"] for v in datum.get("variants", [])]
-            if ids:
-                kwargs["params"] = {"ids": copy.deepcopy(ids)}
-                time.sleep(1)  # avoid hitting api call requested limit
-                response = requests.get(url, **kwargs)
-                assert response.status_code == 200, "Code {0}: {1}".format(
-                    response.status_code, response.text
-                )
-                datum["inventory_items"] = response.json().get("inventory_items", [])
+            kwargs = copy.deepcopy(req_kwargs)
+            kwargs["params"] = {"ids": ids}
+            response = self.request_api(shop, url, **kwargs)
+            assert response.status_code == 200, "Code {0}: {1}".format(
+                response.status_code, response.text
+            )
+            return response.json().get("inventory_items", [])
+
+        data_with_variants = [datum for datum in data if datum.get("variants")]
+        results = self.map_concurrently(get_result, data_with_variants, concurrency)
+        for datum, result in zip(data_with_variants, results):
+            datum["inventory_items"] = result
 
         return data
 
-    def add_get_events(self, data, shop, version, req_kwargs):
+    def add_get_events(self, data, shop, version, req_kwargs, concurrency=1):
         # Adds events of an order to orders
         self.log.info("Requesting events of orders...")
         base_url = self._BASE_URL.format(
@@ -171,18 +294,44 @@ class EWAHShopifyHook(EWAHBaseHook):
             object="orders/{id}/events",
         )
 
-        for datum in data:
-            id = datum["id"]
-            time.sleep(1)
-            url = base_url.format(id=id)
-            response = requests.get(url, **req_kwargs)
+        def get_result(datum):
+            url = base_url.format(id=datum["id"])
+            response = self.request_api(shop, url, **req_kwargs)
             assert response.status_code == 200, "Code {0}: {1}".format(
                 response.status_code, response.text
             )
-            datum["events"] = response.json().get("events", [])
+            return response.json().get("events", [])
+
+        results = self.map_concurrently(get_result, data, concurrency)
+        for datum, result in zip(data, results):
+            datum["events"] = result
 
         return data
 
+    def get_location_ids(self, shop_id, version):
+        """Return the ids of all locations of a shop, which rarely change."""
+
+        def fetch(validators):
+            ids_list = []
+            for chunk in self.get_data(
+                shopify_object="locations",
+                filter_fields={},
+                shop_id=shop_id,
+                version=version,
+                data_from=None,
+                data_until=None,
+                add_transactions=False,
+                add_events=False,
+                add_inventoryitems=False,
+            ):
+                for location in chunk:
+                    ids_list.append(location["id"])
+            return ids_list, {}
+
+        return self.metadata_cache.get(
+            "shopify_location_ids__{0}".format(shop_id), fetch
+        )
+
     @staticmethod
     def datetime_to_string(dt, format):
         # check if tz aware; set to utc if so
@@ -210,6 +359,7 @@ class EWAHShopifyHook(EWAHBaseHook):
         add_events=False,
         add_inventoryitems=False,
         parent_object=None,
+        enrichment_concurrency=4,
     ):
         # Get data from Shopify via REST API
         assert shopify_object in self._OBJECTS.keys(), "Object invalid!"
@@ -283,19 +433,7 @@ class EWAHShopifyHook(EWAHBaseHook):
 
         ids_list = []
         if shopify_object == "inventory_levels":
-            for chunk in self.get_data(
-                shopify_object="locations",
-                filter_fields={},
-                shop_id=shop_id,
-                version=version,
-                data_from=None,
-                data_until=None,
-                add_transactions=False,
-                add_events=False,
-                add_inventoryitems=False,
-            ):
-                for location in chunk:
-                    ids_list.append(location["id"])
+            ids_list = self.get_location_ids(shop_id, version)
 
         kwargs_init = {
             "headers": headers,
@@ -311,50 +449,15 @@ class EWAHShopifyHook(EWAHBaseHook):
                 url, str(params)
             )
         )
-        req_kwargs = kwargs_init
-        is_first = True
-        finished_pagination = True
-        while is_first or response.status_code == 200:
-            if shopify_object == "inventory_levels" and (
-                is_first or finished_pagination
-            ):
-                # inventory_levels endpoint only takes 50 ids max at a time
-                location_ids = ",".join([str(id) for id in ids_list[:50]])
-                ids_list = ids_list[50:]
-                req_kwargs["params"]["location_ids"] = location_ids
-                # if there are more ids than the allowed limit we need to restart
-                # the request with new ids once the previous pagination is done
-                finished_pagination = False
-
-            if is_first or not finished_pagination:
-                req_kwargs = kwargs_links
-
-            if parent_object == "fulfillment_orders":
-                response = requests.get(url, **req_kwargs, params=params)
-                if is_first:
-                    params = {}
-                    is_first = False
 
-            else:
-                # This is the main request for the connector used for most objects
-                response = requests.get(url, **req_kwargs)
-                is_first = False
-
-            # Special case: To avoid raising an exception we use other get method for data
-            if not shopify_object == "fulfillment_orders":
-                response.raise_for_status()
-                data = response.json().get(
-                    object_metadata.get(
-                        "_name_in_request_data",
-                        shopify_object,
-                    )
-                )
+        def enrich(data):
             if add_transactions:
                 data = self.add_get_transactions(
                     data=data,
                     shop=shop_id,
                     version=version,
                     req_kwargs=kwargs_links,
+                    concurrency=enrichment_concurrency,
                 )
             if add_events:
                 data = self.add_get_events(
@@ -362,6 +465,7 @@ class EWAHShopifyHook(EWAHBaseHook):
                     shop=shop_id,
                     version=version,
                     req_kwargs=kwargs_links,
+                    concurrency=enrichment_concurrency,
                 )
             if add_inventoryitems:
                 data = self.add_get_inventoryitems(
@@ -369,43 +473,256 @@ class EWAHShopifyHook(EWAHBaseHook):
                     shop=shop_id,
                     version=version,
                     req_kwargs=kwargs_links,
+                    concurrency=enrichment_concurrency,
                 )
-            if shopify_object == "fulfillment_orders":
-                data = self.get_fulfillment_orders(
-                    order_ids=order_ids,
-                    shop=shop_id,
-                    version=version,
-                    headers=headers,
-                )
-
             if data and not object_metadata.get("_is_drop_and_replace", False):
                 for datum in data:
                     datum[timestamp_fields[2]] = dateutil.parser.parse(
                         datum[timestamp_fields[2]]
                     )
+            return data
 
-            if shopify_object == "fulfillment_orders":
-                # Data from fulfillment_orders comes in a list, must iterate through
-                for order in data:
-                    yield order
-            else:
-                # This is the main yield statement for the connector used for most objects
-                yield data
-
-            if response.headers.get("Link") != None and response.headers[
-                "Link"
-            ].endswith('el="next"'):
-                self.log.info("Requesting next page of data...")
-                url = self.extract_next_url(response.headers["Link"])
-            elif ids_list and shopify_object == "inventory_levels":
-                # after pagination complete we restart the requests while
-                # we still have ids in id_list
-                finished_pagination = True
-                url = self._BASE_URL.format(
-                    shop=shop_id,
-                    version=version,
-                    object="inventory_levels",
+        # create the shop's call limiter before requesting data concurrently
+        self.get_call_limiter(shop_id)
+        req_kwargs = kwargs_init
+        is_first = True
+        finished_pagination = True
+        pending = None  # future of the enrichment of the previous page
+        with ThreadPoolExecutor(max_workers=1) as pipeline:
+            while is_first or response.status_code == 200:
+                if shopify_object == "inventory_levels" and (
+                    is_first or finished_pagination
+                ):
+                    # inventory_levels endpoint only takes 50 ids max at a time
+                    location_ids = ",".join([str(id) for id in ids_list[:50]])
+                    ids_list = ids_list[50:]
+                    req_kwargs["params"]["location_ids"] = location_ids
+                    # if there are more ids than the allowed limit we need to restart
+                    # the request with new ids once the previous pagination is done
+                    finished_pagination = False
+
+                if is_first or not finished_pagination:
+                    req_kwargs = kwargs_links
+
+                if parent_object == "fulfillment_orders":
+                    response = self.request_api(
+                        shop_id, url, **req_kwargs, params=params
+                    )
+                    if is_first:
+                        params = {}
+                        is_first = False
+
+                else:
+                    # This is the main request for the connector used for most objects
+                    response = self.request_api(shop_id, url, **req_kwargs)
+                    is_first = False
+
+                # Special case: To avoid raising an exception we use other get method for data
+                if not shopify_object == "fulfillment_orders":
+                    response.raise_for_status()
+                    data = response.json().get(
+                        object_metadata.get(
+                            "_name_in_request_data",
+                            shopify_object,
+                        )
+                    )
+                if shopify_object == "fulfillment_orders":
+                    data = self.get_fulfillment_orders(
+                        order_ids=order_ids,
+                        shop=shop_id,
+                        version=version,
+                        headers=headers,
+                        concurrency=enrichment_concurrency,
+                    )
+                    # Data from fulfillment_orders comes in a list, must iterate through
+                    for order in data:
+                        yield order
+                else:
+                    # Enrich the page in the background while requesting the next page
+                    future = pipeline.submit(enrich, data)
+                    if pending:
+                        # This is the main yield statement used for most objects
+                        yield pending.result()
+                    pending = future
+
+                if response.headers.get("Link") != None and response.headers[
+                    "Link"
+                ].endswith('el="next"'):
+                    self.log.info("Requesting next page of data...")
+                    url = self.extract_next_url(response.headers["Link"])
+                elif ids_list and shopify_object == "inventory_levels":
+                    # after pagination complete we restart the requests while
+                    # we still have ids in id_list
+                    finished_pagination = True
+                    url = self._BASE_URL.format(
+                        shop=shop_id,
+                        version=version,
+                        object="inventory_levels",
+                    )
+                    req_kwargs = kwargs_init
+                else:
+                    break
+            if pending:
+                yield pending.result()
+
+    def request_graphql(self, shop, version, query, variables=None):
+        response = self.http_post(
+            self._GRAPHQL_URL.format(shop=shop, version=version),
+            json={"query": query, "variables": variables or {}},
+            headers={"X-Shopify-Access-Token": self.conn.password},
+        )
+        assert response.status_code == 200, "Code {0}: {1}".format(
+            response.status_code, response.text
+        )
+        result = response.json()
+        if result.get("errors"):
+            raise Exception("GraphQL errors: {0}".format(result["errors"]))
+        return result["data"]
+
+    def run_bulk_operation(self, shop, version, query, max_poll_seconds=30):
+        """Submit a bulk query and wait until it is completed. Returns the url of
+        the JSONL result, or None if there is no data."""
+        data = self.request_graphql(
+            shop,
+            version,
+            """
+            mutation bulkOperationRunQuery($query: String!) {
+                bulkOperationRunQuery(query: $query) {
+                    bulkOperation { id status }
+                    userErrors { field message }
+                }
+            }
+            """,
+            {"query": query},
+        )["bulkOperationRunQuery"]
+        if data["userErrors"]:
+            raise Exception("Bulk operation failed: {0}".format(data["userErrors"]))
+        operation_id = data["bulkOperation"]["id"]
+        self.log.info("Bulk operation {0} submitted.".format(operation_id))
+
+        wait_for = 1
+        while True:
+            time.sleep(wait_for)
+            wait_for = min(max_poll_seconds, wait_for * 2)
+            operation = self.request_graphql(
+                shop,
+                version,
+                """
+                query bulkOperation($id: ID!) {
+                    node(id: $id) {
+                        ... on BulkOperation {
+                            id status errorCode objectCount url
+                        }
+                    }
+                }
+                """,
+                {"id": operation_id},
+            )["node"]
+            status = operation["status"]
+            self.log.info(
+                "Bulk operation status: {0} ({1} objects)".format(
+                    status, operation.get("objectCount")
                 )
-                req_kwargs = kwargs_init
+            )
+            if status == "COMPLETED":
+                return operation["url"]
+            if not status in ("CREATED", "RUNNING"):
+                raise Exception(
+                    "Bulk operation {0}! Error code: {1}".format(
+                        status, operation.get("errorCode")
+                    )
+                )
+
+    @staticmethod
+    def iterate_bulk_objects(lines):
+        """Rebuild nested objects from the lines of a bulk operation result.
+
+        Child objects follow their parent, referencing it with __parentId. They
+        are added to their parent as lists, named after the object type of their
+        id, e.g. "ProductVariant". Each top-level object is yielded as soon as
+        the next top-level object starts, thus only one is held in memory.
+        """
+        current = None
+        objects_by_id = {}
+        for line in lines:
+            if not line:
+                continue
+            obj = json.loads(line)
+            parent_id = obj.pop("__parentId", None)
+            if parent_id is None:
+                if current is not None:
+                    yield current
+                current = obj
+                objects_by_id = {}
             else:
-                break
+                parent = objects_by_id.get(parent_id)
+                if parent is None:
+                    _msg = "Parent {0} not found - bulk result lines are out of order!"
+                    raise Exception(_msg.format(parent_id))
+                # e.g. gid://shopify/ProductVariant/123 -> ProductVariant
+                gid_parts = str(obj.get("id") or "").split("/")
+                child_type = obj.get("__typename") or (
+                    gid_parts[-2] if len(gid_parts) > 2 else "children"
+                )
+                parent.setdefault(child_type, []).append(obj)
+            if obj.get("id"):
+                objects_by_id[obj["id"]] = obj
+        if current is not None:
+            yield current
+
+    def get_data_bulk(
+        self,
+        shopify_object=None,
+        query=None,
+        shop_id=None,
+        version=None,
+        data_from=None,
+        data_until=None,
+        batch_size=10000,
+    ):
+        """Get data via a GraphQL bulk operation, using the default query of the
+        shopify_object or a custom query."""
+        _msg = "Must provide a query or a shopify_object with a default bulk query!"
+        assert query or shopify_object in self._BULK_QUERIES, _msg
+        version = version or self.DEFAULT_API_VERSION
+        shop_id = shop_id or self.conn.login
+        query = query or self._BULK_QUERIES[shopify_object]
+
+        query_filter = []
+        if data_from:
+            query_filter.append(
+                "updated_at:>='{0}'".format(
+                    self.datetime_to_string(data_from, "%Y-%m-%dT%H:%M:%SZ")
+                )
+            )
+        if data_until:
+            query_filter.append(
+                "updated_at:<='{0}'".format(
+                    self.datetime_to_string(data_until, "%Y-%m-%dT%H:%M:%SZ")
+                )
+            )
+        query = query.replace("$query_filter", " AND ".join(query_filter))
+
+        url = self.run_bulk_operation(shop_id, version, query)
+        if not url:
+            self.log.info("Bulk operation returned no data.")
+            return
+
+        self.log.info("Downloading and parsing the bulk operation result...")
+        response = self.http_get(url, stream=True)
+        assert response.status_code == 200, "Code {0}: {1}".format(
+            response.status_code, response.text
+        )
+        data = []
+        with response:
+            for obj in self.iterate_bulk_objects(response.iter_lines()):
+                if obj.get(self._BULK_TIMESTAMP_FIELD):
+                    obj[self._BULK_TIMESTAMP_FIELD] = dateutil.parser.parse(
+                        obj[self._BULK_TIMESTAMP_FIELD]
+                    )
+                data.append(obj)
+                if len(data) >= batch_size:
+                    yield data
+                    data = []
+        if data:
+            yield data
@@ -1,7 +1,12 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.connection_pool import EWAHConnectionPool, get_connection_config_hash
 
 from typing import Optional, Dict, Any, Union, List
 
+# Open database connections are re-used by hooks of the same process (and thus
+# of the same task), e.g. by a kickoff statement and a sensor.
+db_connection_pool = EWAHConnectionPool(name="DB connection")
+
 
 class EWAHSQLBaseHook(EWAHBaseHook):
     """Base hook extension for use as parent of various SQL hooks.
@@ -16,20 +21,61 @@ class EWAHSQLBaseHook(EWAHBaseHook):
 
     _DEFAULT_PORT = 1234  # overwrite in child
 
+    # Overwrite with False in child if connections cannot be reset and re-used
+    _POOL_CONNECTIONS = True
+
+    @property
+    def _pool_key(self):
+        return (
+            self.__class__.__name__,
+            self.conn.conn_id,
+            get_connection_config_hash(self.conn),
+        )
+
+    def _open_db_conn(self):
+        """Open a new connection, using an SSH tunnel if applicable. Returns the
+        connection and a callable that closes it (and the tunnel) again."""
+        ssh_hook = None
+        if hasattr(self.conn, "ssh_conn_id") and self.conn.ssh_conn_id:
+            ssh_hook = EWAHBaseHook.get_hook_from_conn_id(conn_id=self.conn.ssh_conn_id)
+            self.local_bind_address = ssh_hook.start_tunnel(
+                self.conn.host, self.conn.port or self._DEFAULT_PORT
+            )
+        else:
+            self.local_bind_address = self.conn.host, self.conn.port
+        try:
+            dbconn = self._get_db_conn()
+        except:
+            if ssh_hook:
+                ssh_hook.stop_tunnel()
+            raise
+
+        def close_db_conn():
+            dbconn.close()
+            if ssh_hook:
+                ssh_hook.stop_tunnel()
+
+        return dbconn, close_db_conn
+
+    def _reset_db_conn(self, dbconn) -> bool:
+        """Reset a connection before it is re-used by another hook, e.g. roll
+        back any open transaction. Raise an error if the connection is unusable.
+        Overwrite in child if required.
+        """
+        dbconn.rollback()
+        return True
+
     @property
     def dbconn(self):
         if not hasattr(self, "_dbconn"):
-            if hasattr(self.conn, "ssh_conn_id") and self.conn.ssh_conn_id:
-                if not hasattr(self, "_ssh_hook"):
-                    self._ssh_hook = EWAHBaseHook.get_hook_from_conn_id(
-                        conn_id=self.conn.ssh_conn_id
-                    )
-                    self.local_bind_address = self._ssh_hook.start_tunnel(
-                        self.conn.host, self.conn.port or self._DEFAULT_PORT
-                    )
+            if self._POOL_CONNECTIONS:
+                self._dbconn = db_connection_pool.acquire(
+                    key=self._pool_key,
+                    create=self._open_db_conn,
+                    validate=self._reset_db_conn,
+                )
             else:
-                self.local_bind_address = self.conn.host, self.conn.port
-            self._dbconn = self._get_db_conn()
+                self._dbconn, self._close_db_conn = self._open_db_conn()
         return self._dbconn
 
     @property
@@ -89,18 +135,29 @@ class EWAHSQLBaseHook(EWAHBaseHook):
         self.log.info("Rolling back changes!")
         return self.dbconn.rollback()
 
-    def close(self):
+    def close_cursors(self):
+        """Close open cursors but keep the connection, e.g. to release a
+        server-side cursor before executing the next query."""
         if hasattr(self, "_cur"):
             self._cur.close()
             del self._cur
         if hasattr(self, "_dictcur"):
             self._dictcur.close()
             del self._dictcur
+
+    def close(self):
+        self.close_cursors()
         if hasattr(self, "_dbconn"):
-            if hasattr(self, "_ssh_hook"):
-                self._ssh_hook.stop_tunnel()
-                del self._ssh_hook
-            self._dbconn.close()
+            if self._POOL_CONNECTIONS:
+                # Return the connection to the pool instead of closing it
+                db_connection_pool.release(
+                    key=self._pool_key,
+                    connection=self._dbconn,
+                    reset=self._reset_db_conn,
+                )
+            else:
+                self._close_db_conn()
+                del self._close_db_conn
             del self._dbconn
 
     def __del__(self):
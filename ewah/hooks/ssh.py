@@ -1,7 +1,8 @@
 from ewah.hooks.base import EWAHBaseHook
+from ewah.utils.connection_pool import EWAHConnectionPool, get_connection_config_hash
 
 from tempfile import NamedTemporaryFile
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Callable
 
 import sshtunnel
 import os
@@ -11,6 +12,10 @@ import os
 # hits before the connection is established.
 sshtunnel.TUNNEL_TIMEOUT = 30
 
+# Open SSH tunnels are shared by all hooks of a process that tunnel to the
+# same remote through the same SSH connection.
+tunnel_pool = EWAHConnectionPool(name="SSH tunnel")
+
 
 class EWAHSSHHook(EWAHBaseHook):
     _ATTR_RELABEL = {
@@ -69,70 +74,102 @@ class EWAHSSHHook(EWAHBaseHook):
         """
 
         if not hasattr(self, "_ssh_tunnel_forwarder"):
-            # Tunnel is not started yet - start it now!
+            # Tunnel is not started yet - get one from the pool or start it now!
+            self._tunnel_pool_key = (
+                self.conn.conn_id,
+                get_connection_config_hash(self.conn),
+                remote_host,
+                remote_port,
+            )
+            self._ssh_tunnel_forwarder = tunnel_pool.acquire(
+                key=self._tunnel_pool_key,
+                create=lambda: self._open_tunnel(
+                    remote_host, remote_port, tunnel_timeout
+                ),
+                shared=True,
+                validate=lambda forwarder: forwarder.is_active,
+            )
 
-            # Set a specific tunnel timeout if applicable
-            if tunnel_timeout:
-                old_timeout = sshtunnel.TUNNEL_TIMEOUT
-                sshtunnel.TUNNEL_TIMEOUT = tunnel_timeout
-
-            try:
-                # Build kwargs dict for SSH Tunnel Forwarder
-                if self.conn.ssh_proxy_server:
-                    # Use the proxy SSH server as target
-                    self._ssh_hook = EWAHBaseHook.get_hook_from_conn_id(
-                        conn_id=self.conn.ssh_proxy_server,
-                    )
-                    kwargs = {
-                        "ssh_address_or_host": self._ssh_hook.start_tunnel(
-                            self.conn.host, self.conn.port or 22
-                        ),
-                        "remote_bind_address": (remote_host, remote_port),
-                    }
-                else:
-                    kwargs = {
-                        "ssh_address_or_host": (self.conn.host, self.conn.port or 22),
-                        "remote_bind_address": (remote_host, remote_port),
-                    }
-
-                if self.conn.username:
-                    kwargs["ssh_username"] = self.conn.username
-                if self.conn.password:
-                    kwargs["ssh_password"] = self.conn.password
-
-                # Save private key in a temporary file, if applicable
-                with NamedTemporaryFile() as keyfile:
-                    if self.conn.private_key:
-                        keyfile.write(self.conn.private_key.encode())
-                        keyfile.flush()
-                        kwargs["ssh_pkey"] = os.path.abspath(keyfile.name)
-                    self.log.info(
-                        "Opening SSH Tunnel to {0}:{1}...".format(
-                            *kwargs["ssh_address_or_host"]
-                        )
+        return ("localhost", self._ssh_tunnel_forwarder.local_bind_port)
+
+    def _open_tunnel(
+        self, remote_host: str, remote_port: int, tunnel_timeout: Optional[int] = 30
+    ) -> Tuple[sshtunnel.SSHTunnelForwarder, Callable[[], None]]:
+        """Open a new SSH tunnel. Returns the tunnel forwarder and a callable to
+        close the tunnel again, as required by the tunnel pool."""
+
+        # Set a specific tunnel timeout if applicable
+        if tunnel_timeout:
+            old_timeout = sshtunnel.TUNNEL_TIMEOUT
+            sshtunnel.TUNNEL_TIMEOUT = tunnel_timeout
+
+        proxy_hook = None
+        try:
+            # Build kwargs dict for SSH Tunnel Forwarder
+            if self.conn.ssh_proxy_server:
+                # Use the proxy SSH server as target
+                proxy_hook = EWAHBaseHook.get_hook_from_conn_id(
+                    conn_id=self.conn.ssh_proxy_server,
+                )
+                kwargs = {
+                    "ssh_address_or_host": proxy_hook.start_tunnel(
+                        self.conn.host, self.conn.port or 22
+                    ),
+                    "remote_bind_address": (remote_host, remote_port),
+                }
+            else:
+                kwargs = {
+                    "ssh_address_or_host": (self.conn.host, self.conn.port or 22),
+                    "remote_bind_address": (remote_host, remote_port),
+                }
+
+            if self.conn.username:
+                kwargs["ssh_username"] = self.conn.username
+            if self.conn.password:
+                kwargs["ssh_password"] = self.conn.password
+
+            # Save private key in a temporary file, if applicable
+            with NamedTemporaryFile() as keyfile:
+                if self.conn.private_key:
+                    keyfile.write(self.conn.private_key.encode())
+                    keyfile.flush()
+                    kwargs["ssh_pkey"] = os.path.abspath(keyfile.name)
+                self.log.info(
+                    "Opening SSH Tunnel to {0}:{1}...".format(
+                        *kwargs["ssh_address_or_host"]
                     )
-                    self._ssh_tunnel_forwarder = sshtunnel.SSHTunnelForwarder(**kwargs)
-                    self._ssh_tunnel_forwarder.start()
-            except:
-                # Set package constant back to original setting, if applicable
-                if tunnel_timeout:
-                    sshtunnel.TUNNEL_TIMEOUT = old_timeout
-                raise
+                )
+                forwarder = sshtunnel.SSHTunnelForwarder(**kwargs)
+                # Pooled tunnels may outlive the hook - don't block process exit
+                forwarder.daemon_forward_servers = True
+                forwarder.daemon_transport = True
+                forwarder.start()
+        except:
+            # Set package constant back to original setting, if applicable
+            if tunnel_timeout:
+                sshtunnel.TUNNEL_TIMEOUT = old_timeout
+            if proxy_hook:
+                proxy_hook.stop_tunnel()
+            raise
 
-        return ("localhost", self._ssh_tunnel_forwarder.local_bind_port)
+        def close_tunnel():
+            self.log.info(
+                "Closing SSH tunnel to {0}!".format(str(forwarder._remote_binds))
+            )
+            forwarder.stop()
+            if proxy_hook:
+                proxy_hook.stop_tunnel()
+
+        return forwarder, close_tunnel
 
     def stop_tunnel(self) -> None:
-        """Close an open SSH tunnel, if it is indeed open."""
+        """Release an open SSH tunnel, if it is indeed open.
+
+        The tunnel is closed by the tunnel pool once it is no longer used.
+        """
         if hasattr(self, "_ssh_tunnel_forwarder"):
-            self.log.info(
-                "Closing SSH tunnel to {0}!".format(
-                    str(self._ssh_tunnel_forwarder._remote_binds)
-                )
-            )
-            self._ssh_tunnel_forwarder.stop()
+            tunnel_pool.release(self._tunnel_pool_key, self._ssh_tunnel_forwarder)
             del self._ssh_tunnel_forwarder
-            if hasattr(self, "_ssh_hook"):
-                self._ssh_hook.stop_tunnel()
 
     def __del__(self) -> None:
         self.stop_tunnel()
@@ -30,10 +30,14 @@ class EWAHAircallOperator(EWAHBaseOperator):
             assert EWAHAircallHook._RESOURCES[resource].get("incremental"), _msg
 
     def ewah_execute(self, context):
+        # Pause via the rate limit of the hook's HTTP client, unless the connection
+        # sets http_requests_per_second
+        self.source_hook._HTTP_REQUESTS_PER_SECOND = (
+            1 / self.wait_between_pages if self.wait_between_pages else None
+        )
         for batch in self.source_hook.get_data_in_batches(
             resource=self.resource,
             data_from=self.data_from,
             data_until=self.data_until,
-            batch_call_pause_seconds=self.wait_between_pages,
         ):
             self.upload_data(batch)
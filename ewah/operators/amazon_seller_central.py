@@ -27,9 +27,13 @@ class EWAHAmazonSellerCentralReportsAPIOperator(EWAHBaseOperator):
         report_name,
         report_options=None,
         ewah_options=None,
+        max_concurrent_reports=15,  # reports that are created and polled together
         *args,
         **kwargs,
     ):
+        _msg = "max_concurrent_reports must be a positive integer!"
+        assert isinstance(max_concurrent_reports, int), _msg
+        assert max_concurrent_reports > 0, _msg
         assert EWAHAmazonSellerCentralHook.validate_marketplace_region(
             marketplace_region, allow_lists=True
         ), f"Marketplace Region {marketplace_region} is invalid!"
@@ -50,6 +54,7 @@ class EWAHAmazonSellerCentralReportsAPIOperator(EWAHBaseOperator):
         self.report_name = report_name
         self.report_options = report_options
         self.ewah_options = ewah_options
+        self.max_concurrent_reports = max_concurrent_reports
 
     def ewah_execute(self, context):
         if (
@@ -71,5 +76,6 @@ class EWAHAmazonSellerCentralReportsAPIOperator(EWAHBaseOperator):
             data_until=data_until,
             report_options=self.report_options,
             ewah_options=self.ewah_options,
+            max_concurrent_reports=self.max_concurrent_reports,
         ):
             self.upload_data(batch)
@@ -62,6 +62,7 @@ class EWAHBaseOperator(BaseOperator):
         EC.ES_FULL_REFRESH: False,
         EC.ES_INCREMENTAL: False,
         EC.ES_SUBSEQUENT: False,
+        EC.ES_CDC: False,
     }
 
     _CONN_TYPE = None  # overwrite me with the required connection type, if applicable
@@ -194,6 +195,11 @@ class EWAHBaseOperator(BaseOperator):
             assert load_strategy in (EC.LS_UPSERT, EC.LS_INSERT_ADD)
             # replace makes no sense - it's incremental loading after all!
             # insert_delete makes sense but is not yet implemented
+        elif extract_strategy == EC.ES_CDC:
+            assert load_strategy == EC.LS_UPSERT
+            # changes are applied as upserts and deletes by primary key - deleting
+            # rows is only implemented for PostgreSQL and Snowflake so far
+            assert dwh_engine in (EC.DWH_ENGINE_POSTGRES, EC.DWH_ENGINE_SNOWFLAKE)
         else:
             raise Exception("Invalid extract_strategy {0}!".format(extract_strategy))
 
@@ -326,6 +332,23 @@ class EWAHBaseOperator(BaseOperator):
     def ewah_execute(self, context):
         raise Exception("You need to overwrite me!")
 
+    def is_resuming_upload(self, context):
+        """Overwrite me if the operator can commit partial data during execution.
+
+        Return True if a previous try of the same DAG run committed data to the
+        target table that shall be kept, in which case the table is not copied
+        (or, for insert_replace, dropped) again before ewah_execute is called.
+        """
+        return False
+
+    def ewah_after_commit(self, context):
+        """Called after the data was successfully committed to the DWH.
+
+        Overwrite me e.g. to acknowledge a position in a source system only once
+        the data is safely stored in the DWH.
+        """
+        pass
+
     def execute(self, context):
         """Why this method is defined here:
         When executing a task, airflow calls this method. Generally, this
@@ -418,7 +441,12 @@ class EWAHBaseOperator(BaseOperator):
             # This is so data is loaded into a new table and if data loading
             # fails, the original data is not corrupted. At a new try or re-run,
             # the original table is just copied anew.
-            if not self.load_strategy == EC.LS_INSERT_REPLACE:
+            if self.is_resuming_upload(context):
+                # A previous try of this DAG run already committed a part of the
+                # data - keep building upon it instead of starting over.
+                self.log.info("Resuming the upload of a previous try!")
+                self.uploader.resume_upload()
+            elif not self.load_strategy == EC.LS_INSERT_REPLACE:
                 # insert_replace always drops and replaces the tables completely
                 self.uploader.copy_table()
 
@@ -440,7 +468,11 @@ class EWAHBaseOperator(BaseOperator):
                 _ned += self.load_data_until_relative or _tdz
                 data_until = max(_ned, data_until or _ned)
 
-            elif self.extract_strategy in (EC.ES_FULL_REFRESH, EC.ES_SUBSEQUENT):
+            elif self.extract_strategy in (
+                EC.ES_FULL_REFRESH,
+                EC.ES_SUBSEQUENT,
+                EC.ES_CDC,
+            ):
                 # Values may still be set as static values
                 data_from = ada(self.reload_data_from) or data_from
 
@@ -536,7 +568,10 @@ class EWAHBaseOperator(BaseOperator):
             # error occurs.
             self.log.info("Now committing changes!")
             self.uploader.commit()
+            self.ewah_after_commit(context)
         finally:
+            if isinstance(getattr(self, "source_hook", None), EWAHBaseHook):
+                self.source_hook.log_http_metrics()
             self.uploader.close()
             del self.uploader
 
@@ -563,9 +598,12 @@ class EWAHBaseOperator(BaseOperator):
         # Deprecated - better to call uploader directly if able
         return self.uploader.get_max_value_of_column(column_name=column_name)
 
-    def upload_data(self, data=None):
+    def upload_data(self, data=None, columns=None):
         """Upload data, no matter the source. Call this functions in the child
         operator whenever data is available for upload, as often as needed.
+
+        If columns is given, data is a list of sequences of values in the order
+        of the column names in columns instead of a list of dictionaries.
         """
         if not data:
             self.log.info("No data to upload!")
@@ -595,4 +633,33 @@ class EWAHBaseOperator(BaseOperator):
         else:
             metadata = None
 
-        return self.uploader.upload_data(data, metadata)
+        return self.uploader.upload_data(data, metadata, columns=columns)
+
+    def upload_changes(self, changes):
+        """Apply a batch of captured changes to the target table.
+
+        Changes are tuples of (action, row, old row), where action is one of
+        insert, update and delete and the old row of an update is optional.
+        They are collapsed to the latest state of each primary key, then upserted
+        or deleted.
+        """
+        latest = {}
+        for action, row, old_row in changes:
+            key = tuple(row[pk] for pk in self.primary_key)
+            if old_row:
+                old_key = tuple(old_row.get(pk) for pk in self.primary_key)
+                if not old_key == key:
+                    # the primary key of the row changed
+                    latest[old_key] = ("delete", old_row)
+            latest[key] = (action, row)
+        upserts = [row for action, row in latest.values() if action != "delete"]
+        deletes = [row for action, row in latest.values() if action == "delete"]
+        self.log.info(
+            "Applying {0} upserts and {1} deletes...".format(len(upserts), len(deletes))
+        )
+        if upserts:
+            self.upload_data(upserts)
+        if deletes:
+            # deletes must not be overwritten by previously pickled upserts
+            self.uploader.finalize_upload()
+            self.uploader.delete_rows(deletes)
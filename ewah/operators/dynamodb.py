@@ -22,6 +22,8 @@ class EWAHDynamoDBOperator(EWAHBaseOperator):
         pagination_limit=None,  # optionally set a pagination limit
         region_name=None,  # must provide region, alternatively via connection
         filter_expression=None,
+        total_segments=1,  # number of segments to scan concurrently
+        max_read_capacity_units=None,  # optional cap of consumed RCUs per second
         *args,
         **kwargs
     ):
@@ -34,6 +36,10 @@ class EWAHDynamoDBOperator(EWAHBaseOperator):
         self.pagination_limit = pagination_limit
         self.region_name = region_name
         self.filter_expression = filter_expression
+        _msg = "total_segments must be a positive integer!"
+        assert isinstance(total_segments, int) and total_segments > 0, _msg
+        self.total_segments = total_segments
+        self.max_read_capacity_units = max_read_capacity_units
 
     def ewah_execute(self, context):
         for batch in self.source_hook.get_dynamodb_data_in_batches(
@@ -41,5 +47,7 @@ class EWAHDynamoDBOperator(EWAHBaseOperator):
             region=self.region_name,
             pagination_limit=self.pagination_limit,
             filter_expression=self.filter_expression,
+            total_segments=self.total_segments,
+            max_read_capacity_units=self.max_read_capacity_units,
         ):
             self.upload_data(batch)
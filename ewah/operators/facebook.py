@@ -35,9 +35,16 @@ class EWAHFBOperator(EWAHBaseOperator):
         refresh_interval=timedelta(days=7),
         maximum_fetch_interval=None,
         breakdowns=None,
+        max_concurrent_jobs=10,  # async insights jobs running at the same time
+        max_jobs_per_account=2,  # async insights jobs per account at the same time
         *args,
         **kwargs
     ):
+        _msg = "max_concurrent_jobs and max_jobs_per_account must be positive integers!"
+        assert isinstance(max_concurrent_jobs, int) and max_concurrent_jobs > 0, _msg
+        assert isinstance(max_jobs_per_account, int), _msg
+        assert max_jobs_per_account > 0, _msg
+
         if isinstance(maximum_fetch_interval, int):
             maximum_fetch_interval = timedelta(days=maximum_fetch_interval)
 
@@ -116,6 +123,8 @@ class EWAHFBOperator(EWAHBaseOperator):
         self.breakdowns = breakdowns
         self.refresh_interval = refresh_interval
         self.maximum_fetch_interval = maximum_fetch_interval
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_jobs_per_account = max_jobs_per_account
 
     def ewah_execute(self, context):
         if (
@@ -143,19 +152,22 @@ class EWAHFBOperator(EWAHBaseOperator):
         if isinstance(data_until, datetime):
             data_until = data_until.date()
 
+        windows = []
         while data_since <= data_until:
             # Iterate in smaller time steps
             batch_until = min(
                 data_until, data_since + self.maximum_fetch_interval - timedelta(days=1)
             )
-            for account_id in self.account_ids or []:
-                for batch in self.source_hook.get_data_in_batches(
-                    level=self.level,
-                    fields=self.insight_fields,
-                    data_from=data_since,
-                    data_until=batch_until,
-                    account_id=account_id,
-                    breakdowns=self.breakdowns,
-                ):
-                    self.upload_data(batch)
+            windows.append((data_since, batch_until))
             data_since = batch_until + timedelta(days=1)
+
+        for batch in self.source_hook.get_data_of_accounts_in_batches(
+            level=self.level,
+            fields=self.insight_fields,
+            windows=windows,
+            account_ids=self.account_ids,
+            breakdowns=self.breakdowns,
+            max_concurrent_jobs=self.max_concurrent_jobs,
+            max_jobs_per_account=self.max_jobs_per_account,
+        ):
+            self.upload_data(batch)
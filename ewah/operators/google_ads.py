@@ -106,14 +106,13 @@ class EWAHGoogleAdsOperator(EWAHBaseOperator):
                         batch_until.isoformat(),
                     )
                 )
-                self.upload_data(
-                    self.source_hook.get_data(
-                        client_id=self.client_id,
-                        fields=self.fields,
-                        resource=self.resource,
-                        conditions=conditions,
-                    )
-                )
+                for batch in self.source_hook.get_data_in_batches(
+                    client_id=self.client_id,
+                    fields=self.fields,
+                    resource=self.resource,
+                    conditions=conditions,
+                ):
+                    self.upload_data(batch)
                 del conditions[-1:]  # Re-added in next iteration
                 batch_from = batch_until + timedelta(days=1)
         else:
@@ -123,11 +122,10 @@ class EWAHGoogleAdsOperator(EWAHBaseOperator):
                     data_until.isoformat(),
                 )
             )
-            self.upload_data(
-                self.source_hook.get_data(
-                    client_id=self.client_id,
-                    fields=self.fields,
-                    resource=self.resource,
-                    conditions=conditions,
-                )
-            )
+            for batch in self.source_hook.get_data_in_batches(
+                client_id=self.client_id,
+                fields=self.fields,
+                resource=self.resource,
+                conditions=conditions,
+            ):
+                self.upload_data(batch)
@@ -25,9 +25,16 @@ class EWAHGAOperator(EWAHBaseOperator):
         page_size=10000,
         include_empty_rows=True,
         sampling_level=None,
+        shard_days=7,  # days per report request, split further if sampled
+        max_concurrent_requests=4,  # report requests in flight
         *args,
         **kwargs
     ):
+        _msg = "shard_days and max_concurrent_requests must be positive integers!"
+        assert isinstance(shard_days, int) and shard_days > 0, _msg
+        assert isinstance(max_concurrent_requests, int), _msg
+        assert max_concurrent_requests > 0, _msg
+
         if kwargs.get("primary_key"):
             raise Exception(
                 "primary_key supplied, but the field is "
@@ -61,6 +68,8 @@ class EWAHGAOperator(EWAHBaseOperator):
         self.metrics = metrics
         self.page_size = page_size
         self.include_empty_rows = include_empty_rows
+        self.shard_days = shard_days
+        self.max_concurrent_requests = max_concurrent_requests
 
         super().__init__(*args, **kwargs)
 
@@ -112,7 +121,7 @@ class EWAHGAOperator(EWAHBaseOperator):
             sampling_level=self.sampling_level,
             data_from=data_from,  # tbd: subsequent!
             data_until=(self.data_until or datetime.now()).date(),
-            chunking_interval=self.load_data_chunking_timedelta
-            or timedelta(days=7 * 13),
+            shard_days=self.shard_days,
+            max_concurrent_requests=self.max_concurrent_requests,
         ):
             self.upload_data(batch)
@@ -14,10 +14,29 @@ class EWAHGoogleCloudStorageOperator(EWAHBaseOperator):
 
     _CONN_TYPE = EWAHGoogleCloudStorageHook.conn_type
 
-    def __init__(self, bucket_name, prefix=None, data_after=None, *args, **kwargs):
+    def __init__(
+        self,
+        bucket_name,
+        prefix=None,
+        data_after=None,
+        file_format="AVRO",  # AVRO or PARQUET
+        timestamp_field=None,  # optionally filter rows by data_from / until
+        batch_size=10000,
+        max_concurrent_downloads=8,  # number of blobs to download concurrently
+        prefetch_max_bytes=100 * 1024 * 1024,  # memory budget of downloaded blobs
+        *args,
+        **kwargs
+    ):
+        _msg = "file_format must be AVRO or PARQUET!"
+        assert file_format in ("AVRO", "PARQUET"), _msg
         self.bucket_name = bucket_name
         self.data_after = data_after
         self.prefix = prefix
+        self.file_format = file_format
+        self.timestamp_field = timestamp_field
+        self.batch_size = batch_size
+        self.max_concurrent_downloads = max_concurrent_downloads
+        self.prefetch_max_bytes = prefetch_max_bytes
         kwargs["subsequent_field"] = "blob_modified_at"
         kwargs["primary_key"] = "id"
         super().__init__(*args, **kwargs)
@@ -31,7 +50,18 @@ class EWAHGoogleCloudStorageOperator(EWAHBaseOperator):
         else:
             data_from = self.data_after or self.data_from
 
-        for batch in self.source_hook.get_data_in_batches(
-            self.bucket_name, data_after=data_from, prefix=self.prefix
+        for columns, rows in self.source_hook.get_columnar_data_in_batches(
+            self.bucket_name,
+            data_after=data_from,
+            prefix=self.prefix,
+            batch_size=self.batch_size,
+            file_format=self.file_format,
+            columns=self.include_columns,
+            timestamp_field=self.timestamp_field,
+            # the blobs' watermark must not filter the rows
+            rows_from=self.data_from,
+            rows_until=self.data_until,
+            max_concurrent_downloads=self.max_concurrent_downloads,
+            prefetch_max_bytes=self.prefetch_max_bytes,
         ):
-            self.upload_data(batch)
+            self.upload_data(rows, columns=columns)
@@ -3,13 +3,16 @@ from ewah.constants import EWAHConstants as EC
 
 from ewah.hooks.hubspot import EWAHHubspotHook
 
+from dateutil.parser import isoparse
+
 
 class EWAHHubspotOperator(EWAHBaseOperator):
     _NAMES = ["hubspot"]
 
     _ACCEPTED_EXTRACT_STRATEGIES = {
         EC.ES_FULL_REFRESH: True,
-        EC.ES_INCREMENTAL: False,
+        EC.ES_INCREMENTAL: True,
+        EC.ES_SUBSEQUENT: True,
     }
 
     _CONN_TYPE = EWAHHubspotHook.conn_type
@@ -21,6 +24,8 @@ class EWAHHubspotOperator(EWAHBaseOperator):
         properties=None,
         exclude_properties=None,
         associations=None,
+        max_properties_per_call=100,  # properties per request, sharded beyond
+        concurrency=4,  # concurrent requests for property shards and associations
         **kwargs
     ):
         if object is None:
@@ -32,6 +37,13 @@ class EWAHHubspotOperator(EWAHBaseOperator):
             kwargs["primary_key"] = ["name", "object_type"]
         else:
             kwargs["primary_key"] = "id"
+        if kwargs.get("extract_strategy") in (EC.ES_INCREMENTAL, EC.ES_SUBSEQUENT):
+            _msg = "Can only load CRM objects incrementally or subsequently!"
+            assert not object in ("properties", "pipelines", "owners"), _msg
+            if kwargs["extract_strategy"] == EC.ES_SUBSEQUENT:
+                kwargs["subsequent_field"] = EWAHHubspotHook.get_last_modified_property(
+                    object
+                )
         super().__init__(*args, **kwargs)
         self.object = object
         if isinstance(properties, str):
@@ -44,15 +56,38 @@ class EWAHHubspotOperator(EWAHBaseOperator):
         assert isinstance(properties, (list, nonetype))
         assert isinstance(exclude_properties, (list, nonetype))
         assert isinstance(associations, (list, nonetype)) or associations == "all"
+        _msg = "max_properties_per_call and concurrency must be positive integers!"
+        assert isinstance(max_properties_per_call, int), _msg
+        assert isinstance(concurrency, int), _msg
+        assert max_properties_per_call > 0 and concurrency > 0, _msg
         self.properties = properties
         self.exclude_properties = exclude_properties
         self.associations = associations
+        self.max_properties_per_call = max_properties_per_call
+        self.concurrency = concurrency
 
     def ewah_execute(self, context):
+        data_from = data_until = None
+        if self.extract_strategy == EC.ES_INCREMENTAL:
+            data_from = self.data_from
+            data_until = self.data_until
+        elif (
+            self.extract_strategy == EC.ES_SUBSEQUENT
+            and self.test_if_target_table_exists()
+        ):
+            data_from = self.get_max_value_of_column(self.subsequent_field)
+            if isinstance(data_from, str):
+                # Hubspot returns timestamps as ISO strings
+                data_from = isoparse(data_from)
+
         for batch in self.source_hook.get_data_in_batches(
             object=self.object,
             properties=self.properties,
             exclude_properties=self.exclude_properties,
             associations=self.associations,
+            data_from=data_from,
+            data_until=data_until,
+            max_properties_per_call=self.max_properties_per_call,
+            concurrency=self.concurrency,
         ):
             self.upload_data(batch)
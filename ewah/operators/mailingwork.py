@@ -2,8 +2,8 @@ from ewah.operators.base import EWAHBaseOperator
 from ewah.constants import EWAHConstants as EC
 
 from ewah.hooks.base import EWAHBaseHook as BaseHook
+from ewah.utils.http_utils import EWAHHTTPClient
 
-import requests
 import json
 import copy
 
@@ -53,9 +53,15 @@ class EWAHMailingworkOperator(EWAHBaseOperator):
         self.page_size = page_size
 
     def ewah_execute(self, context):
+        conn = self.source_conn
+        http_client = EWAHHTTPClient(
+            requests_per_second=conn.extra_dejson.get("http_requests_per_second"),
+            rate_limit_key=conn.conn_id,
+        )
+
         def get_mailingwork_data(url, data):
             # send request, assert success, and return the resulting data
-            req = requests.post(url, data=data)
+            req = http_client.post(url, data=data)
             _m = "Error {0} - Response Text: {1}"
             assert req.status_code == 200, _m.format(req.status_code, req.text)
             result = json.loads(req.text)
@@ -123,3 +129,5 @@ class EWAHMailingworkOperator(EWAHBaseOperator):
                 self.upload_data(call_api(url=url, data=post_data))
         else:
             self.upload_data(call_api(url=url, data=post_data))
+        http_client.log_metrics()
+        http_client.close()
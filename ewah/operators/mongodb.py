@@ -1,5 +1,6 @@
 from ewah.constants import EWAHConstants as EC
 from ewah.operators.base import EWAHBaseOperator
+from ewah.utils.airflow_utils import get_state_variable, set_state_variable
 
 
 class EWAHMongoDBOperator(EWAHBaseOperator):
@@ -9,6 +10,7 @@ class EWAHMongoDBOperator(EWAHBaseOperator):
         EC.ES_FULL_REFRESH: True,
         EC.ES_INCREMENTAL: True,
         EC.ES_SUBSEQUENT: True,
+        EC.ES_CDC: True,
     }
 
     def __init__(
@@ -18,6 +20,8 @@ class EWAHMongoDBOperator(EWAHBaseOperator):
         timestamp_field=None,  # required for use with data_from and data_until
         single_column_mode=False,  # If True, throw all data as json into one col
         batch_size=100000,
+        cursor_batch_size=None,  # documents per round trip, default: pymongo's
+        parallel_cursors=1,  # read ranges of _id values with concurrent cursors
         *args,
         **kwargs
     ):
@@ -56,8 +60,27 @@ class EWAHMongoDBOperator(EWAHBaseOperator):
                 err_msg = "If using reload_data_from, load_data_from, or load_"
                 err_msg += "data_until, you must also specify timestamp_field!"
                 raise Exception(err_msg)
+        if self.extract_strategy == EC.ES_CDC:
+            # Delete events only contain the document key
+            _msg = "extract_strategy cdc requires primary_key to be _id!"
+            assert self.primary_key == ["_id"], _msg
+
+        _msg = "parallel_cursors must be a positive integer!"
+        assert isinstance(parallel_cursors, int) and parallel_cursors > 0, _msg
+
         self.timestamp_field = timestamp_field
         self.batch_size = batch_size
+        self.cursor_batch_size = cursor_batch_size
+        self.parallel_cursors = parallel_cursors
+
+    @property
+    def change_stream_state_variable(self):
+        return "__ewah_change_stream_state__{0}__{1}".format(self.dag_id, self.task_id)
+
+    def ewah_after_commit(self, context):
+        if getattr(self, "_cdc_state", None):
+            # Only save the resume token once the changes are committed in the DWH
+            set_state_variable(self.change_stream_state_variable, self._cdc_state)
 
     def upload_data(self, data):
         if self.single_column_mode:
@@ -69,6 +92,27 @@ class EWAHMongoDBOperator(EWAHBaseOperator):
             super().upload_data(data)
 
     def ewah_execute(self, context):
+        if self.extract_strategy == EC.ES_CDC:
+            self._cdc_state = get_state_variable(self.change_stream_state_variable)
+            if self._cdc_state and self.test_if_target_table_exists():
+                for changes in self.source_hook.get_changes_in_batches(
+                    collection=self.source_collection_name,
+                    state=self._cdc_state,
+                    database=self.source_database_name,
+                    batch_size=self.batch_size,
+                ):
+                    self.upload_changes(changes)
+                return
+            # Get a resume token before the initial load, thus no change is
+            # missed in between - changes already included are re-applied
+            self._cdc_state = {
+                "resume_token": self.source_hook.get_change_stream_resume_token(
+                    collection=self.source_collection_name,
+                    database=self.source_database_name,
+                )
+            }
+            self.log.info("No change stream resume token yet - running a full load.")
+
         base_filters = []
         # data_from and data_until filter expression
         if self.timestamp_field:
@@ -89,10 +133,21 @@ class EWAHMongoDBOperator(EWAHBaseOperator):
         else:
             filter_expressions = None
 
+        # Only fetch the fields that are loaded
+        if self.include_columns:
+            projection = {column: 1 for column in self.include_columns}
+        elif self.exclude_columns:
+            projection = {column: 0 for column in self.exclude_columns}
+        else:
+            projection = None
+
         for batch in self.source_hook.get_data_in_batches(
             collection=self.source_collection_name,
             database=self.source_database_name,
             filter_expression=filter_expressions,
             batch_size=self.batch_size,
+            projection=projection,
+            cursor_batch_size=self.cursor_batch_size,
+            parallel_cursors=self.parallel_cursors,
         ):
             self.upload_data(batch)
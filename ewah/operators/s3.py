@@ -1,19 +1,44 @@
 from ewah.operators.base import EWAHBaseOperator
 from ewah.constants import EWAHConstants as EC
+from ewah.utils.file_format_utils import iterate_avro_batches, iterate_parquet_batches
+from ewah.utils.python_utils import prefetch_in_order
 
 from airflow.providers.amazon.aws.hooks.s3 import S3Hook
 
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
-from io import StringIO
-from multiprocessing.dummy import Pool as ThreadPool
+from tempfile import TemporaryFile
 
+import io
 import json
 import csv
 import gzip
+import pytz
+import shutil
 import time
 
 
+class _ReadableStream(io.RawIOBase):
+    """Wraps any object with a read method, e.g. a botocore StreamingBody, to
+    allow for buffered reading with io.BufferedReader."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self):
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+        super().close()
+
+
 class ExtendedS3Hook(S3Hook):
     """Extends and improves the provider package's S3Hook's capability"""
 
@@ -50,9 +75,13 @@ class ExtendedS3Hook(S3Hook):
             return obj.get()["Body"].read()
         return obj.get()["Body"].read().decode("utf-8")
 
+    def get_key_body(self, key, bucket_name=None):
+        """Return the body of an object as stream, without downloading it yet."""
+        return self.get_key(key, bucket_name).get()["Body"]
+
 
 class EWAHS3Operator(EWAHBaseOperator):
-    """Only implemented for JSON and CSV files from S3 right now!"""
+    """Only implemented for JSON, CSV, Parquet and Avro files from S3 right now!"""
 
     _NAMES = ["s3"]
 
@@ -67,6 +96,8 @@ class EWAHS3Operator(EWAHBaseOperator):
         "JSONL",  # Multiple JSON objects split by newlines in the same file
         "AWS_FIREHOSE_JSON",
         "CSV",
+        "PARQUET",
+        "AVRO",  # Avro object container files
     ]
 
     _BOM = b"\xef\xbb\xbf"
@@ -81,8 +112,12 @@ class EWAHS3Operator(EWAHBaseOperator):
         csv_format_options={},
         csv_encoding="utf-8",
         decompress=False,
-        file_load_parallelism=1000,
-        thread_pool_size=20,
+        file_load_parallelism=1000,  # max. number of objects to prefetch
+        thread_pool_size=20,  # number of concurrent downloads
+        prefetch_max_bytes=100 * 1024 * 1024,  # max. bytes of prefetched objects
+        date_partitioned_prefix=None,  # strftime format after prefix, e.g. %Y/%m/%d/
+        date_partition_lag=timedelta(hours=1),  # max. delay of objects' partitions
+        timestamp_field=None,  # PARQUET and AVRO: filter rows by data_from/until
         *args,
         **kwargs
     ):
@@ -104,6 +139,19 @@ class EWAHS3Operator(EWAHBaseOperator):
         if not file_format == "CSV" and csv_format_options:
             raise Exception("csv_format_options is only valid for CSV files!")
 
+        if file_format in ("PARQUET", "AVRO"):
+            # These formats are compressed internally
+            _msg = "decompress is not valid for PARQUET and AVRO files!"
+            assert not decompress, _msg
+        else:
+            _msg = "timestamp_field is only valid for PARQUET and AVRO files!"
+            assert not timestamp_field, _msg
+
+        if date_partitioned_prefix:
+            _msg = "date_partitioned_prefix must contain at least %Y and %m!"
+            assert "%Y" in date_partitioned_prefix, _msg
+            assert "%m" in date_partitioned_prefix, _msg
+
         self.bucket_name = bucket_name
         self.prefix = prefix
         self.suffix = suffix
@@ -114,6 +162,31 @@ class EWAHS3Operator(EWAHBaseOperator):
         self.decompress = decompress
         self.file_load_parallelism = file_load_parallelism
         self.thread_pool_size = thread_pool_size
+        self.prefetch_max_bytes = prefetch_max_bytes
+        self.date_partitioned_prefix = date_partitioned_prefix
+        self.date_partition_lag = date_partition_lag
+        self.timestamp_field = timestamp_field
+
+    def _get_listing_prefixes(self, prefix, modified_from=None, modified_until=None):
+        """Return the prefixes to list, i.e. only the date partitions that may
+        contain objects modified in the given timeframe, if applicable."""
+        if not (self.date_partitioned_prefix and modified_from):
+            return [prefix]
+        if "%H" in self.date_partitioned_prefix:
+            step = timedelta(hours=1)
+        else:
+            step = timedelta(days=1)  # monthly partitions are de-duplicated
+        # Partitions are based on the time of the object's creation (in UTC),
+        # which may be some time before its LastModified timestamp
+        current = (modified_from - self.date_partition_lag).astimezone(pytz.utc)
+        until = (modified_until or datetime.now(tz=pytz.utc)).astimezone(pytz.utc)
+        prefixes = []
+        while current <= until + step:
+            partition_prefix = prefix + current.strftime(self.date_partitioned_prefix)
+            if not partition_prefix in prefixes:
+                prefixes.append(partition_prefix)
+            current += step
+        return prefixes
 
     def _iterate_through_bucket(
         self,
@@ -123,224 +196,214 @@ class EWAHS3Operator(EWAHBaseOperator):
         modified_from=None,
         modified_until=None,
         suffix=None,
-        file_load_parallelism=1000,
-        thread_pool_size=20,
     ):
-        """The bucket.objects.filter() method only returns a max of 1000
-        objects. If more objects are in an S3 bucket, pagniation is
-        required. See also: https://stackoverflow.com/questions/44238525/how-to-iterate-over-files-in-an-s3-bucket
-        """
+        """List and yield objects page by page, with their bodies, see
+        _prefetch_objects."""
+
+        def is_relevant(o):
+            return (
+                (not modified_from or o["LastModified"] > modified_from)
+                and (not modified_until or o["LastModified"] <= modified_until)
+                and (not suffix or suffix == o["Key"][-len(suffix) :])
+            )
 
-        def read_key(key_name):
-            return s3hook.read_key(key_name, bucket, self.decompress)
+        def list_objects():
+            cli = s3hook.get_client_type("s3")
+            paginator = cli.get_paginator("list_objects_v2")
+            for listing_prefix in self._get_listing_prefixes(
+                prefix, modified_from, modified_until
+            ):
+                self.log.info("Listing objects with prefix {0}".format(listing_prefix))
+                # Partitions are listed in full, objects may arrive in any order
+                for page in paginator.paginate(Bucket=bucket, Prefix=listing_prefix):
+                    yield from filter(is_relevant, page.get("Contents", []))
 
-        cli = s3hook.get_client_type("s3")
-        paginator = cli.get_paginator("list_objects_v2")
-        page_iterator = paginator.paginate(Bucket=bucket, Prefix=prefix)
+        yield from self._prefetch_objects(s3hook, bucket, list_objects())
 
-        all_objects = [
-            o
-            for o in page_iterator.build_full_result()["Contents"]
-            if (not modified_from or o["LastModified"] > modified_from)
-            and (not modified_until or o["LastModified"] <= modified_until)
-            and (not suffix or suffix == o["Key"][-len(suffix) :])
-        ]
+    def _prefetch_objects(self, s3hook, bucket, objects):
+        """Yield the objects in order, each with its body as binary file-like
+        object in "_body", while the next objects are downloaded concurrently.
 
-        self._temp_object_data = {}
+        Prefetched objects are kept in memory, thus the prefetching stops when
+        prefetch_max_bytes or file_load_parallelism objects are reached. Objects
+        larger than prefetch_max_bytes are not prefetched, but streamed instead.
+        """
 
-        list_of_keys = [o["Key"] for o in all_objects]
-        self.log.info("Iterating through {0} objects..".format(len(all_objects)))
+        def download(item):
+            try:
+                return io.BytesIO(s3hook.get_key_body(item["Key"], bucket).read())
+            except ClientError:
+                # This error can occur when the aws token expires - try refreshing
+                # the connection and see if the error persists
+                s3hook.force_refresh = True
+                return io.BytesIO(s3hook.get_key_body(item["Key"], bucket).read())
+
+        for item, body in prefetch_in_order(
+            items=objects,
+            fetch=download,
+            get_size=lambda item: item["Size"],
+            max_workers=self.thread_pool_size,
+            max_bytes=self.prefetch_max_bytes,
+            max_items=self.file_load_parallelism,
+            fetch_large=lambda item: s3hook.get_key_body(item["Key"], bucket),
+        ):
+            item["_body"] = body
+            try:
+                yield item
+            finally:
+                item.pop("_body").close()
 
-        for item in all_objects:
-            if not item["Key"] in self._temp_object_data:
-                # use multithreading to efficiently load s3 files
-                self.log.info(
-                    "Getting next {0} files...".format(str(file_load_parallelism))
-                )
-                _next_keys = list_of_keys[:file_load_parallelism]
-                del list_of_keys[:file_load_parallelism]
-                pool = ThreadPool(thread_pool_size)
-                try:
-                    results = pool.map(read_key, _next_keys)
-                except ClientError:
-                    # This error can occur when the aws token expires - try refreshing
-                    # the connection and see if the error persists
-                    s3hook.force_refresh = True
-                    results = pool.map(read_key, _next_keys)
-                pool.close()
-                pool.join()
-                self._temp_object_data.update(dict(zip(_next_keys, results)))
-            item["_body"] = self._temp_object_data.pop(item["Key"])
-            yield item
+    def _open_text(self, body, encoding, newline=None):
+        """Return a text stream of a binary body, decompressing it if applicable.
 
-    def ewah_execute(self, context):
-        if (
-            self.extract_strategy == EC.ES_SUBSEQUENT
-            and self.test_if_target_table_exists()
-        ):
-            self.data_from = self.get_max_value_of_column(self.subsequent_field)
-        if self.file_format == "JSON":
-            return self.execute_json(
-                context=context,
-                f_get_data=lambda file_content: json.loads(file_content),
-            )
-        elif self.file_format == "JSONL":
-            f_get_data = lambda file_content: list(
-                # Use StringIO in order to iterate through each line of the file
-                map(json.loads, StringIO(file_content))
-            )
-            if self.decompress:
-                f_get_data = lambda file_content: list(
-                    map(
-                        json.loads,
-                        # We need to decompress the whole file before iterating over its lines
-                        StringIO(gzip.decompress(bytes(file_content)).decode("utf-8")),
-                    )
-                )
-            return self.execute_json(
-                context=context,
-                f_get_data=f_get_data,
-            )
-        elif self.file_format == "AWS_FIREHOSE_JSON":
-            return self.execute_json(
-                context=context,
-                f_get_data=lambda file_content: json.loads(
-                    "["  # hotfix for a weird encoding issue
-                    + file_content.replace("\x00", "")
+        If the data starts with a BOM, it is 99.9% utf-8 encoded - it is removed
+        and utf-8 is used instead of the given encoding.
+        """
+        stream = io.BufferedReader(_ReadableStream(body), buffer_size=1024 * 1024)
+        if self.decompress:
+            stream = io.BufferedReader(gzip.GzipFile(fileobj=stream, mode="rb"))
+        if stream.peek(3)[:3] == self._BOM:
+            encoding = "utf-8-sig"
+        return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+    def _iterate_firehose_json(self, text_stream, chunk_size=1024 * 1024):
+        """Iterate over concatenated JSON objects, e.g. {...}{...}, as written by
+        AWS Kinesis Firehose."""
+        decoder = json.JSONDecoder()
+        buffer = ""
+        end_of_stream = False
+        while True:
+            if not end_of_stream:
+                chunk = text_stream.read(chunk_size)
+                end_of_stream = not chunk
+                # hotfix for a weird encoding issue
+                buffer = (
+                    (buffer + chunk)
+                    .replace("\x00", "")
                     .replace("\u0000", "")
                     .replace("\\u0000", "")
                     .replace("\\x00", "")
-                    .replace("}{", "},{")
-                    + "]"
-                ),
-            )
-        elif self.file_format == "CSV":
-            return self.execute_csv(
-                context=context,
-            )
+                )
+            position = 0
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position == len(buffer):
+                    break
+                try:
+                    datum, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if end_of_stream:
+                        raise
+                    break  # incomplete object - read more data first
+                yield datum
+            buffer = buffer[position:]
+            if end_of_stream and not buffer:
+                break
+
+    def _iterate_rows(self, body):
+        """Parse an object's body incrementally and yield its rows."""
+        if self.file_format == "CSV":
+            # there may be a BOM while still not utf-8 - use utf-8 anyway
+            text_stream = self._open_text(body, self.csv_encoding, newline="")
+            yield from csv.DictReader(text_stream, **self.csv_format_options)
+        elif self.file_format == "JSON":
+            data = json.load(self._open_text(body, "utf-8"))
+            yield from data if isinstance(data, list) else [data]
+        elif self.file_format == "JSONL":
+            for line in self._open_text(body, "utf-8"):
+                if line.strip():
+                    yield json.loads(line)
+        elif self.file_format == "AWS_FIREHOSE_JSON":
+            yield from self._iterate_firehose_json(self._open_text(body, "utf-8"))
         else:
             raise Exception("File format not implemented!")
 
-    def execute_csv(self, context):
-        def chunk_upload(csv_reader):
-            i = 0
-            data = []
-            for row in csv_reader:
-                i += 1
-                data.append(row)
-                if i >= 100000:
-                    self.upload_data(data=data)
-                    data = []
-                    i = 0
-            if data:
+    def _upload_object(self, body, batch_size=100000):
+        if self.file_format in ("PARQUET", "AVRO"):
+            return self._upload_columnar_object(body, batch_size)
+        data = []
+        for datum in self._iterate_rows(body):
+            # Avoid KeyError when using `file_last_modified` as subsequent field
+            if self.subsequent_field and not self.subsequent_field in self._metadata:
+                # TODO: Abstract this logic
+                datum[self.subsequent_field] = datetime.strptime(
+                    datum[self.subsequent_field], "%Y-%m-%dT%H:%M:%S.%f%z"
+                )
+            data.append(datum)
+            if len(data) >= batch_size:
                 self.upload_data(data=data)
+                data = []
+        if data:
+            self.upload_data(data=data)
 
-        hook = ExtendedS3Hook(self.source_conn.conn_id)
-        if self.key_name:
-            obj = hook.get_key(self.key_name, self.bucket_name)
-            raw_data = obj.get()["Body"].read()
-            if self.decompress:
-                raw_data = gzip.decompress(raw_data)
-            if raw_data[:3] == self._BOM:
-                raw_data = raw_data[3:]
-                csv_encoding = "utf-8"
-            else:
-                csv_encoding = self.csv_encoding
-            try:
-                raw_data = raw_data.decode(csv_encoding).splitlines()
-            except UnicodeDecodeError:
-                if csv_encoding == self.csv_encoding:
-                    raise
-                raw_data = raw_data.decode(self.csv_encoding).splitlines()
-            reader = csv.DictReader(raw_data, **self.csv_format_options)
-            chunk_upload(reader)
-
+    def _upload_columnar_object(self, body, batch_size=100000):
+        """Upload Parquet or Avro data as batches of columns and rows. Only the
+        included columns are read and rows are filtered by timestamp_field."""
+        kwargs = {
+            "columns": self.include_columns,
+            "batch_size": batch_size,
+            "timestamp_field": self.timestamp_field,
+            "data_from": self._rows_from,
+            "data_until": self.data_until,
+        }
+        if self.file_format == "AVRO":
+            batches = iterate_avro_batches(body, **kwargs)
+        elif isinstance(body, io.BytesIO):
+            batches = iterate_parquet_batches(body, **kwargs)
         else:
-            for obj_iter in self._iterate_through_bucket(
-                s3hook=hook,
-                bucket=self.bucket_name,
-                prefix=self.prefix,
-                modified_from=self.data_from,
-                modified_until=self.data_until,
-                suffix=self.suffix,
-                file_load_parallelism=self.file_load_parallelism,
-                thread_pool_size=self.thread_pool_size,
-            ):
-                self.log.info("Loading data from file {0}".format(obj_iter["Key"]))
-                raw_data = obj_iter["_body"]
-                if self.decompress:
-                    raw_data = gzip.decompress(raw_data)
-                # remove BOM if it exists
-                # also, if file has a BOM, it is 99.9% utf-8 encoded!
-                if raw_data[:3] == self._BOM:
-                    raw_data = raw_data[3:]
-                    csv_encoding = "utf-8"
-                else:
-                    csv_encoding = self.csv_encoding
-                # there may be a BOM while still not utf-8 -> use the
-                # given csv_encoding argument if so
-                try:
-                    raw_data = raw_data.decode(csv_encoding).splitlines()
-                except UnicodeDecodeError:
-                    if csv_encoding == self.csv_encoding:
-                        raise
-                    raw_data = raw_data.decode(self.csv_encoding).splitlines()
-                reader = csv.DictReader(raw_data, **self.csv_format_options)
-                if self.subsequent_field:
-                    # TODO: Abstract this logic
-                    for datum in reader:
-                        datum[self.subsequent_field] = datetime.strptime(
-                            datum[self.subsequent_field], "%Y-%m-%dT%H:%M:%S.%f%z"
-                        )
-                self._metadata.update(
-                    {
-                        "bucket_name": self.bucket_name,
-                        "file_name": obj_iter["Key"],
-                        "file_last_modified": str(obj_iter["LastModified"]),
-                    }
-                )
-                chunk_upload(reader)
+            # Parquet files are read from the end, thus they must be seekable
+            with TemporaryFile() as temp_file:
+                shutil.copyfileobj(body, temp_file)
+                temp_file.seek(0)
+                for columns, rows in iterate_parquet_batches(temp_file, **kwargs):
+                    self.upload_data(data=rows, columns=columns)
+            return
+        for columns, rows in batches:
+            self.upload_data(data=rows, columns=columns)
 
-    def execute_json(self, context, f_get_data):
-        hook = ExtendedS3Hook(self.source_conn.conn_id)
+    def ewah_execute(self, context):
+        # Rows are filtered by the task's timeframe - data_from may be overwritten
+        # with a watermark of the objects, e.g. file_last_modified, below
+        self._rows_from = self.data_from
+        if (
+            self.extract_strategy == EC.ES_SUBSEQUENT
+            and self.test_if_target_table_exists()
+        ):
+            self.data_from = self.get_max_value_of_column(self.subsequent_field)
+            if self.subsequent_field == self.timestamp_field:
+                self._rows_from = self.data_from
 
+        hook = ExtendedS3Hook(self.source_conn.conn_id)
         if self.key_name:
-            data = f_get_data(
-                file_content=hook.read_key(key=self.key_name, bucket=self.bucket_name)
-            )
-            self.upload_data(data=data)
-        else:
-            data = []
-            objects = self._iterate_through_bucket(
-                s3hook=hook,
-                bucket=self.bucket_name,
-                prefix=self.prefix,
-                modified_from=self.data_from,
-                modified_until=self.data_until,
-                suffix=self.suffix,
-                file_load_parallelism=self.file_load_parallelism,
-                thread_pool_size=self.thread_pool_size,
+            body = hook.get_key_body(self.key_name, self.bucket_name)
+            try:
+                self._upload_object(body)
+            finally:
+                body.close()
+            return
+
+        object_count = 0
+        for obj_iter in self._iterate_through_bucket(
+            s3hook=hook,
+            bucket=self.bucket_name,
+            prefix=self.prefix,
+            modified_from=self.data_from,
+            modified_until=self.data_until,
+            suffix=self.suffix,
+        ):
+            object_count += 1
+            self.log.info("Loading data from file {0}".format(obj_iter["Key"]))
+            self._metadata.update(
+                {
+                    "bucket_name": self.bucket_name,
+                    "file_name": obj_iter["Key"],
+                    "file_last_modified": (
+                        str(obj_iter["LastModified"])
+                        if self.file_format == "CSV"
+                        else obj_iter["LastModified"]
+                    ),
+                }
             )
-            for obj_iter in objects:
-                self.log.info(
-                    "Loading data from file {0}".format(
-                        obj_iter["Key"],
-                    )
-                )
-                self._metadata.update(
-                    {
-                        "bucket_name": self.bucket_name,
-                        "file_name": obj_iter["Key"],
-                        "file_last_modified": obj_iter["LastModified"],
-                    }
-                )
-                data = f_get_data(file_content=obj_iter["_body"])
-                if self.subsequent_field:
-                    # TODO: Abstract this logic
-                    for datum in data:
-                        # Avoid KeyError when using `file_last_modified` as subsequent field
-                        if not self.subsequent_field in self._metadata.keys():
-                            datum[self.subsequent_field] = datetime.strptime(
-                                datum[self.subsequent_field], "%Y-%m-%dT%H:%M:%S.%f%z"
-                            )
-                self.upload_data(data=data)
+            self._upload_object(obj_iter["_body"])
+        self.log.info("Loaded data from {0} files.".format(object_count))
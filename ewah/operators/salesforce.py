@@ -2,7 +2,6 @@ from ewah.operators.base import EWAHBaseOperator
 from ewah.constants import EWAHConstants as EC
 from ewah.hooks.salesforce import EWAHSalesforceHook
 
-from datetime import datetime
 from typing import Optional
 
 
@@ -20,9 +19,22 @@ class EWAHSalesforceOperator(EWAHBaseOperator):
     _SUBSEQUENT_PLACEHOLDER = "~*subsequent-field-placeholder*~"
 
     def __init__(
-        self, salesforce_object: Optional[str] = None, *args, **kwargs
+        self,
+        salesforce_object: Optional[str] = None,
+        use_bulk_api: bool = False,  # query via Bulk API 2.0 query job
+        bulk_page_size: int = 50000,  # records per Bulk API result page
+        max_concurrent_downloads: int = 4,  # Bulk API result pages
+        *args,
+        **kwargs,
     ) -> None:
         self.salesforce_object = salesforce_object or kwargs.get("target_table_name")
+        _msg = "bulk_page_size and max_concurrent_downloads must be positive integers!"
+        assert isinstance(bulk_page_size, int) and bulk_page_size > 0, _msg
+        assert isinstance(max_concurrent_downloads, int), _msg
+        assert max_concurrent_downloads > 0, _msg
+        self.use_bulk_api = use_bulk_api
+        self.bulk_page_size = bulk_page_size
+        self.max_concurrent_downloads = max_concurrent_downloads
         kwargs["primary_key"] = "Id"
         # default subsequent_field to placeholder to be filled during execution
         if kwargs.get("extract_strategy") == EC.ES_SUBSEQUENT:
@@ -46,10 +58,9 @@ class EWAHSalesforceOperator(EWAHBaseOperator):
             salesforce_object=self.salesforce_object,
             data_from=self.data_from,
             data_until=self.data_until,
+            use_bulk_api=self.use_bulk_api,
+            bulk_page_size=self.bulk_page_size,
+            max_concurrent_downloads=self.max_concurrent_downloads,
+            datetime_fields=[self.subsequent_field] if is_subsequent else None,
         ):
-            if is_subsequent:
-                for item in batch:
-                    item[self.subsequent_field] = datetime.strptime(
-                        item[self.subsequent_field], "%Y-%m-%dT%H:%M:%S.%f%z"
-                    )
             self.upload_data(batch)
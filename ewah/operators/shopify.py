@@ -22,11 +22,39 @@ class EWAHShopifyOperator(EWAHBaseOperator):
         get_transactions_with_orders=False,
         get_events_with_orders=False,
         get_inventory_data_with_product_variants=False,
+        enrichment_concurrency=4,  # concurrent requests for transactions etc.
+        use_bulk_operation=False,  # extract via GraphQL bulk operation
+        bulk_query=None,  # optional custom GraphQL query of the bulk operation
         *args,
         **kwargs
     ):
         shopify_object = shopify_object or kwargs["target_table_name"]
 
+        _msg = "enrichment_concurrency must be a positive integer!"
+        assert isinstance(enrichment_concurrency, int), _msg
+        assert enrichment_concurrency > 0, _msg
+
+        if use_bulk_operation:
+            _msg = "Bulk operations require a bulk_query for object {0}!"
+            assert (
+                bulk_query or shopify_object in EWAHShopifyHook._BULK_QUERIES
+            ), _msg.format(shopify_object)
+            if bulk_query and not kwargs.get("extract_strategy") == EC.ES_FULL_REFRESH:
+                # Without it, each incremental or subsequent run is a full export
+                _msg = "bulk_query must contain $query_filter to filter by updated_at!"
+                assert "$query_filter" in bulk_query, _msg
+            _msg = "filter_fields is not valid with bulk operations!"
+            assert not filter_fields, _msg
+            _msg = "Bulk operations cannot be combined with REST enrichment!"
+            assert not (
+                get_transactions_with_orders
+                or get_events_with_orders
+                or get_inventory_data_with_product_variants
+            ), _msg
+        else:
+            _msg = "bulk_query requires use_bulk_operation!"
+            assert not bulk_query, _msg
+
         if is_iterable_not_string(shop_id):
             raise Exception("Multiple shops in one DAG is not allowed anymore!")
 
@@ -42,7 +70,7 @@ class EWAHShopifyOperator(EWAHBaseOperator):
         ):
             raise Exception("inventory data may only be pulled with products!")
 
-        assert (
+        assert use_bulk_operation or (
             shopify_object in EWAHShopifyHook._OBJECTS.keys()
         ), "Object not implemented!"
 
@@ -59,9 +87,12 @@ class EWAHShopifyOperator(EWAHBaseOperator):
             # The id refers to the checkout id, which can be abandoned multiple times
             # Each abandonement has a unique token, but carries the same id
             kwargs["primary_key"] = "token"
-        if EWAHShopifyHook._OBJECTS[shopify_object].get("_is_drop_and_replace"):
+        if use_bulk_operation:
+            if kwargs.get("extract_strategy") == EC.ES_SUBSEQUENT:
+                kwargs["subsequent_field"] = EWAHShopifyHook._BULK_TIMESTAMP_FIELD
+        elif EWAHShopifyHook._OBJECTS[shopify_object].get("_is_drop_and_replace"):
             kwargs["extract_strategy"] = EC.ES_FULL_REFRESH
-        if kwargs.get("extract_strategy") == EC.ES_SUBSEQUENT:
+        elif kwargs.get("extract_strategy") == EC.ES_SUBSEQUENT:
             kwargs["subsequent_field"] = EWAHShopifyHook._OBJECTS[shopify_object].get(
                 "_timestamp_fields",
                 EWAHShopifyHook._DEFAULT_TIMESTAMP_FIELDS,
@@ -78,6 +109,9 @@ class EWAHShopifyOperator(EWAHBaseOperator):
         self.get_inventory_data_with_product_variants = (
             get_inventory_data_with_product_variants
         )
+        self.enrichment_concurrency = enrichment_concurrency
+        self.use_bulk_operation = use_bulk_operation
+        self.bulk_query = bulk_query
 
     def ewah_execute(self, context):
         if (
@@ -91,6 +125,18 @@ class EWAHShopifyOperator(EWAHBaseOperator):
             data_until = self.data_until
 
         self._metadata.update({"shop_id": self.shop_id})
+        if self.use_bulk_operation:
+            for batch in self.source_hook.get_data_bulk(
+                shopify_object=self.shopify_object,
+                query=self.bulk_query,
+                shop_id=self.shop_id,
+                version=self.api_version,
+                data_from=data_from,
+                data_until=data_until,
+            ):
+                self.upload_data(batch)
+            return
+
         for batch in self.source_hook.get_data(
             shop_id=self.shop_id,
             filter_fields=self.filter_fields,
@@ -101,5 +147,6 @@ class EWAHShopifyOperator(EWAHBaseOperator):
             add_transactions=self.get_transactions_with_orders,
             add_events=self.get_events_with_orders,
             add_inventoryitems=self.get_inventory_data_with_product_variants,
+            enrichment_concurrency=self.enrichment_concurrency,
         ):
             self.upload_data(batch)
@@ -1,5 +1,10 @@
 from ewah.operators.base import EWAHBaseOperator
 from ewah.constants import EWAHConstants as EC
+from ewah.utils.airflow_utils import (
+    get_state_variable,
+    set_state_variable,
+    delete_state_variable,
+)
 
 from ewah.hooks.base import EWAHBaseHook as BaseHook
 
@@ -37,6 +42,9 @@ class EWAHSQLBaseOperator(EWAHBaseOperator):
         where_clauses: Optional[Union[str, List[str]]] = None,
         extra_params: Optional[dict] = None,
         batch_size: int = 100000,
+        keyset_column: Optional[str] = None,  # paginate by this unique column
+        keyset_page_size: Optional[int] = None,  # rows per page, default: batch_size
+        keyset_checkpoint: bool = True,  # commit & checkpoint after each page
         *args,
         **kwargs
     ):
@@ -57,6 +65,27 @@ class EWAHSQLBaseOperator(EWAHBaseOperator):
         if self.extract_strategy == EC.ES_INCREMENTAL:
             assert timestamp_column, "Incremental loading must have timestamp column!"
 
+        if keyset_column:
+            _msg = "keyset_column is not compatible with load_data_chunking_timedelta!"
+            assert not self.load_data_chunking_timedelta, _msg
+            keyset_page_size = keyset_page_size or batch_size
+            _msg = "keyset_page_size must be a positive integer!"
+            assert isinstance(keyset_page_size, int) and keyset_page_size > 0, _msg
+            if keyset_checkpoint:
+                # Checkpoints require committing data to the DWH after each page
+                _msg = "keyset_checkpoint is only available for PostgreSQL and "
+                _msg += "Snowflake DWHs! Set keyset_checkpoint to False."
+                assert self.dwh_engine in (
+                    EC.DWH_ENGINE_POSTGRES,
+                    EC.DWH_ENGINE_SNOWFLAKE,
+                ), _msg
+
+        if self.extract_strategy == EC.ES_CDC:
+            _msg = "cdc requires a source_schema_name and source_table_name!"
+            assert not sql_select_statement, _msg
+            _msg = "cdc does not work with keyset_column!"
+            assert not keyset_column, _msg
+
         if not sql_select_statement:
             assert source_schema_name
             assert source_table_name
@@ -68,15 +97,53 @@ class EWAHSQLBaseOperator(EWAHBaseOperator):
             )
 
         self.sql = self._SQL_BASE_SELECT.format(select_sql=sql_select_statement)
+        self.sql_keyset = self._SQL_KEYSET_SELECT.format(
+            select_sql=sql_select_statement
+        )
+        self.source_schema_name = source_schema_name
+        self.source_table_name = source_table_name
         self.extra_params = extra_params
         self.timestamp_column = timestamp_column
         self.where_clauses = where_clauses
         self.batch_size = batch_size
         self.subsequent_delta = subsequent_delta
+        self.keyset_column = keyset_column
+        self.keyset_page_size = keyset_page_size
+        self.keyset_checkpoint = keyset_checkpoint
+
+    @property
+    def keyset_checkpoint_variable(self):
+        return "__ewah_keyset_checkpoint__{0}__{1}".format(self.dag_id, self.task_id)
+
+    def is_resuming_upload(self, context):
+        self._keyset_resume_checkpoint = {}
+        if not (self.keyset_column and self.keyset_checkpoint):
+            return False
+        checkpoint = get_state_variable(self.keyset_checkpoint_variable)
+        if not checkpoint or not checkpoint["run_id"] == context["run_id"]:
+            # No checkpoint or a stale one of a different DAG run
+            return False
+        if not self.test_if_target_table_exists():
+            # e.g. the whole DAG run was cleared and the kickoff task re-created
+            # the schema, thus the previously committed data is gone
+            return False
+        self.log.info(
+            "Resuming after {0} = {1} as per checkpoint.".format(
+                self.keyset_column, str(checkpoint["last_value"])
+            )
+        )
+        self._keyset_resume_checkpoint = checkpoint
+        return True
+
+    def ewah_after_commit(self, context):
+        if self.keyset_column and self.keyset_checkpoint:
+            # The checkpoint is obsolete once all data is committed
+            delete_state_variable(self.keyset_checkpoint_variable)
 
     def ewah_execute(self, context):
         # called, potentially with a data_from and data_until
 
+        checkpoint = getattr(self, "_keyset_resume_checkpoint", None) or {}
         params = self.extra_params or {}
         where_clauses = self.where_clauses or []
         if self.data_from and self.timestamp_column:
@@ -93,24 +160,108 @@ class EWAHSQLBaseOperator(EWAHBaseOperator):
                 )
             )
             params["data_until"] = self.data_until
-        if self.subsequent_field and self.test_if_target_table_exists():
+        if checkpoint:
+            # The target table contains data committed by a previous try and thus
+            # its maximum is not the previous max value - use the checkpoint's
+            has_previous_max_value = checkpoint["has_previous_max_value"]
+        else:
+            has_previous_max_value = bool(
+                self.subsequent_field and self.test_if_target_table_exists()
+            )
+        if has_previous_max_value:
             where_clauses.append(
                 "{0} > {1}".format(
                     "{0}{1}{0}".format(self._SQL_COLUMN_QUOTE, self.subsequent_field),
                     self._SQL_PARAMS.format("previous_max_value"),
                 )
             )
-            subsequent_value = self.get_max_value_of_column(self.subsequent_field)
-            if self.subsequent_delta:
-                subsequent_value -= self.subsequent_delta
+            if checkpoint:
+                subsequent_value = checkpoint["previous_max_value"]
+            else:
+                subsequent_value = self.get_max_value_of_column(self.subsequent_field)
+                if self.subsequent_delta:
+                    subsequent_value -= self.subsequent_delta
             params["previous_max_value"] = subsequent_value
 
+        if self.keyset_column:
+            return self._execute_keyset(context, where_clauses, params, checkpoint)
+
         where_clauses = where_clauses or ["1 = 1"]
         sql = self.sql.format("\n  AND ".join(where_clauses))
-        for batch in self.source_hook.get_data_in_batches(
+        self.load_data_from_sql(
             sql=sql,
             params=params or None,  # Don't supply empty dict as params!
+        )
+
+    def get_data_in_batches(self, sql, params=None):
+        """Overwrite me in a child class to use a source specific fetch method."""
+        return self.source_hook.get_data_in_batches(
+            sql=sql,
+            params=params,
             return_dict=True,
             batch_size=self.batch_size,
-        ):
+        )
+
+    def load_data_from_sql(self, sql, params=None):
+        for batch in self.get_data_in_batches(sql=sql, params=params):
             self.upload_data(batch)
+
+    def _execute_keyset(self, context, where_clauses, params, checkpoint):
+        """Load data in pages of bounded queries, each ordered by the keyset column
+        and starting after the last value of the previous page.
+
+        In contrast to a single large query, no long-running query or snapshot is
+        kept open on the source. If keyset_checkpoint is set, data is committed to
+        the DWH after each page and the last value is saved, so that a retry of
+        the task can resume after the last committed page.
+        """
+        key = "{0}{1}{0}".format(self._SQL_COLUMN_QUOTE, self.keyset_column)
+        has_last_value = "last_value" in checkpoint
+        last_value = checkpoint.get("last_value")
+        while True:
+            page_where_clauses = list(where_clauses)
+            page_params = dict(params)
+            if has_last_value:
+                page_where_clauses.append(
+                    "{0} > {1}".format(
+                        key, self._SQL_PARAMS.format("keyset_last_value")
+                    )
+                )
+                page_params["keyset_last_value"] = last_value
+            sql = self.sql_keyset.format(
+                "\n  AND ".join(page_where_clauses or ["1 = 1"]),
+                key,
+                self.keyset_page_size,
+            )
+            page_row_count = 0
+            for batch in self.get_data_in_batches(
+                sql=sql,
+                params=page_params or None,  # Don't supply empty dict as params!
+            ):
+                page_row_count += len(batch)
+                # Get the value before uploading - the cleaner consumes the batch
+                last_value = batch[-1][self.keyset_column]
+                has_last_value = True
+                self.upload_data(batch)
+            # Release the (server side) cursor before the next page is queried
+            self.source_hook.close_cursors()
+
+            self.log.info(
+                "Keyset page done: {0} rows, last {1} = {2}".format(
+                    page_row_count, self.keyset_column, str(last_value)
+                )
+            )
+            if page_row_count and self.keyset_checkpoint:
+                self.uploader.finalize_upload()
+                self.uploader.commit()
+                set_state_variable(
+                    self.keyset_checkpoint_variable,
+                    {
+                        "run_id": context["run_id"],
+                        "last_value": last_value,
+                        "has_previous_max_value": "previous_max_value" in params,
+                        "previous_max_value": params.get("previous_max_value"),
+                    },
+                )
+            if page_row_count < self.keyset_page_size:
+                break
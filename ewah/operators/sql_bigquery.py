@@ -11,6 +11,9 @@ class EWAHBigQueryOperator(EWAHSQLBaseOperator):
         FROM `{database}`.`{schema}`.`{table}`
     """
     _SQL_BASE_SELECT = "SELECT * FROM ({select_sql}) t \nWHERE {{0}}"
+    _SQL_KEYSET_SELECT = (
+        "SELECT * FROM ({select_sql}) t \nWHERE {{0}}\nORDER BY {{1}}\nLIMIT {{2}}"
+    )
     _SQL_COLUMN_QUOTE = "`"
     _SQL_PARAMS = "@{0}"
 
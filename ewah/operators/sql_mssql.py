@@ -7,6 +7,10 @@ class EWAHMSSQLOperator(EWAHSQLBaseOperator):
 
     _SQL_BASE = 'SELECT\n{columns}\nFROM "{schema}"."{table}"'
     _SQL_BASE_SELECT = "SELECT * FROM (\n\n{select_sql}\n\n) t\n\nWHERE {{0}}"
+    _SQL_KEYSET_SELECT = (
+        "SELECT TOP ({{2}}) * FROM (\n\n{select_sql}\n\n) t\n\nWHERE {{0}}"
+        "\nORDER BY {{1}}"
+    )
     _SQL_COLUMN_QUOTE = '"'
     _SQL_PARAMS = "%({0})s"
 
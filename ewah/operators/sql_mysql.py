@@ -1,13 +1,86 @@
 from ewah.operators.sql_base import EWAHSQLBaseOperator
 from ewah.hooks.mysql import EWAHMySQLHook
+from ewah.constants import EWAHConstants as EC
+from ewah.utils.airflow_utils import get_state_variable, set_state_variable
+
+from typing import Optional
+
+import hashlib
 
 
 class EWAHMySQLOperator(EWAHSQLBaseOperator):
     _NAMES = ["mysql"]
 
+    _ACCEPTED_EXTRACT_STRATEGIES = {
+        EC.ES_FULL_REFRESH: True,
+        EC.ES_INCREMENTAL: True,
+        EC.ES_SUBSEQUENT: True,
+        EC.ES_CDC: True,
+    }
+
     _SQL_BASE = "SELECT\n{columns}\nFROM `{schema}`.`{table}`"
     _SQL_BASE_SELECT = "SELECT * FROM (\n\n{select_sql}\n\n) t\n\nWHERE {{0}}"
+    _SQL_KEYSET_SELECT = (
+        "SELECT * FROM (\n\n{select_sql}\n\n) t\n\nWHERE {{0}}"
+        "\nORDER BY {{1}}\nLIMIT {{2}}"
+    )
     _SQL_COLUMN_QUOTE = "`"
     _SQL_PARAMS = "%({0})s"
 
     _CONN_TYPE = EWAHMySQLHook.conn_type
+
+    def __init__(
+        self,
+        cdc_server_id: Optional[int] = None,  # replica server id for binlog reading
+        *args,
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+
+        if self.extract_strategy == EC.ES_CDC and not cdc_server_id:
+            # Must be unique among all replicas of the server - default to a
+            # number derived from DAG and task id
+            task_hash = hashlib.blake2b(
+                "{0}.{1}".format(self.dag_id, self.task_id).encode(), digest_size=4
+            )
+            cdc_server_id = int.from_bytes(task_hash.digest(), "big") or 1
+
+        self.cdc_server_id = cdc_server_id
+
+    @property
+    def binlog_position_variable(self):
+        return "__ewah_binlog_position__{0}__{1}".format(self.dag_id, self.task_id)
+
+    def ewah_execute(self, context):
+        if not self.extract_strategy == EC.ES_CDC:
+            return super().ewah_execute(context)
+
+        self._cdc_binlog_position = None
+        position = get_state_variable(self.binlog_position_variable)
+        if position and self.test_if_target_table_exists():
+            for changes in self.source_hook.get_binlog_changes_in_batches(
+                position=position,
+                server_id=self.cdc_server_id,
+                schema_name=self.source_schema_name,
+                table_name=self.source_table_name,
+                batch_size=self.batch_size,
+            ):
+                self.upload_changes(changes)
+        else:
+            # Get the position before the initial load, thus no change is missed
+            # in between - changes already included are re-applied idempotently
+            position = self.source_hook.get_binlog_position()
+            self.log.info("No binlog position yet - running a full load.")
+            super().ewah_execute(context)
+        self._cdc_binlog_position = position
+
+    def ewah_after_commit(self, context):
+        super().ewah_after_commit(context)
+        if getattr(self, "_cdc_binlog_position", None):
+            # Only save the position once the changes are committed in the DWH
+            self.log.info(
+                "Saving binlog position {log_file}:{log_pos}".format(
+                    **self._cdc_binlog_position
+                )
+            )
+            set_state_variable(self.binlog_position_variable, self._cdc_binlog_position)
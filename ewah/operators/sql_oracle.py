@@ -7,6 +7,11 @@ class EWAHOracleSQLOperator(EWAHSQLBaseOperator):
 
     _SQL_BASE = 'SELECT\n{columns}\nFROM "{schema}"."{table}"\n'
     _SQL_BASE_SELECT = "SELECT * FROM (\n\n{select_sql}\n\n) t\nWHERE {{0}}"
+    # FETCH FIRST requires Oracle 12c or later
+    _SQL_KEYSET_SELECT = (
+        "SELECT * FROM (\n\n{select_sql}\n\n) t\nWHERE {{0}}"
+        "\nORDER BY {{1}}\nFETCH FIRST {{2}} ROWS ONLY"
+    )
     _SQL_COLUMN_QUOTE = '"'
     _SQL_PARAMS = ":{0}"
 
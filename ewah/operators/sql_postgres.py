@@ -1,15 +1,162 @@
 from ewah.operators.sql_base import EWAHSQLBaseOperator
 from ewah.hooks.postgres import EWAHPostgresHook
+from ewah.constants import EWAHConstants as EC
+
+from typing import Optional
+
+import hashlib
 
 
 class EWAHPostgresOperator(EWAHSQLBaseOperator):
     _NAMES = ["pgsql", "postgres", "postgresql"]
 
+    _ACCEPTED_EXTRACT_STRATEGIES = {
+        EC.ES_FULL_REFRESH: True,
+        EC.ES_INCREMENTAL: True,
+        EC.ES_SUBSEQUENT: True,
+        EC.ES_CDC: True,
+    }
+
     _SQL_BASE = 'SELECT\n{columns}\nFROM "{schema}"."{table}"\n'
     _SQL_BASE_SELECT = (
         "WITH raw_data AS (\n\n{select_sql}\n\n) SELECT * FROM raw_data\nWHERE {{0}}"
     )
+    _SQL_KEYSET_SELECT = (
+        "WITH raw_data AS (\n\n{select_sql}\n\n) SELECT * FROM raw_data\nWHERE {{0}}"
+        "\nORDER BY {{1}}\nLIMIT {{2}}"
+    )
     _SQL_COLUMN_QUOTE = '"'
     _SQL_PARAMS = "%({0})s"
 
     _CONN_TYPE = EWAHPostgresHook.conn_type
+
+    def __init__(
+        self,
+        copy_mode: Optional[str] = None,  # None, "decode" or "pipe"
+        cdc_publication_name: Optional[str] = None,  # required for cdc
+        cdc_slot_name: Optional[str] = None,  # defaults to a name per task
+        *args,
+        **kwargs
+    ):
+        # copy_mode: extract data via COPY ... TO STDOUT instead of a cursor
+        #   "decode": parse the COPY stream into rows of the same types as the
+        #       cursor would return, then clean and upload them as usual
+        #   "pipe": stream the COPY output straight into a COPY ... FROM STDIN
+        #       of the target table without decoding (PostgreSQL DWHs only)
+        assert copy_mode in (None, "decode", "pipe"), "Invalid copy_mode!"
+        super().__init__(*args, **kwargs)
+
+        if copy_mode == "pipe":
+            _msg = "copy_mode pipe is only available for PostgreSQL DWHs!"
+            assert self.dwh_engine == EC.DWH_ENGINE_POSTGRES, _msg
+            _msg = "copy_mode pipe only works with insert_replace and insert_add!"
+            assert self.load_strategy in (EC.LS_INSERT_REPLACE, EC.LS_INSERT_ADD), _msg
+            _msg = "copy_mode pipe does not work with keyset_column!"
+            assert not self.keyset_column, _msg
+            # Data is not decoded, thus it cannot be cleaned in any way
+            for arg in (
+                "add_metadata",
+                "include_columns",
+                "exclude_columns",
+                "rename_columns",
+                "hash_columns",
+                "default_values",
+                "cleaner_callables",
+                "deduplication_before_upload",
+            ):
+                _msg = "copy_mode pipe does not work with {0}! Set it to False."
+                assert not getattr(self, arg), _msg.format(arg)
+
+        if self.extract_strategy == EC.ES_CDC:
+            _msg = "cdc requires a cdc_publication_name!"
+            assert cdc_publication_name, _msg
+            _msg = "cdc does not work with copy_mode pipe!"
+            assert not copy_mode == "pipe", _msg
+            # Replication slot names may only contain lower case letters,
+            # numbers and underscores and are limited to 63 characters
+            cdc_slot_name = cdc_slot_name or "ewah_{0}".format(
+                hashlib.blake2b(
+                    "{0}.{1}".format(self.dag_id, self.task_id).encode(),
+                    digest_size=16,
+                ).hexdigest()
+            )
+
+        self.copy_mode = copy_mode
+        self.cdc_publication_name = cdc_publication_name
+        self.cdc_slot_name = cdc_slot_name
+
+    def ewah_execute(self, context):
+        if not self.extract_strategy == EC.ES_CDC:
+            return super().ewah_execute(context)
+
+        self._cdc_confirm_lsn = None
+        if not self.source_hook.replication_slot_exists(self.cdc_slot_name):
+            # Create the slot before the initial load, thus no change is missed
+            # in between - changes already included are re-applied idempotently
+            self.log.info("Creating replication slot {0}".format(self.cdc_slot_name))
+            self.source_hook.create_replication_slot(self.cdc_slot_name)
+        elif self.test_if_target_table_exists():
+            return self._execute_cdc()
+        # Initial load of the full table - the slot is not yet advanced
+        self.log.info("Target table does not exist yet - running a full load.")
+        return super().ewah_execute(context)
+
+    def _execute_cdc(self):
+        """Apply all changes of the replication slot up to the current lsn.
+
+        The slot is only advanced after the commit in the DWH, thus a failed
+        try re-applies the same changes.
+        """
+        upto_lsn = self.source_hook.get_current_wal_lsn()
+        self.log.info("Applying changes up to lsn {0}".format(upto_lsn))
+        source_table = (self.source_schema_name, self.source_table_name)
+        for changes in self.source_hook.get_replication_changes_in_batches(
+            slot_name=self.cdc_slot_name,
+            publication_name=self.cdc_publication_name,
+            upto_lsn=upto_lsn,
+            batch_size=self.batch_size,
+        ):
+            # the publication may contain other tables
+            self.upload_changes(
+                [
+                    (action, row, old_row)
+                    for action, schema, table, row, old_row in changes
+                    if (schema, table) == source_table
+                ]
+            )
+        self._cdc_confirm_lsn = upto_lsn
+
+    def ewah_after_commit(self, context):
+        super().ewah_after_commit(context)
+        if getattr(self, "_cdc_confirm_lsn", None):
+            self.log.info(
+                "Advancing replication slot {0} to lsn {1}".format(
+                    self.cdc_slot_name, self._cdc_confirm_lsn
+                )
+            )
+            self.source_hook.advance_replication_slot(
+                self.cdc_slot_name, self._cdc_confirm_lsn
+            )
+
+    def get_data_in_batches(self, sql, params=None):
+        if self.copy_mode == "decode":
+            return self.source_hook.get_data_in_batches_via_copy(
+                sql=sql,
+                params=params,
+                batch_size=self.batch_size,
+            )
+        return super().get_data_in_batches(sql=sql, params=params)
+
+    def load_data_from_sql(self, sql, params=None):
+        if not self.copy_mode == "pipe":
+            return super().load_data_from_sql(sql=sql, params=params)
+
+        columns = self.source_hook.get_query_columns(sql, params)
+        type_names = self.source_hook.get_type_names([oid for _, oid in columns])
+        with self.source_hook.copy_query_to_stream(sql, params) as stream:
+            self.uploader.upload_copy_stream(
+                stream=stream,
+                columns_definition={
+                    name: {EC.QBC_FIELD_TYPE: type_names[oid]} for name, oid in columns
+                },
+            )
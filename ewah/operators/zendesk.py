@@ -2,11 +2,11 @@ from ewah.operators.base import EWAHBaseOperator
 from ewah.constants import EWAHConstants as EC
 
 from ewah.hooks.base import EWAHBaseHook as BaseHook
+from ewah.utils.http_utils import EWAHHTTPClient
 
 from datetime import datetime, timedelta
 
 from requests.auth import HTTPBasicAuth
-import requests
 import json
 import time
 
@@ -76,7 +76,15 @@ class EWAHZendeskOperator(EWAHBaseOperator):
         self._metadata.update({"support_url": self.support_url})
 
         # run correct execute function
-        return self._accepted_resources[self.resource]["function"](context, self)
+        self.http_client = EWAHHTTPClient(
+            requests_per_second=conn.extra_dejson.get("http_requests_per_second"),
+            rate_limit_key=conn.conn_id,
+        )
+        try:
+            return self._accepted_resources[self.resource]["function"](context, self)
+        finally:
+            self.http_client.log_metrics()
+            self.http_client.close()
 
     def make_unix_datetime(self, dt):
         return str(int(time.mktime(dt.timetuple())))
@@ -86,7 +94,7 @@ class EWAHZendeskOperator(EWAHBaseOperator):
             support_url=self.support_url,
             endpoint="api/v2/ticket_fields.json",
         )
-        req = requests.get(url, auth=self.auth)
+        req = self.http_client.get(url, auth=self.auth)
         if not req.status_code == 200:
             raise Exception(
                 "Error {1} when calling Zendesk API: {0}".format(
@@ -128,7 +136,7 @@ class EWAHZendeskOperator(EWAHBaseOperator):
             first_call = False
 
             self.log.info("Requesting a page of data...")
-            req = requests.get(url, params=params, auth=self.auth)
+            req = self.http_client.get(url, params=params, auth=self.auth)
             response = json.loads(req.text)
             if req.status_code == 200:
                 data = response[response_resource]
@@ -172,7 +180,7 @@ class EWAHZendeskOperator(EWAHBaseOperator):
                 str(params),
             )
         )
-        r = requests.get(url, params=params, auth=self.auth)
+        r = self.http_client.get(url, params=params, auth=self.auth)
         data = json.loads(r.text)
         while (
             r.status_code == 200
@@ -182,7 +190,7 @@ class EWAHZendeskOperator(EWAHBaseOperator):
         ):
             self.upload_data(data[self.resource])  # uploads previous request
             self.log.info("Requesting next page of data...")
-            r = requests.get(data["next_page"], auth=self.auth)  # new request
+            r = self.http_client.get(data["next_page"], auth=self.auth)  # new request
             data = json.loads(r.text)
 
         if not r.status_code == 200:
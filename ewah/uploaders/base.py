@@ -9,7 +9,7 @@ import os
 
 from copy import deepcopy
 from tempfile import TemporaryDirectory
-from typing import Optional, Type, Union, Dict, List, Any
+from typing import Optional, Type, Union, Dict, List, Any, Sequence
 
 
 class EWAHBaseUploader(LoggingMixin):
@@ -120,7 +120,12 @@ class EWAHBaseUploader(LoggingMixin):
         self,
         data: List[Dict[str, any]],
         metadata: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
     ) -> None:
+        if columns:
+            # data is a list of sequences of values in the order of columns - the
+            # cleaner works with dictionaries, thus this is not any faster
+            data = [dict(zip(columns, row)) for row in data]
         data = self.cleaner.clean_rows(rows=data, metadata=metadata)
 
         if self.primary_key:
@@ -234,6 +239,22 @@ class EWAHBaseUploader(LoggingMixin):
         self.temp_pickle_file.close()
         self.temp_pickle_file = self.pickle_file_open(self.temp_file_name, "wb")
 
+    def resume_upload(self):
+        """Continue uploading into a table that a previous try partially loaded.
+
+        Subsequent uploads treat the table as existing, i.e. it is neither copied
+        nor dropped and re-created for insert_replace loads.
+        """
+        self.upload_call_count = max(self.upload_call_count, 1)
+
+    def delete_rows(self, rows: List[dict]) -> None:
+        """Delete rows from the target table by their primary key.
+
+        :param rows: List of dictionaries, each containing at least the values of
+            all primary key columns of a row to delete.
+        """
+        raise Exception("Not implemented!")
+
     def finalize_upload(self):
         if self.use_temp_pickling:
             self._upload_from_pickle()
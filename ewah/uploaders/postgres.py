@@ -258,6 +258,123 @@ class EWAHPostgresUploader(EWAHBaseUploader):
             commit=False,
         )
 
+    def upload_copy_stream(self, stream, columns_definition):
+        """Load data in PostgreSQL's COPY text format straight into the table.
+
+        The data bypasses the cleaner, hence the columns_definition must be
+        supplied explicitly in the same format as self.columns_definition.
+
+        :param stream: Binary file-like object to read the data from.
+        :param columns_definition: Dictionary of column names and definitions,
+            in the same order as the columns in the data.
+        """
+        self.upload_call_count += 1
+        schema_name = self.schema_name + self.schema_suffix
+        if self.test_if_table_exists(
+            table_name=self.table_name, schema_name=schema_name
+        ) and not (
+            self.upload_call_count == 1 and self.load_strategy == EC.LS_INSERT_REPLACE
+        ):
+            # Add any new columns to the existing table
+            existing_columns = [
+                col[0].strip()
+                for col in self.dwh_hook.execute_and_return_result(
+                    sql=self._QUERY_SCHEMA_CHANGES_COLUMNS,
+                    params={"schema_name": schema_name, "table_name": self.table_name},
+                    return_dict=False,
+                )
+            ]
+            for column_name, definition in columns_definition.items():
+                if not column_name in existing_columns:
+                    self.dwh_hook.execute(
+                        sql=self._QUERY_SCHEMA_CHANGES_ADD_COLUMN.format(
+                            schema_name=schema_name,
+                            table_name=self.table_name,
+                            column_name=column_name,
+                            column_type=self._get_column_type(definition),
+                        ),
+                        commit=False,
+                    )
+        else:
+            # (Re-)create the table without uploading any data
+            self._create_or_update_table(
+                data=[],
+                table_name=self.table_name,
+                schema_name=self.schema_name,
+                schema_suffix=self.schema_suffix,
+                columns_definition=columns_definition,
+                load_strategy=self.load_strategy,
+                upload_call_count=self.upload_call_count,
+                primary_key=self.primary_key,
+            )
+
+        sql = 'COPY "{0}"."{1}" ("{2}") FROM STDIN'.format(
+            schema_name,
+            self.table_name,
+            '", "'.join(columns_definition.keys()),
+        )
+        self.log.info("Uploading data via COPY:\n\n{0}".format(sql))
+        self.dwh_hook.cursor.copy_expert(sql, stream)
+        self.log.info("Upload done.")
+        self.dwh_hook.execute(
+            sql='ANALYZE "{0}"."{1}";'.format(schema_name, self.table_name),
+            commit=False,
+        )
+
+    def delete_rows(self, rows):
+        schema_name = self.schema_name + self.schema_suffix
+        if not rows or not self.test_if_table_exists(
+            table_name=self.table_name, schema_name=schema_name
+        ):
+            return
+        # Cast the values explicitly, VALUES would otherwise default to text
+        column_types = dict(
+            self.dwh_hook.execute_and_return_result(
+                sql="""
+                    SELECT f.attname, format_type(f.atttypid, f.atttypmod)
+                    FROM pg_attribute f
+                    WHERE f.attrelid = to_regclass(%(name)s)
+                        AND f.attnum > 0
+                        AND NOT f.attisdropped
+                """,
+                params={"name": '"{0}"."{1}"'.format(schema_name, self.table_name)},
+                return_dict=False,
+            )
+        )
+        cols_map = {
+            self.primary_key[i]: "col_" + str(i) for i in range(len(self.primary_key))
+        }
+        sql = """
+            DELETE FROM "{schema_name}"."{table_name}" t
+            USING (VALUES {{placeholder}}) AS d ("{aliases}")
+            WHERE {conditions};
+        """.format(
+            schema_name=schema_name,
+            table_name=self.table_name,
+            aliases='", "'.join(cols_map.values()),
+            conditions=" AND ".join(
+                't."{0}" = d."{1}"'.format(key, alias)
+                for key, alias in cols_map.items()
+            ),
+        ).format(placeholder="%s")
+        template = (
+            "("
+            + ", ".join(
+                "%({0})s::{1}".format(alias, column_types[key])
+                for key, alias in cols_map.items()
+            )
+            + ")"
+        )
+        self.log.info("Deleting {0} rows using SQL:\n\n{1}".format(len(rows), sql))
+        execute_values(
+            cur=self.dwh_hook.cursor,
+            sql=sql,
+            argslist=[
+                {alias: row[key] for key, alias in cols_map.items()} for row in rows
+            ],
+            template=template,
+        )
+
     def test_if_table_exists(self, table_name, schema_name):
         return bool(
             self.dwh_hook.execute_and_return_result(
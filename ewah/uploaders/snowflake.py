@@ -342,6 +342,35 @@ class EWAHSnowflakeUploader(EWAHBaseUploader):
         self.log.info("Final Step: Merging data")
         self.dwh_hook.execute(sql_final)
 
+    def delete_rows(self, rows):
+        if not rows or not self.test_if_table_exists(
+            table_name=self.table_name,
+            schema_name=self.schema_name + self.schema_suffix,
+        ):
+            return
+        sql = """
+            DELETE FROM "{database_name}"."{schema_name}"."{table_name}" t
+            USING (SELECT * FROM VALUES {{values}}) AS d
+            WHERE {conditions}
+        """.format(
+            database_name=self.database_name,
+            schema_name=self.schema_name + self.schema_suffix,
+            table_name=self.table_name,
+            conditions=" AND ".join(
+                't."{0}" = d.column{1}'.format(key, i + 1)
+                for i, key in enumerate(self.primary_key)
+            ),
+        )
+        self.log.info("Deleting {0} rows using SQL:\n\n{1}".format(len(rows), sql))
+        placeholder = "(" + ", ".join(["%s"] * len(self.primary_key)) + ")"
+        cur = self.dwh_hook.cursor
+        for i in range(0, len(rows), 1000):
+            chunk = rows[i : i + 1000]
+            cur.execute(
+                sql.format(values=", ".join([placeholder] * len(chunk))),
+                [row[key] for row in chunk for key in self.primary_key],
+            )
+
     def test_if_table_exists(
         self,
         table_name,
@@ -1,13 +1,16 @@
 from airflow.operators.python import PythonOperator as PO
 from airflow.operators.dummy import DummyOperator as DO
-from airflow.models import BaseOperator
+from airflow.models import BaseOperator, Variable
 from airflow.sensors.sql import SqlSensor
 
 from ewah.hooks.base import EWAHBaseHook
 from ewah.constants import EWAHConstants as EC
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from copy import deepcopy
+from decimal import Decimal
+from typing import Any, Optional
+import json
 import pytz
 import re
 
@@ -88,3 +91,47 @@ def airflow_datetime_adjustments(datetime_raw):
         datetime_raw = datetime_raw.replace(tzinfo=timezone.utc)
 
     return datetime_raw
+
+
+def _encode_state_value(obj):
+    """Make datetimes, dates and Decimals json serializable in a reversible way."""
+    if isinstance(obj, datetime):
+        return {"__ewah_type__": "datetime", "value": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"__ewah_type__": "date", "value": obj.isoformat()}
+    if isinstance(obj, Decimal):
+        return {"__ewah_type__": "decimal", "value": str(obj)}
+    raise TypeError("Cannot serialize {0} as EWAH state!".format(type(obj)))
+
+
+def _decode_state_value(obj):
+    _type = obj.get("__ewah_type__")
+    if _type == "datetime":
+        return datetime.fromisoformat(obj["value"])
+    if _type == "date":
+        return date.fromisoformat(obj["value"])
+    if _type == "decimal":
+        return Decimal(obj["value"])
+    return obj
+
+
+def get_state_variable(key: str, default: Optional[Any] = None) -> Any:
+    """Get a piece of state persisted by EWAH between task runs, e.g. a checkpoint.
+
+    State is stored as json in an airflow Variable. Datetimes, dates and Decimals
+    are returned as such.
+    """
+    value = Variable.get(key=key, default_var=None)
+    if value is None:
+        return default
+    return json.loads(value, object_hook=_decode_state_value)
+
+
+def set_state_variable(key: str, value: Any) -> None:
+    """Persist a piece of state between task runs, see get_state_variable."""
+    Variable.set(key=key, value=json.dumps(value, default=_encode_state_value))
+
+
+def delete_state_variable(key: str) -> None:
+    """Remove a piece of state persisted by set_state_variable, if it exists."""
+    Variable.delete(key=key)
@@ -0,0 +1,146 @@
+from airflow.models import Variable
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class EWAHMetadataCache(LoggingMixin):
+    """Cache of metadata of a source, e.g. the fields of an object, that persists
+    between task runs.
+
+    Entries are stored as json in an airflow Variable, thus they are shared by
+    all workers, or as files on the local disk of a worker. They are also kept
+    in memory for the lifetime of the process. An entry is used as is for
+    ttl_seconds. Afterwards, it is revalidated, e.g. with an ETag or a last
+    modified timestamp, if the fetch function returned any validators for it,
+    or fetched again otherwise.
+
+    Caching never fails a task: if the storage is not available, the metadata
+    is fetched as if it was not cached.
+    """
+
+    # Returned by a fetch function as value if the cached value is still valid
+    NOT_MODIFIED = object()
+
+    STORAGE_VARIABLE = "variable"
+    STORAGE_DISK = "disk"
+
+    _VARIABLE_PREFIX = "ewah_metadata_cache__"
+
+    _MEMORY = {}
+    _MEMORY_LOCK = threading.Lock()
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: float = 60 * 60,
+        storage: str = STORAGE_VARIABLE,
+        directory: Optional[str] = None,
+    ):
+        super().__init__()
+        _msg = "storage must be one of {0}!".format(
+            (self.STORAGE_VARIABLE, self.STORAGE_DISK)
+        )
+        assert storage in (self.STORAGE_VARIABLE, self.STORAGE_DISK), _msg
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.storage = storage
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "ewah_metadata_cache"
+        )
+
+    def _get_storage_key(self, key: str) -> str:
+        # Keys may contain characters that are invalid in file or variable names
+        return "{0}{1}".format(
+            self._VARIABLE_PREFIX,
+            hashlib.sha256(
+                json.dumps([self.namespace, key]).encode("utf-8")
+            ).hexdigest(),
+        )
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, self._get_storage_key(key) + ".json")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._MEMORY_LOCK:
+            entry = self._MEMORY.get((self.namespace, key))
+        if entry:
+            return entry
+        try:
+            if self.storage == self.STORAGE_VARIABLE:
+                raw = Variable.get(key=self._get_storage_key(key), default_var=None)
+            elif os.path.isfile(self._get_path(key)):
+                with open(self._get_path(key), "r") as file_obj:
+                    raw = file_obj.read()
+            else:
+                raw = None
+            return json.loads(raw) if raw else None
+        except Exception as e:
+            self.log.warning("Could not load cached metadata: {0}".format(str(e)))
+            return None
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._MEMORY_LOCK:
+            self._MEMORY[(self.namespace, key)] = entry
+        try:
+            if self.storage == self.STORAGE_VARIABLE:
+                Variable.set(key=self._get_storage_key(key), value=json.dumps(entry))
+            else:
+                os.makedirs(self.directory, exist_ok=True)
+                # Write to a separate file first, thus readers never see half a file
+                path = self._get_path(key)
+                with open(path + ".tmp", "w") as file_obj:
+                    json.dump(entry, file_obj)
+                os.replace(path + ".tmp", path)
+        except Exception as e:
+            self.log.warning("Could not store cached metadata: {0}".format(str(e)))
+
+    def invalidate(self, key: str) -> None:
+        """Remove an entry from the cache, e.g. when it turned out to be wrong."""
+        with self._MEMORY_LOCK:
+            self._MEMORY.pop((self.namespace, key), None)
+        try:
+            if self.storage == self.STORAGE_VARIABLE:
+                Variable.delete(key=self._get_storage_key(key))
+            elif os.path.isfile(self._get_path(key)):
+                os.remove(self._get_path(key))
+        except Exception as e:
+            self.log.warning("Could not invalidate cached metadata: {0}".format(str(e)))
+
+    def get(
+        self,
+        key: str,
+        fetch: Callable[[Dict[str, str]], Tuple[Any, Dict[str, str]]],
+    ) -> Any:
+        """Return the cached value of key, calling fetch if required.
+
+        :param key: Name of the metadata within the namespace of the cache.
+        :param fetch: Callable that receives the validators of the cached value
+            (an empty dict if there is none) and returns a tuple of the value and
+            its validators, e.g. {"etag": ...}. The value must be json serializable.
+            If the validators show that the cached value is still valid, e.g.
+            because of a response with status 304, it returns NOT_MODIFIED instead
+            of the value.
+        """
+        entry = self._load(key)
+        if entry and time.time() - entry["cached_at"] < self.ttl_seconds:
+            return entry["value"]
+
+        value, validators = fetch((entry or {}).get("validators") or {})
+        if value is self.NOT_MODIFIED:
+            assert entry, "Fetch function returned NOT_MODIFIED without a value!"
+            self.log.info("Cached metadata {0} is still valid.".format(key))
+            value = entry["value"]
+            validators = validators or entry.get("validators")
+        self._store(
+            key,
+            {"value": value, "validators": validators or {}, "cached_at": time.time()},
+        )
+        return value
@@ -0,0 +1,172 @@
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import atexit
+import hashlib
+import threading
+import time
+
+
+def get_connection_config_hash(conn) -> str:
+    """Return a hash of all configuration details of an airflow connection.
+
+    Used as part of pool keys, so that a changed connection is not served from
+    the pool with its old configuration.
+    """
+    return hashlib.sha256(
+        "\n".join(
+            str(value)
+            for value in (
+                conn.conn_type,
+                conn.host,
+                conn.port,
+                conn.login,
+                conn.password,
+                conn.schema,
+                conn.extra,
+            )
+        ).encode()
+    ).hexdigest()
+
+
+class EWAHConnectionPool(LoggingMixin):
+    """Process-wide pool of open connections, e.g. SSH tunnels or DB connections.
+
+    Pooled connections are identified by a key, e.g. a tuple of connection id
+    and config hash. Shared connections (e.g. SSH tunnels) may be used by many
+    hooks at the same time and are reference counted. Non-shared connections
+    (e.g. DB connections) are used by one hook at a time and returned to the
+    pool when the hook is closed. Either way, a connection that is not in use
+    is closed after idle_timeout seconds or at the latest when the process exits.
+
+    Note that airflow runs each task in its own process, thus connections are
+    re-used within a task, e.g. between source hook, DWH hook and sensor pokes.
+    """
+
+    def __init__(self, name: str, idle_timeout: int = 300):
+        super().__init__()
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        # key -> list of entries; each entry is a list of
+        # [connection, close callable, reference count, released at]
+        self._entries = {}
+        atexit.register(self.close_all)
+
+    def _log_stats(self, hit: bool) -> None:
+        self.log.info(
+            "{0} pool: {1} - {2} hits, {3} misses ({4:.0%} hit rate)".format(
+                self.name,
+                "re-using open connection" if hit else "opened new connection",
+                self.hits,
+                self.misses,
+                self.hits / (self.hits + self.misses),
+            )
+        )
+
+    def acquire(
+        self,
+        key: Hashable,
+        create: Callable[[], Tuple[Any, Callable[[], None]]],
+        shared: bool = False,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Get a connection from the pool or create a new one.
+
+        :param key: Identifies connections that are interchangeable.
+        :param create: Callable that opens a new connection and returns a tuple
+            of the connection and a callable that closes it again.
+        :param shared: Whether the connection may be used by many at once.
+        :param validate: Optional callable that receives a pooled connection and
+            returns True if it is still usable. Exceptions count as unusable.
+        """
+        with self._lock:
+            self._close_idle()
+            entries = self._entries.setdefault(key, [])
+            for entry in list(entries):
+                if not shared and entry[2]:
+                    continue  # in use by someone else
+                try:
+                    usable = validate(entry[0]) if validate else True
+                except Exception as e:
+                    self.log.info("Pooled connection unusable: {0}".format(str(e)))
+                    usable = False
+                if not usable:
+                    if not entry[2]:
+                        entries.remove(entry)
+                        self._close_entry(entry)
+                    continue
+                entry[2] += 1
+                self.hits += 1
+                self._log_stats(hit=True)
+                return entry[0]
+
+        # Create a new connection outside of the lock, it may take a while
+        connection, close = create()
+        with self._lock:
+            self._entries.setdefault(key, []).append([connection, close, 1, None])
+            self.misses += 1
+            self._log_stats(hit=False)
+        return connection
+
+    def release(
+        self,
+        key: Hashable,
+        connection: Any,
+        reset: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """Return a connection to the pool.
+
+        :param reset: Optional callable that resets the connection before it is
+            re-used, e.g. a rollback. If it raises, the connection is closed.
+        """
+        with self._lock:
+            entry = next(
+                (e for e in self._entries.get(key, []) if e[0] is connection), None
+            )
+            if entry is None:
+                return
+            entry[2] -= 1
+            if entry[2] > 0:
+                return
+            try:
+                if reset:
+                    reset(connection)
+            except Exception as e:
+                self.log.info("Closing connection that failed to reset: {0}".format(e))
+                self._entries[key].remove(entry)
+                self._close_entry(entry)
+                return
+            entry[3] = time.monotonic()
+
+        timer = threading.Timer(self.idle_timeout + 1, self.close_idle)
+        timer.daemon = True
+        timer.start()
+
+    def _close_entry(self, entry: list) -> None:
+        try:
+            entry[1]()
+        except Exception as e:
+            self.log.info("Error when closing pooled connection: {0}".format(str(e)))
+
+    def _close_idle(self, idle_timeout: Optional[int] = None) -> None:
+        idle_timeout = self.idle_timeout if idle_timeout is None else idle_timeout
+        now = time.monotonic()
+        for entries in self._entries.values():
+            for entry in list(entries):
+                if not entry[2] and now - entry[3] >= idle_timeout:
+                    entries.remove(entry)
+                    self._close_entry(entry)
+
+    def close_idle(self) -> None:
+        """Close all connections that have not been used for idle_timeout seconds."""
+        with self._lock:
+            self._close_idle()
+
+    def close_all(self) -> None:
+        """Close all connections that are currently not in use."""
+        with self._lock:
+            self._close_idle(idle_timeout=0)
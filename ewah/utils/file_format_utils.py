@@ -0,0 +1,145 @@
+"""Readers for Parquet and Avro files.
+
+The readers yield batches as tuples of column names and rows, where each row
+is a tuple of values in the order of the column names, as accepted by the
+columns argument of EWAHBaseOperator.upload_data.
+"""
+
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import fastavro
+import pyarrow.parquet as pq
+import pytz
+
+
+def _in_timeframe(
+    value: Any,
+    data_from: Optional[datetime] = None,
+    data_until: Optional[datetime] = None,
+) -> bool:
+    """Return True if data_from < value <= data_until. Naive datetimes are
+    assumed to be in UTC if compared with a timezone-aware boundary."""
+    if value is None:
+        return False
+    for boundary in (data_from, data_until):
+        if (
+            isinstance(value, datetime)
+            and isinstance(boundary, datetime)
+            and value.tzinfo is None
+            and boundary.tzinfo is not None
+        ):
+            value = pytz.utc.localize(value)
+            break
+    return (data_from is None or value > data_from) and (
+        data_until is None or value <= data_until
+    )
+
+
+def _get_projection(
+    column_names: Sequence[str],
+    columns: Optional[Sequence[str]],
+    timestamp_field: Optional[str],
+) -> List[str]:
+    if not columns:
+        return list(column_names)
+    return [name for name in column_names if name in columns or name == timestamp_field]
+
+
+def iterate_parquet_batches(
+    file_obj,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 100000,
+    timestamp_field: Optional[str] = None,
+    data_from: Optional[datetime] = None,
+    data_until: Optional[datetime] = None,
+) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """Read a Parquet file row group by row group.
+
+    :param file_obj: Seekable binary file-like object or path.
+    :param columns: Optional list of columns to read, others are not decoded.
+    :param timestamp_field: If data_from or data_until are given, only read rows
+        with data_from < timestamp_field <= data_until. Row groups are skipped
+        based on their statistics, if possible.
+    """
+    parquet_file = pq.ParquetFile(file_obj)
+    projection = _get_projection(
+        parquet_file.schema_arrow.names, columns, timestamp_field
+    )
+    filter_rows = bool(timestamp_field and (data_from or data_until))
+
+    row_groups = []
+    for i in range(parquet_file.num_row_groups):
+        if filter_rows:
+            row_group = parquet_file.metadata.row_group(i)
+            statistics = next(
+                (
+                    row_group.column(j).statistics
+                    for j in range(row_group.num_columns)
+                    if row_group.column(j).path_in_schema == timestamp_field
+                ),
+                None,
+            )
+            if statistics is not None and statistics.has_min_max:
+                try:
+                    # all rows are before data_from or after data_until
+                    before = not _in_timeframe(statistics.max, data_from=data_from)
+                    after = bool(data_until) and _in_timeframe(
+                        statistics.min, data_from=data_until
+                    )
+                    if before or after:
+                        continue  # skip the row group
+                except TypeError:
+                    pass  # statistics are not comparable, read the row group
+        row_groups.append(i)
+    if not row_groups:
+        return
+
+    for batch in parquet_file.iter_batches(
+        batch_size=batch_size, row_groups=row_groups, columns=projection
+    ):
+        names = batch.schema.names
+        rows = list(zip(*[column.to_pylist() for column in batch.columns]))
+        if filter_rows:
+            index = names.index(timestamp_field)
+            rows = [
+                row for row in rows if _in_timeframe(row[index], data_from, data_until)
+            ]
+        if rows:
+            yield names, rows
+
+
+def iterate_avro_batches(
+    file_obj,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 100000,
+    timestamp_field: Optional[str] = None,
+    data_from: Optional[datetime] = None,
+    data_until: Optional[datetime] = None,
+) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """Read an Avro object container file block by block, using fastavro.
+
+    :param file_obj: Binary file-like object, does not need to be seekable.
+    :param columns: Optional list of (top-level) fields to return.
+    :param timestamp_field: If data_from or data_until are given, only return
+        records with data_from < timestamp_field <= data_until.
+    """
+    reader = fastavro.reader(file_obj)
+    names = _get_projection(
+        [field["name"] for field in reader.writer_schema["fields"]],
+        columns,
+        timestamp_field,
+    )
+    filter_rows = bool(timestamp_field and (data_from or data_until))
+    rows = []
+    for record in reader:
+        if filter_rows and not _in_timeframe(
+            record.get(timestamp_field), data_from, data_until
+        ):
+            continue
+        rows.append(tuple(record.get(name) for name in names))
+        if len(rows) >= batch_size:
+            yield names, rows
+            rows = []
+    if rows:
+        yield names, rows
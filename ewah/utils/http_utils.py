@@ -0,0 +1,180 @@
+from airflow.utils.log.logging_mixin import LoggingMixin
+
+from ewah.utils.python_utils import TokenBucket
+
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from requests.adapters import HTTPAdapter
+from typing import Hashable, Optional, Sequence
+
+import random
+import requests
+import threading
+import time
+
+
+class EWAHHTTPClient(LoggingMixin):
+    """HTTP client with a pooled keep-alive session, an optional rate limit and
+    retries of throttled or failed requests.
+
+    Requests are retried on connection errors, timeouts and the retry status
+    codes, waiting as long as a Retry-After header asks for or with exponential
+    backoff with jitter otherwise. Once all retries failed, the last response is
+    returned resp. the last exception is raised, thus callers check the response
+    status as before. The rate limiter is shared by all clients with the same
+    rate_limit_key within a process, e.g. by all hooks of a connection.
+
+    The client is thread-safe and records timing metrics of all requests.
+    """
+
+    _RATE_LIMITERS = {}
+    _RATE_LIMITERS_LOCK = threading.Lock()
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        rate_limit_key: Optional[Hashable] = None,
+        max_retries: int = 5,
+        retry_status_codes: Sequence[int] = (429, 500, 502, 503, 504),
+        max_backoff_seconds: float = 120,
+        timeout=(30, 600),  # seconds to connect resp. to wait for data
+        pool_size: int = 20,
+    ):
+        super().__init__()
+        self.max_retries = max_retries
+        self.retry_status_codes = tuple(retry_status_codes)
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.rate_limiter = None
+        if requests_per_second:
+            with self._RATE_LIMITERS_LOCK:
+                key = (rate_limit_key or id(self), requests_per_second)
+                if not key in self._RATE_LIMITERS:
+                    self._RATE_LIMITERS[key] = TokenBucket(rate=requests_per_second)
+                self.rate_limiter = self._RATE_LIMITERS[key]
+
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "request_seconds": 0.0,
+            "max_request_seconds": 0.0,
+            "rate_limit_wait_seconds": 0.0,
+            "retry_wait_seconds": 0.0,
+            "status_codes": Counter(),
+        }
+
+    def _record(self, started, status_code=None, waited=0):
+        seconds = time.monotonic() - started
+        with self._metrics_lock:
+            self.metrics["requests"] += 1
+            self.metrics["request_seconds"] += seconds
+            self.metrics["max_request_seconds"] = max(
+                seconds, self.metrics["max_request_seconds"]
+            )
+            self.metrics["rate_limit_wait_seconds"] += waited
+            if status_code is None:
+                self.metrics["errors"] += 1
+            else:
+                self.metrics["status_codes"][status_code] += 1
+
+    def _record_retry(self, wait_seconds):
+        with self._metrics_lock:
+            self.metrics["retries"] += 1
+            self.metrics["retry_wait_seconds"] += wait_seconds
+
+    @staticmethod
+    def get_retry_after_seconds(response) -> Optional[float]:
+        """Return the seconds to wait as per the Retry-After header, if any."""
+        retry_after = response.headers.get("Retry-After")
+        if not retry_after:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def get_backoff_seconds(self, retry: int) -> float:
+        """Exponential backoff with jitter, starting at about 1s."""
+        return min(self.max_backoff_seconds, 2**retry) * (0.5 + random.random())
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, as requests.request, with rate limit and retries."""
+        kwargs.setdefault("timeout", self.timeout)
+        retry = 0
+        while True:
+            waited = self.rate_limiter.consume() if self.rate_limiter else 0
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(started, waited=waited)
+                if retry >= self.max_retries:
+                    raise
+                wait_seconds = self.get_backoff_seconds(retry)
+                reason = str(e)
+            else:
+                self._record(started, response.status_code, waited)
+                if (
+                    not response.status_code in self.retry_status_codes
+                    or retry >= self.max_retries
+                ):
+                    return response
+                wait_seconds = self.get_retry_after_seconds(response)
+                if wait_seconds is None:
+                    wait_seconds = self.get_backoff_seconds(retry)
+                reason = "status {0}".format(response.status_code)
+                response.close()
+            retry += 1
+            self.log.info(
+                "{0} {1} failed ({2}), retry {3}/{4} in {5:.1f}s...".format(
+                    method.upper(), url, reason, retry, self.max_retries, wait_seconds
+                )
+            )
+            self._record_retry(wait_seconds)
+            time.sleep(wait_seconds)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def log_metrics(self) -> None:
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        if not metrics["requests"]:
+            return
+        self.log.info(
+            "HTTP requests: {0} ({1} retries, {2} errors), status codes: {3}\n"
+            "Request time: {4:.1f}s total, {5:.3f}s average, {6:.3f}s max\n"
+            "Waited {7:.1f}s for the rate limit and {8:.1f}s for retries".format(
+                metrics["requests"],
+                metrics["retries"],
+                metrics["errors"],
+                dict(metrics["status_codes"]),
+                metrics["request_seconds"],
+                metrics["request_seconds"] / metrics["requests"],
+                metrics["max_request_seconds"],
+                metrics["rate_limit_wait_seconds"],
+                metrics["retry_wait_seconds"],
+            )
+        )
+
+    def close(self) -> None:
+        self.session.close()
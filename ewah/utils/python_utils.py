@@ -1,6 +1,198 @@
+from collections import deque
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+import queue
 import six
+import threading
+import time
 
 
 def is_iterable_not_string(obj):
     return isinstance(obj, Iterable) and not isinstance(obj, six.string_types)
+
+
+_PRODUCER_DONE = object()
+
+
+def iterate_concurrently(
+    generator_functions: List[Callable[[], Iterable]],
+    max_workers: Optional[int] = None,
+    max_queue_size: Optional[int] = None,
+) -> Iterator:
+    """Run generator functions in threads and yield their items as they come,
+    in no particular order.
+
+    Items are passed through a bounded queue, thus producers pause while the
+    consumer is busy and memory usage stays bounded. An exception in a producer
+    is raised in the consumer. If the consumer stops early, the producers stop
+    after their current item.
+
+    :param generator_functions: Callables without arguments that each return an
+        iterable, e.g. a generator.
+    :param max_workers: Number of threads, defaults to one per generator function.
+    :param max_queue_size: Number of items that may be waiting for the consumer,
+        defaults to twice the number of threads.
+    """
+    generator_functions = list(generator_functions)
+    if not generator_functions:
+        return
+    max_workers = max_workers or len(generator_functions)
+    results = queue.Queue(maxsize=max_queue_size or 2 * max_workers)
+    stop = threading.Event()
+
+    def put(result):
+        while not stop.is_set():
+            try:
+                results.put(result, timeout=1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce(generator_function):
+        try:
+            if stop.is_set():
+                return
+            for item in generator_function():
+                if not put((True, item)):
+                    return
+        except Exception as e:
+            put((False, e))
+        finally:
+            put(_PRODUCER_DONE)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for generator_function in generator_functions:
+            executor.submit(produce, generator_function)
+        try:
+            pending = len(generator_functions)
+            while pending:
+                result = results.get()
+                if result is _PRODUCER_DONE:
+                    pending -= 1
+                    continue
+                success, item = result
+                if not success:
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+
+class TokenBucket:
+    """Thread-safe token bucket to limit the rate of e.g. requests or consumed
+    capacity units.
+
+    Tokens are refilled at rate per second, up to capacity. Consuming more tokens
+    than available is allowed, but the caller then waits until the deficit is
+    refilled. Thus, the cost of a call can also be consumed after the call, once
+    it is known.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        assert rate > 0, "rate must be positive!"
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens: float = 1) -> float:
+        """Consume tokens, waiting as long as required. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= tokens
+            wait_seconds = max(0, -self._tokens / self.rate)
+        if wait_seconds:
+            time.sleep(wait_seconds)
+        return wait_seconds
+
+    def try_consume(self, tokens: float = 1) -> bool:
+        """Consume tokens only if they are available without waiting. Returns
+        whether they were consumed."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def sync(
+        self,
+        available: float,
+        rate: Optional[float] = None,
+        capacity: Optional[float] = None,
+    ) -> None:
+        """Reduce the available tokens to available, e.g. as reported by the rate
+        limit headers of an API, and optionally update rate and capacity.
+
+        The tokens are never increased, because a reported value does not yet
+        account for requests that are still in flight.
+        """
+        with self._lock:
+            if rate:
+                self.rate = rate
+            if capacity:
+                self.capacity = capacity
+            self._tokens = min(self._tokens, available, self.capacity)
+
+
+def prefetch_in_order(
+    items: Iterable,
+    fetch: Callable[[Any], Any],
+    get_size: Callable[[Any], int],
+    max_workers: int = 10,
+    max_bytes: int = 100 * 1024 * 1024,
+    max_items: Optional[int] = None,
+    fetch_large: Optional[Callable[[Any], Any]] = None,
+) -> Iterator[Tuple[Any, Any]]:
+    """Yield tuples of item and fetch(item) in the order of items, while the
+    next items are fetched concurrently in the background, e.g. downloads.
+
+    Fetching ahead stops at max_bytes, as per get_size(item), or at max_items.
+    Items larger than max_bytes are not fetched ahead but with fetch_large (or
+    fetch) once they are next, e.g. to stream them instead of holding them in
+    memory.
+    """
+    fetch_large = fetch_large or fetch
+    items = iter(items)
+    next_item = next(items, None)
+    pending = deque()  # tuples of item, future and size
+    fetched_bytes = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while next_item is not None or pending:
+                while next_item is not None and (
+                    not max_items or len(pending) < max_items
+                ):
+                    size = get_size(next_item)
+                    if size > max_bytes:
+                        pending.append((next_item, None, 0))
+                    elif pending and fetched_bytes + size > max_bytes:
+                        break  # wait until earlier items are processed
+                    else:
+                        future = executor.submit(fetch, next_item)
+                        pending.append((next_item, future, size))
+                        fetched_bytes += size
+                    next_item = next(items, None)
+
+                item, future, size = pending.popleft()
+                result = future.result() if future else fetch_large(item)
+                try:
+                    yield item, result
+                finally:
+                    fetched_bytes -= size
+        finally:
+            for _, future, _ in pending:
+                if future:
+                    future.cancel()
@@ -28,6 +28,7 @@ setuptools.setup(
         "croniter",
         "cx_Oracle",
         "facebook_business",
+        "fastavro",
         "google-ads>=16.0.0",
         "google-cloud-bigquery",
         "google-cloud-storage",
@@ -35,11 +36,13 @@ setuptools.setup(
         "gspread>=3.6",
         "Jinja2",
         "mailchimp3",
+        "mysql-replication",
         "oauth2client",
         "Office365-REST-Python-Client",
         "openpyxl",
         "protobuf",
         "psycopg2",
+        "pyarrow",
         "pyairtable",
         "pymongo",
         "pymssql==2.3.1",  # Version 2.3.2 fails to build wheel due to missing file sqlfront.h